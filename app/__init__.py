@@ -1,10 +1,111 @@
-import secrets
+import os
 from flask import Flask
+from app.settings import load_secret_key
 
 # Create the Flask app instance
 app = Flask(__name__)
-# Generate a secure secret key
-app.config['SECRET_KEY'] = secrets.token_hex(16)
+# Key that signs session cookies; when unset, one generated key is shared through the instance folder
+app.config['SECRET_KEY'] = None
+# SQLite database file, next to the app package by default
+app.config['DATABASE'] = os.path.join(os.path.dirname(app.root_path), "radioactive.db")
+# Pragmas applied to every pooled connection: WAL lets readers run alongside a writer
+app.config['SQLITE_PRAGMAS'] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,     # 16 MB page cache
+    "mmap_size": 268435456,   # 256 MB memory-mapped I/O
+    "busy_timeout": 5000,
+}
+# Seconds between checks for changes to the elements catalog
+app.config['CATALOG_CHECK_INTERVAL'] = 5.0
+# Elements kept in the in-memory catalog cache (the rest are read from SQLite on demand)
+app.config['CATALOG_CACHE_SIZE'] = 4096
+# Seconds browsers may reuse /element/<id>/units and /elements/search before revalidating with their ETags
+app.config['ELEMENT_UNITS_MAX_AGE'] = 300
+# Elements listed in form dropdowns before the type-ahead is used, and the most results per search
+app.config['ELEMENT_CHOICES_LIMIT'] = 50
+app.config['ELEMENT_SEARCH_LIMIT'] = 20
+# Seconds browsers may keep fingerprinted static files and the versioned plotly.js bundle
+app.config['STATIC_MAX_AGE'] = 31536000
+# Number of simulations per history page
+app.config['HISTORY_PAGE_SIZE'] = 50
+# Rows fetched from SQLite per chunk when streaming a history export
+app.config['EXPORT_BATCH_SIZE'] = 500
+# Most simulations in one combined PDF report, and reports rendered per batch of a ZIP download
+app.config['REPORT_MAX_PDF_SIMULATIONS'] = 100
+app.config['REPORT_BATCH_SIZE'] = 8
+# Busiest users and elements listed on the /stats dashboard
+app.config['STATS_TOP'] = 10
+# Directory of the history page's curve thumbnails, their size in pixels and thumbnails
+# drawn per batch by the background worker
+app.config['THUMBNAIL_DIR'] = os.path.join(app.instance_path, "thumbnails")
+app.config['THUMBNAIL_SIZE'] = (120, 36)
+app.config['THUMBNAIL_BATCH_SIZE'] = 32
+# Most simulations overlaid on one comparison chart, and points sent to the browser for the
+# whole chart (split between the curves)
+app.config['COMPARE_MAX_SIMULATIONS'] = 50
+app.config['COMPARE_POINT_BUDGET'] = 2000
+# Largest number of simulations accepted by /api/simulations/batch
+app.config['BATCH_MAX_SIZE'] = 10000
+# Send plots as a JSON figure spec ("json") or as inline HTML with plotly.js ("html")
+app.config['PLOT_PAYLOAD'] = "json"
+# Largest gap between a drawn decay curve and the exact one, as a fraction of the y axis
+app.config['PLOT_TOLERANCE'] = 1e-3
+# Number of rendered plots kept in memory (0 disables the plot cache)
+app.config['PLOT_CACHE_SIZE'] = 256
+# Worker processes for WeasyPrint (0 renders on the request thread) and cached PDFs
+app.config['PDF_WORKERS'] = 2
+app.config['PDF_CACHE_SIZE'] = 64
+# Render the PDF report in the background as soon as a simulation is saved
+app.config['PDF_PRERENDER'] = False
+# Werkzeug hash method and salt length for passwords; older hashes are upgraded at login
+app.config['PASSWORD_HASH_METHOD'] = "scrypt:32768:8:1"
+app.config['PASSWORD_SALT_LENGTH'] = 16
+# Threads that may hash passwords at once (0 hashes on the request thread)
+app.config['PASSWORD_HASH_WORKERS'] = 2
+# Server processes sharing this machine (gunicorn.conf.py sets it to its worker count)
+app.config['SERVER_WORKERS'] = 1
+# Worker processes for Monte Carlo trajectories (0 samples on the request thread; None shares
+# the CPUs among the server processes), trajectories per shard, and the largest number of
+# trajectories per simulation
+app.config['STOCHASTIC_WORKERS'] = None
+app.config['STOCHASTIC_SHARD_SIZE'] = 1000
+app.config['STOCHASTIC_MAX_TRAJECTORIES'] = 10000
+# Memory one parameter sweep may use, sweeps kept in memory, and most cells plotted (larger grids are thinned)
+app.config['SWEEP_MEMORY_BUDGET'] = 32 * 2 ** 20
+app.config['SWEEP_CACHE_SIZE'] = 4
+app.config['SWEEP_PLOT_CELLS'] = 40000
+# Worker processes for background jobs (0 runs them on the dispatcher thread), jobs one user
+# may have running at once and queued or running in total, seconds between polls of the
+# queue, seconds finished jobs and their results are kept, seconds a running job's lease
+# lasts without renewal (then another server runs it again), and where result bodies go
+app.config['JOB_WORKERS'] = 2
+app.config['JOB_MAX_RUNNING_PER_USER'] = 1
+app.config['JOB_MAX_PENDING_PER_USER'] = 10
+app.config['JOB_POLL_INTERVAL'] = 0.5
+app.config['JOB_RESULT_TTL'] = 86400
+app.config['JOB_LEASE_SECONDS'] = 60
+app.config['JOB_RESULT_DIR'] = os.path.join(app.instance_path, "job_results")
+# Logging level of the app ("DEBUG" logs every login attempt)
+app.config['LOG_LEVEL'] = "WARNING"
+# Collect latency histograms served on /metrics, and add a Server-Timing header to responses
+app.config['METRICS_ENABLED'] = True
+app.config['SERVER_TIMING'] = False
+# Load the rendering libraries in create_app() (before a pre-fork server forks its workers)
+app.config['WARM_UP'] = False
+
+# Any setting can be overridden with a RADIOACTIVE_ environment variable (JSON values are
+# parsed), e.g. RADIOACTIVE_SECRET_KEY=... or RADIOACTIVE_DATABASE=/srv/radioactive.db
+app.config.from_prefixed_env("RADIOACTIVE")
+
+# Every server process starts its own sampling pool, so together they use about one process per CPU
+if app.config['STOCHASTIC_WORKERS'] is None:
+    app.config['STOCHASTIC_WORKERS'] = max(1, (os.cpu_count() or 1) // max(1, app.config['SERVER_WORKERS']))
+
+# Every worker and every restart must sign sessions with the same key
+if not app.config['SECRET_KEY']:
+    app.config['SECRET_KEY'] = load_secret_key(os.path.join(app.instance_path, "secret_key"))
 
 # Import route definitions
 from app import routes
+from app.server import create_app
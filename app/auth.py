@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from werkzeug.security import generate_password_hash, check_password_hash
+from app.pools import LazyPool
+
+# Hash method and salt length for new hashes, in werkzeug's "method:params" form
+_method = "scrypt:32768:8:1"
+_salt_length = 16
+# Threads allowed to hash at once (0 hashes on the request thread). hashlib releases
+# the GIL while hashing, so this bounds the CPU a burst of logins can take
+_pool = LazyPool(lambda max_workers: ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hash"))
+
+
+def configure_hashing(method, salt_length, max_workers):
+    global _method, _salt_length
+    _method, _salt_length = method, salt_length
+    _pool.resize(max_workers)
+
+
+def _run(function, *args):
+    # Hash in the bounded pool (started on first use), or inline when it is disabled
+    pool = _pool.get()
+    if pool is None:
+        return function(*args)
+    return pool.submit(function, *args).result()
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method, salt_length):
+    # Werkzeug fills in default parameters ("pbkdf2:sha256" → "pbkdf2:sha256:1000000"),
+    # so hash once to learn the exact prefix stored hashes will carry
+    return generate_password_hash("", method, salt_length).split("$", 1)[0]
+
+
+@lru_cache(maxsize=8)
+def _dummy_hash(method, salt_length):
+    # Checked when the username doesn't exist, so unknown users take as long as wrong passwords
+    return generate_password_hash("", method, salt_length)
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, _method, _salt_length)
+
+
+def needs_rehash(stored_hash):
+    # True when a hash was made with other parameters than the configured ones
+    return stored_hash.split("$", 1)[0] != _method_prefix(_method, _salt_length)
+
+
+def verify_password(stored_hash, password):
+    """Check a password exactly once; return (matches, new_hash).
+
+    `new_hash` is a hash with the current parameters when the stored one is outdated
+    and the password matched, otherwise None. A missing `stored_hash` never matches.
+    """
+    if stored_hash is None:
+        _run(check_password_hash, _dummy_hash(_method, _salt_length), password)
+        return False, None
+
+    if not _run(check_password_hash, stored_hash, password):
+        return False, None
+
+    # The plain password is only available now, so upgrade outdated hashes at login
+    if needs_rehash(stored_hash):
+        return True, hash_password(password)
+    return True, None
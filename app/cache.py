@@ -0,0 +1,93 @@
+from collections import OrderedDict
+import threading
+
+
+class LRUCache:
+    """Bounded, thread-safe least-recently-used cache with hit/miss counters."""
+
+    def __init__(self, maxsize=128, on_evict=None):
+        self.maxsize = maxsize
+        # Optional callback(key, value) run when an entry is dropped
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        # Return the cached value, marking it as the most recently used
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        # Build the value outside the lock so slow renders don't block other threads
+        value = factory()
+        if self.maxsize > 0:
+            self.set(key, value)
+        return value
+
+    def get(self, key, default=None):
+        # Return the cached value (marking it as recently used), or `default`
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            evicted = self._shrink()
+        self._evict(evicted)
+
+    def invalidate(self, key):
+        # Drop a single entry if it is cached
+        with self._lock:
+            value = self._data.pop(key, None)
+        if value is not None:
+            self._evict([(key, value)])
+
+    def invalidate_if(self, predicate):
+        # Drop every entry whose key matches the predicate
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            evicted = [(key, self._data.pop(key)) for key in keys]
+        self._evict(evicted)
+
+    def resize(self, maxsize):
+        # Change the capacity, evicting the oldest entries if it shrinks
+        with self._lock:
+            self.maxsize = maxsize
+            evicted = self._shrink()
+        self._evict(evicted)
+
+    def clear(self):
+        with self._lock:
+            evicted = list(self._data.items())
+            self._data.clear()
+        self._evict(evicted)
+
+    def stats(self):
+        # Counts since the cache was created (clear() keeps them), as served on /metrics
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self._data), "maxsize": self.maxsize}
+
+    def _shrink(self):
+        # Pop least recently used entries until the cache fits; caller holds the lock
+        evicted = []
+        while len(self._data) > max(self.maxsize, 0):
+            evicted.append(self._data.popitem(last=False))
+        return evicted
+
+    def _evict(self, entries):
+        if self.on_evict is None:
+            return
+        for key, value in entries:
+            self.on_evict(key, value)
@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+import time
+from flask import current_app
+from app.cache import LRUCache
+from app.db import get_db_connection
+
+
+class ElementCatalog:
+    """Cached lookups of the elements table, dropped when the catalog version changes.
+
+    The table can hold a full nuclide catalog, so only recently used elements are kept
+    in memory (`maxsize`); the rest are read by primary key on demand.
+    """
+
+    def __init__(self, check_interval=5.0, maxsize=4096):
+        # Seconds between checks of the catalog_version row
+        self.check_interval = check_interval
+        self.version = None
+        self._path = None
+        # element id -> element dict, or None for ids that don't exist
+        self._cache = LRUCache(maxsize=maxsize)
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, element_id):
+        # Return the element as a dict, or None if it doesn't exist
+        self._refresh()
+        return self._cache.get_or_create(element_id, lambda: self._read_element(element_id))
+
+    def current_version(self):
+        # The catalog version, checked against the database like get()
+        self._refresh()
+        return self.version
+
+    def invalidate(self):
+        # Force a reload on next access (after writes made by this process)
+        with self._lock:
+            self.version = None
+
+    def resize(self, maxsize):
+        self._cache.resize(maxsize)
+
+    def load(self, conn, path):
+        # Read the version and warm the cache with as many elements as it holds
+        version = self._read_version(conn)
+        rows = conn.execute("""
+            SELECT id, name, half_life, unit, quantity_unit FROM elements ORDER BY id LIMIT ?
+        """, (self._cache.maxsize,)).fetchall()
+        with self._lock:
+            self._cache.clear()
+            for row in rows:
+                self._cache.set(row["id"], dict(row))
+            self.version, self._path = version, path
+            self._checked_at = time.monotonic()
+
+    def _read_element(self, element_id):
+        row = get_db_connection().execute("""
+            SELECT id, name, half_life, unit, quantity_unit FROM elements WHERE id = ?
+        """, (element_id,)).fetchone()
+        return dict(row) if row else None
+
+    def _refresh(self):
+        # Reload when the database changed, the catalog was invalidated or its version moved
+        path = current_app.config["DATABASE"]
+        conn = get_db_connection()
+        if self.version is None or self._path != path:
+            self.load(conn, path)
+            return
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        if self._read_version(conn) != self.version:
+            self.load(conn, path)
+        else:
+            self._checked_at = time.monotonic()
+
+    @staticmethod
+    def _read_version(conn):
+        # Databases without migration 002 have no version row; they only reload on invalidate()
+        try:
+            row = conn.execute("SELECT version FROM catalog_version WHERE id = 1").fetchone()
+        except sqlite3.OperationalError:
+            return 0
+        return row["version"] if row else 0
+
+
+# Shared by every request thread in this process
+catalog = ElementCatalog()
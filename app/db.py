@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from flask import g, current_app
+from app.metrics import SQL_LATENCY
+
+# One long-lived connection per worker thread, reused across requests
+_local = threading.local()
+
+
+@lru_cache(maxsize=512)
+def statement_kind(sql):
+    # Metric label for a statement: its first keyword (SELECT, INSERT, ...)
+    return sql.split(None, 1)[0].upper() if sql.strip() else "EMPTY"
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records the time spent in each SQLite call."""
+
+    def execute(self, sql, parameters=()):
+        with SQL_LATENCY.time(statement_kind(sql), timing="sql"):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        with SQL_LATENCY.time(statement_kind(sql), timing="sql"):
+            return super().executemany(sql, seq_of_parameters)
+
+    def fetchone(self):
+        with SQL_LATENCY.time("FETCH", timing="sql"):
+            return super().fetchone()
+
+    def fetchmany(self, size=None):
+        with SQL_LATENCY.time("FETCH", timing="sql"):
+            return super().fetchmany(self.arraysize if size is None else size)
+
+    def fetchall(self):
+        with SQL_LATENCY.time("FETCH", timing="sql"):
+            return super().fetchall()
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose statements and commits go through TimedCursor and the SQL metrics."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        with SQL_LATENCY.time("COMMIT", timing="sql"):
+            super().commit()
+
+
+def open_connection(path, pragmas):
+    # Open a timed connection and apply the performance pragmas
+    conn = sqlite3.connect(path, timeout=30, factory=TimedConnection)
+    # Enable dictionary-style access to columns
+    conn.row_factory = sqlite3.Row
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def get_db_connection():
+    # Reuse the connection already handed out in this app context
+    if "db" in g:
+        return g.db
+
+    # Otherwise take this thread's pooled connection, opening it on first use
+    path = current_app.config["DATABASE"]
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != path:
+        if conn is not None:
+            conn.close()
+        conn = open_connection(path, current_app.config["SQLITE_PRAGMAS"])
+        _local.conn = conn
+        _local.path = path
+
+    g.db = conn
+    return conn
+
+
+def release_db_connection(exception=None):
+    # Return the connection to the thread pool, discarding uncommitted work
+    conn = g.pop("db", None)
+    if conn is not None and conn.in_transaction:
+        conn.rollback()
+
+
+# Numbered SQL scripts applied in order; PRAGMA user_version records the last one run
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+# Base tables, created if missing before the migrations run
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "schema.sql")
+
+
+def initialize_database(path):
+    # Create the base tables if needed, then apply pending migrations
+    conn = sqlite3.connect(path)
+    try:
+        with open(SCHEMA_PATH) as f:
+            conn.executescript(f.read())
+    finally:
+        conn.close()
+    return migrate_database(path)
+
+
+def migrate_database(path):
+    # Apply every migration newer than the database's user_version
+    conn = sqlite3.connect(path)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+            if not filename.endswith(".sql"):
+                continue
+            number = int(filename.split("_", 1)[0])
+            if number <= version:
+                continue
+            with open(os.path.join(MIGRATIONS_DIR, filename)) as f:
+                script = f.read()
+            # Run the migration and its version bump as one transaction, so a failure
+            # leaves the database exactly as it was before this migration
+            try:
+                conn.executescript(f"BEGIN;\n{script}\n;PRAGMA user_version = {number};\nCOMMIT;")
+            except Exception:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            version = number
+        return version
+    finally:
+        conn.close()
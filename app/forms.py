@@ -1,6 +1,7 @@
 from flask_wtf import FlaskForm
-from wtforms import FloatField, SubmitField, StringField, PasswordField, SelectField
-from wtforms.validators import DataRequired, NumberRange, EqualTo, Length
+from wtforms import (FloatField, IntegerField, SubmitField, StringField, PasswordField, SelectField, DateField,
+                     SelectMultipleField)
+from wtforms.validators import DataRequired, InputRequired, NumberRange, EqualTo, Length, Optional
 
 # Form for entering radioactive decay simulation parameters
 class DecayForm(FlaskForm):
@@ -13,6 +14,12 @@ class DecayForm(FlaskForm):
     # Field to enter the elapsed time t (must be a positive float)
     t = FloatField("Elapsed time (t)", validators=[DataRequired(), NumberRange(min=0)])
 
+    # Optional Monte Carlo mode: number of simulated trajectories (N₀ is taken as a count of atoms)
+    trajectories = IntegerField("Monte Carlo trajectories", validators=[Optional(), NumberRange(min=0)])
+
+    # Optional seed to reproduce a previous Monte Carlo run (random when left empty)
+    seed = IntegerField("Random seed", validators=[Optional(), NumberRange(min=0)])
+
     # Button to submit the form and trigger the simulation
     submit = SubmitField("Calculate")
 
@@ -75,3 +82,74 @@ class ChangePasswordForm(FlaskForm):
 
     # Button to submit the password change request
     submit = SubmitField("Change Password")
+
+
+# Form for filtering the simulation history (submitted as GET query parameters)
+class HistoryFilterForm(FlaskForm):
+    class Meta:
+        # Filters only read data, so they don't need a CSRF token
+        csrf = False
+
+    # Dropdown menu to restrict the history to one element (0 means all)
+    element = SelectField("Element", choices=[], coerce=int, default=0, validators=[Optional()])
+
+    # Date range of the simulations (inclusive)
+    date_from = DateField("From", validators=[Optional()])
+    date_to = DateField("To", validators=[Optional()])
+
+    # Value ranges for the initial quantity, elapsed time and remaining quantity
+    n0_min = FloatField("N₀ min", validators=[Optional()])
+    n0_max = FloatField("N₀ max", validators=[Optional()])
+    t_min = FloatField("t min", validators=[Optional()])
+    t_max = FloatField("t max", validators=[Optional()])
+    nt_min = FloatField("N(t) min", validators=[Optional()])
+    nt_max = FloatField("N(t) max", validators=[Optional()])
+
+    # Button to apply the filters
+    submit = SubmitField("Filter")
+
+
+# Form for simulating a whole decay chain
+class ChainForm(FlaskForm):
+    # Dropdown menu to select a decay chain (populated dynamically)
+    chain = SelectField("Decay chain", choices=[], coerce=int)
+
+    # Field to enter the initial quantity N₀ of the parent isotope
+    n0 = FloatField("Initial quantity of the parent (N₀)", validators=[DataRequired(), NumberRange(min=0)])
+
+    # Field to enter the elapsed time t, in the chain's time unit
+    t = FloatField("Elapsed time (t)", validators=[DataRequired(), NumberRange(min=0)])
+
+    # Button to submit the form and run the chain simulation
+    submit = SubmitField("Calculate")
+
+
+# Form for sweeping N₀ and t over a grid for one or more elements (submitted as GET query parameters)
+class SweepForm(FlaskForm):
+    class Meta:
+        # Sweeps only read data, and the same query string is reused for the downloads
+        csrf = False
+
+    # Elements to evaluate (populated dynamically)
+    elements = SelectMultipleField("Elements", choices=[], coerce=int, validators=[DataRequired()])
+
+    # Evenly spaced initial quantities: first, last and number of values (0 is a valid bound,
+    # so the bounds only need to be filled in rather than non-zero)
+    n0_min = FloatField("N₀ from", validators=[InputRequired(), NumberRange(min=0)])
+    n0_max = FloatField("N₀ to", validators=[InputRequired(), NumberRange(min=0)])
+    n0_steps = IntegerField("N₀ steps", default=50, validators=[DataRequired(), NumberRange(min=1)])
+
+    # Evenly spaced elapsed times, in the chosen time unit
+    t_min = FloatField("t from", default=0, validators=[Optional(), NumberRange(min=0)])
+    t_max = FloatField("t to", validators=[InputRequired(), NumberRange(min=0)])
+    t_steps = IntegerField("t steps", default=100, validators=[DataRequired(), NumberRange(min=1)])
+
+    # Time unit of the t axis; each element's half-life is converted to it
+    unit = SelectField("Time unit", choices=[("seconds", "seconds"), ("minutes", "minutes"), ("hours", "hours"),
+                                             ("days", "days"), ("years", "years")], default="years")
+
+    # Plot the grid as a heatmap or a 3D surface
+    view = SelectField("View", choices=[("heatmap", "Heatmap"), ("surface", "Surface")], default="heatmap")
+
+    # Button to submit the form and evaluate the grid
+    submit = SubmitField("Sweep")
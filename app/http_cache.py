@@ -0,0 +1,107 @@
+import hashlib
+import os
+from datetime import datetime
+from functools import lru_cache, wraps
+from flask import g, request, url_for, current_app
+from werkzeug.http import is_resource_modified
+
+
+@lru_cache(maxsize=256)
+def _file_digest(path, mtime_ns, size):
+    # Keyed on the file's stat, so an edited file gets a new digest without a restart
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def static_fingerprint(filename):
+    # Short content hash of a file in the static folder
+    path = os.path.join(current_app.static_folder, filename)
+    stat = os.stat(path)
+    return _file_digest(path, stat.st_mtime_ns, stat.st_size)
+
+
+def static_url(filename):
+    # Static URL with the file's fingerprint, so it can be cached forever and still change on deploy
+    return url_for("static", filename=filename, v=static_fingerprint(filename))
+
+
+@lru_cache(maxsize=1)
+def template_fingerprint():
+    # Digest of every template, part of page ETags so a deploy invalidates cached pages
+    digest = hashlib.sha1()
+    folder = os.path.join(current_app.root_path, current_app.template_folder)
+    for root, _, files in sorted(os.walk(folder)):
+        for name in sorted(files):
+            with open(os.path.join(root, name), "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def make_etag(*parts):
+    # Strong validator from everything a response is built from
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def row_last_modified(timestamp):
+    # Simulation timestamps are stored as local "YYYY-MM-DD HH:MM:SS" text
+    return datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").astimezone()
+
+
+def not_modified(response_class, etag, last_modified=None):
+    """Return a 304 response if the client's copy is current, otherwise None.
+
+    Checked before any rendering, so a revalidation costs only the query for the row.
+    """
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    response = response_class(status=304)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    # Personal data: browsers may keep a copy but must revalidate it before reuse
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def no_store(f):
+    # Mark a view as sensitive: its responses are never written to any cache
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.no_store = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def apply_cache_policy(response, static_max_age):
+    """Fill in Cache-Control for responses whose view did not choose a policy."""
+    # Fingerprinted static files never change under the same URL
+    if request.endpoint == "static" and response.status_code in (200, 304):
+        filename = (request.view_args or {}).get("filename")
+        version = request.args.get("v")
+        if version is not None and filename and version == static_fingerprint(filename):
+            response.cache_control.public = True
+            response.cache_control.max_age = static_max_age
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
+
+    # Sensitive pages (credentials, forms with account data) are never stored
+    if g.get("no_store"):
+        response.headers["Cache-Control"] = "no-store"
+        response.headers["Pragma"] = "no-cache"
+        return response
+
+    # Views that set their own policy (versioned assets, validators) keep it
+    if "Cache-Control" in response.headers:
+        return response
+
+    # Everything else is per-user and may change at any time: keep it private and revalidate
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
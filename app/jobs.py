@@ -0,0 +1,370 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from functools import wraps
+from urllib.parse import urlencode
+from flask import request, session, jsonify, redirect, url_for, current_app
+from werkzeug.http import parse_options_header
+from app.db import get_db_connection, open_connection
+from app.pools import LazyPool
+
+logger = logging.getLogger(__name__)
+
+# Jobs one user may have running at once and queued or running in total, seconds between
+# queue polls, seconds finished jobs and their results are kept, and seconds a running
+# job's lease lasts without being renewed
+_max_running_per_user = 1
+_max_pending_per_user = 10
+_poll_interval = 0.5
+_result_ttl = 86400
+_lease = 60
+
+# Worker processes for jobs (0 runs them on the dispatcher thread), started by the dispatcher
+# with its app settings. They are spawned rather than forked, so they never inherit the
+# server's threads, locks or other pools
+_pool = LazyPool(lambda max_workers, config: ProcessPoolExecutor(
+    max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+    initializer=_init_worker, initargs=(config,)))
+_dispatcher = None
+_lock = threading.Lock()
+
+
+def configure_jobs(max_workers, max_running_per_user, max_pending_per_user, poll_interval, result_ttl, lease):
+    global _max_running_per_user, _max_pending_per_user, _poll_interval, _result_ttl, _lease
+    _pool.resize(max_workers)
+    with _lock:
+        _max_running_per_user, _max_pending_per_user = max_running_per_user, max_pending_per_user
+        _poll_interval, _result_ttl, _lease = poll_interval, result_ttl, lease
+
+
+def _now():
+    # Same text format as simulation timestamps
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _init_worker(config):
+    # Runs once in every job process: use the parent's settings, but render and sample
+    # inline, since the job process is already one of the workers
+    from app import app
+    from app.routes import configure_services
+    app.config.update(config)
+    app.config.update(PDF_WORKERS=0, STOCHASTIC_WORKERS=0, PASSWORD_HASH_WORKERS=0, JOB_WORKERS=0)
+    configure_services()
+
+
+def result_path(directory, job_id):
+    # File holding a finished job's response body
+    return os.path.join(directory, f"{job_id}.result")
+
+
+def run_job(job_id, user_id, username, path, query_string):
+    """Replay a queued GET request as its user; return (status, mimetype, filename, result_path).
+
+    Jobs are ordinary requests run through the whole app (login check, hooks, streaming
+    responses), so any GET route marked with @background_capable can be queued unchanged.
+    The body is written to JOB_RESULT_DIR chunk by chunk as the route produces it, so
+    streamed downloads such as ZIP reports never sit in memory whole.
+    """
+    from app import app
+    with app.test_request_context(path, query_string=query_string):
+        session["user_id"] = user_id
+        session["username"] = username
+        response = app.full_dispatch_request()
+        try:
+            directory = app.config["JOB_RESULT_DIR"]
+            os.makedirs(directory, exist_ok=True)
+            body_path = result_path(directory, job_id)
+            # Renamed into place once complete, so a download never sees a partial body
+            temporary = f"{body_path}.{os.getpid()}.{threading.get_ident()}"
+            with open(temporary, "wb") as f:
+                for chunk in response.iter_encoded():
+                    f.write(chunk)
+            os.replace(temporary, body_path)
+        finally:
+            response.close()
+        _, options = parse_options_header(response.headers.get("Content-Disposition", ""))
+        return response.status_code, response.mimetype, options.get("filename"), body_path
+
+
+def claim_job(conn, owner):
+    """Mark the oldest claimable job as running under `owner`'s lease and return it, or None.
+
+    Claimable means queued, or running under a lease nobody renewed for `_lease` seconds
+    (its server stopped or crashed mid-job), for a user under the running limit; expired
+    leases don't count towards it. BEGIN IMMEDIATE makes this safe with dispatchers in
+    several server processes.
+    """
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        job = conn.execute("""
+            UPDATE jobs SET status = 'running', started_at = ?, claimed_by = ?, claimed_at = ?
+            WHERE id = (
+                SELECT j.id FROM jobs j
+                WHERE (j.status = 'queued' OR (j.status = 'running' AND j.claimed_at < ?))
+                  AND (SELECT COUNT(*) FROM jobs r
+                       WHERE r.user_id = j.user_id AND r.status = 'running' AND r.claimed_at >= ?) < ?
+                ORDER BY j.id
+                LIMIT 1
+            )
+            RETURNING id, user_id, username, path, query_string
+        """, (_now(), owner, now, now - _lease, now - _lease, _max_running_per_user)).fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return job
+
+
+def finish_job(conn, job_id, owner, outcome):
+    # Store where a job's response is, or the error that stopped it; a dispatcher whose
+    # lease expired and was taken over leaves the row to the new owner
+    status_code, mimetype, filename, path, error = outcome
+    status = "done" if error is None and status_code == 200 else "failed"
+    if error is None and status_code != 200:
+        error = f"The request finished with HTTP {status_code}."
+    updated = conn.execute("""
+        UPDATE jobs SET status = ?, finished_at = ?, status_code = ?, mimetype = ?, filename = ?,
+                        result_path = ?, error = ?, claimed_at = NULL
+        WHERE id = ? AND claimed_by = ? AND status = 'running'
+    """, (status, _now(), status_code, mimetype, filename, path if status == "done" else None, error,
+          job_id, owner)).rowcount
+    conn.commit()
+    # Only successful jobs keep their body
+    if path is not None and status != "done" and updated:
+        _remove(path)
+
+
+def renew_leases(conn, owner, job_ids):
+    # Push back the lease of every job this dispatcher is still running
+    if job_ids:
+        conn.execute(f"""
+            UPDATE jobs SET claimed_at = ?
+            WHERE claimed_by = ? AND status = 'running' AND id IN ({", ".join("?" * len(job_ids))})
+        """, (time.time(), owner, *job_ids))
+        conn.commit()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class _Dispatcher(threading.Thread):
+    """Moves jobs from the queue table into the worker pool, for one database."""
+
+    def __init__(self, database, pragmas, config):
+        super().__init__(name="job-dispatcher", daemon=True)
+        self.database = database
+        self.pragmas = pragmas
+        self.config = config
+        self.pid = os.getpid()
+        # Name of this dispatcher's leases in claimed_by
+        self.owner = uuid.uuid4().hex
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        # Outcomes of finished jobs, recorded on this thread's connection
+        self.finished = queue.Queue()
+        self.in_flight = 0
+        # Ids of the jobs this dispatcher runs, whose leases the renewal thread keeps alive
+        self.running = set()
+        self.running_lock = threading.Lock()
+        self.cleaned_at = datetime.min
+
+    def run(self):
+        threading.Thread(target=self._renew_leases, name="job-leases", daemon=True).start()
+        conn = open_connection(self.database, self.pragmas)
+        try:
+            while not self.stopped.is_set():
+                self.wakeup.wait(_poll_interval)
+                self.wakeup.clear()
+                # Keep dispatching after a database error (e.g. a long lock); the next poll retries
+                try:
+                    self._record_finished(conn)
+                    self._start_jobs(conn)
+                    self._clean_up(conn)
+                except Exception:
+                    logger.exception("Job dispatcher error")
+                    if conn.in_transaction:
+                        conn.rollback()
+        finally:
+            conn.close()
+
+    def _record_finished(self, conn):
+        while True:
+            try:
+                job_id, future = self.finished.get_nowait()
+            except queue.Empty:
+                return
+            self.in_flight -= 1
+            try:
+                outcome = future.result() + (None,)
+            except Exception as e:
+                logger.exception("Job %s failed", job_id)
+                outcome = (None, None, None, None, f"{type(e).__name__}: {e}")
+            self._finish(conn, job_id, outcome)
+
+    def _renew_leases(self):
+        # Runs on its own thread, so jobs run inline on the dispatcher thread keep their leases
+        conn = open_connection(self.database, self.pragmas)
+        try:
+            while not self.stopped.wait(_lease / 3):
+                with self.running_lock:
+                    job_ids = list(self.running)
+                try:
+                    renew_leases(conn, self.owner, job_ids)
+                except Exception:
+                    logger.exception("Job lease renewal error")
+                    if conn.in_transaction:
+                        conn.rollback()
+        finally:
+            conn.close()
+
+    def _finish(self, conn, job_id, outcome):
+        finish_job(conn, job_id, self.owner, outcome)
+        with self.running_lock:
+            self.running.discard(job_id)
+
+    def _start_jobs(self, conn):
+        # Claim jobs while there are idle workers
+        capacity = max(_pool.max_workers, 1)
+        while self.in_flight < capacity:
+            job = claim_job(conn, self.owner)
+            if job is None:
+                return
+            with self.running_lock:
+                self.running.add(job["id"])
+            args = (job["id"], job["user_id"], job["username"], job["path"], job["query_string"])
+            pool = _pool.get(self.config)
+            if pool is None:
+                # No pool: run the job here, one at a time
+                outcome = _run_inline(*args)
+                self._finish(conn, job["id"], outcome)
+                continue
+            try:
+                future = pool.submit(run_job, *args)
+            except Exception as e:
+                # A worker died and broke the pool: fail this job and start a new pool for the next
+                _pool.discard(pool)
+                self._finish(conn, job["id"], (None, None, None, None, f"{type(e).__name__}: {e}"))
+                continue
+            self.in_flight += 1
+            future.add_done_callback(lambda done, job_id=job["id"]: self._done(job_id, done))
+
+    def _done(self, job_id, future):
+        # Called on the pool's thread: hand the outcome to the dispatcher
+        self.finished.put((job_id, future))
+        self.wakeup.set()
+
+    def _clean_up(self, conn):
+        # Delete expired results about once a minute
+        now = datetime.now()
+        if now - self.cleaned_at < timedelta(seconds=60):
+            return
+        self.cleaned_at = now
+        cutoff = (now - timedelta(seconds=_result_ttl)).strftime("%Y-%m-%d %H:%M:%S")
+        expired = conn.execute("""
+            DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ? RETURNING result_path
+        """, (cutoff,)).fetchall()
+        conn.commit()
+        for (path,) in expired:
+            if path is not None:
+                _remove(path)
+
+
+def _run_inline(*args):
+    try:
+        return run_job(*args) + (None,)
+    except Exception as e:
+        logger.exception("Job failed")
+        return None, None, None, None, f"{type(e).__name__}: {e}"
+
+
+def _job_config(config):
+    # Settings passed to the job processes (everything that can be pickled)
+    return {key: value for key, value in config.items() if isinstance(
+        value, (str, bytes, int, float, bool, type(None), dict, list, tuple, timedelta))}
+
+
+def ensure_dispatcher():
+    """Start this process's dispatcher thread if it isn't running for the current database.
+
+    Called when a job is submitted or listed: the thread has to live in the server worker
+    that polls the queue, and a thread started by a preloading master is lost at fork.
+    """
+    global _dispatcher
+    config = current_app.config
+    with _lock:
+        dispatcher = _dispatcher
+        if (dispatcher is not None and dispatcher.is_alive() and dispatcher.pid == os.getpid()
+                and dispatcher.database == config["DATABASE"]):
+            return dispatcher
+        if dispatcher is not None:
+            dispatcher.stopped.set()
+            dispatcher.wakeup.set()
+        _dispatcher = _Dispatcher(config["DATABASE"], config["SQLITE_PRAGMAS"], _job_config(config))
+        _dispatcher.start()
+        return _dispatcher
+
+
+def submit_job(conn, user_id, username, path, query_string):
+    # Queue a request for the workers; returns the job id, or None when the user has too many jobs
+    conn.execute("BEGIN IMMEDIATE")
+    pending = conn.execute("""
+        SELECT COUNT(*) FROM jobs WHERE user_id = ? AND status IN ('queued', 'running')
+    """, (user_id,)).fetchone()[0]
+    if pending >= _max_pending_per_user:
+        conn.rollback()
+        return None
+    job_id = conn.execute("""
+        INSERT INTO jobs (user_id, username, path, query_string, created_at) VALUES (?, ?, ?, ?, ?)
+    """, (user_id, username, path, query_string, _now())).lastrowid
+    conn.commit()
+    ensure_dispatcher().wakeup.set()
+    return job_id
+
+
+def job_status(job):
+    # JSON-friendly view of a job row, with the result link once it is done
+    status = {key: job[key] for key in ("id", "status", "path", "created_at", "started_at", "finished_at", "error")}
+    status["status_url"] = url_for("job_detail", job_id=job["id"])
+    if job["status"] == "done":
+        status["result_url"] = url_for("job_result", job_id=job["id"])
+    return status
+
+
+def background_capable(f):
+    """Let a GET route run as a background job when called with ?async=1.
+
+    The response is 202 with the job's status (and a Location header to poll), or a
+    redirect to the jobs page for browsers. 429 means the user already has too many jobs.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.args.get("async") != "1":
+            return f(*args, **kwargs)
+
+        # The job replays this request without the async flag
+        query_string = urlencode([(key, value) for key, value in request.args.items(multi=True) if key != "async"])
+        conn = get_db_connection()
+        job_id = submit_job(conn, session["user_id"], session.get("username"), request.path, query_string)
+        if job_id is None:
+            return jsonify(error=f"At most {_max_pending_per_user} jobs may be queued or running at once."), 429
+
+        # Browsers go to the jobs page; API clients get the status to poll
+        if request.accept_mimetypes.best_match(["application/json", "text/html"]) == "text/html":
+            return redirect(url_for("jobs"), code=303)
+        job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        response = jsonify(job_status(job))
+        response.status_code = 202
+        response.headers["Location"] = url_for("job_detail", job_id=job_id)
+        return response
+    return decorated_function
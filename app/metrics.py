@@ -0,0 +1,150 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+import threading
+import time
+from flask import g, has_request_context
+
+# Upper bounds (seconds) of the latency buckets, from 0.5 ms to 10 s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Record observations at all, and collect per-request Server-Timing entries
+_enabled = True
+_server_timing = False
+
+# Every histogram and cache collector, in the order they appear on /metrics
+REGISTRY = []
+
+
+def configure_metrics(enabled, server_timing):
+    global _enabled, _server_timing
+    _enabled = enabled
+    _server_timing = server_timing
+
+
+def metrics_enabled():
+    return _enabled
+
+
+def server_timing_enabled():
+    return _enabled and _server_timing
+
+
+class Histogram:
+    """Prometheus-style latency histogram, optionally split by label values."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # label values -> [count per bucket (last one is +Inf), sum of observations]
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, *labelvalues):
+        if not _enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labelvalues, timing=None):
+        # Observe the duration of the block; `timing` also adds it to the request's Server-Timing
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe(elapsed, *labelvalues)
+            if timing is not None:
+                add_server_timing(timing, elapsed)
+
+    def render(self):
+        # Prometheus text exposition format: cumulative buckets, then sum and count
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labelvalues, counts, total in series:
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labelvalues))
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            suffix = "{" + labels + "}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class CacheMetrics:
+    """Hit and miss counters and sizes of named LRU caches, read when /metrics is served."""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._caches = {}
+        REGISTRY.append(self)
+
+    def register(self, name, cache):
+        self._caches[name] = cache
+
+    def render(self):
+        stats = {name: cache.stats() for name, cache in self._caches.items()}
+        lines = []
+        for key, kind, documentation in (("hits", "counter", "Cache lookups that found an entry."),
+                                         ("misses", "counter", "Cache lookups that found no entry."),
+                                         ("size", "gauge", "Entries held by a cache.")):
+            name = f"{self.prefix}_{key}_total" if kind == "counter" else f"{self.prefix}_{key}"
+            lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"])
+            lines.extend(f'{name}{{cache="{_escape(cache)}"}} {values[key]}' for cache, values in stats.items())
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_metrics():
+    # Text served on /metrics
+    lines = []
+    for histogram in REGISTRY:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+def add_server_timing(name, seconds):
+    # Accumulate time per component for the current request's Server-Timing header
+    if not (_server_timing and _enabled and has_request_context()):
+        return
+    timings = g.setdefault("server_timing", {})
+    timings[name] = timings.get(name, 0.0) + seconds
+
+
+def server_timing_header(total):
+    # "sql;dur=1.2, plotly;dur=30.5, total;dur=35.0" (milliseconds)
+    timings = g.get("server_timing", {})
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+# Wall time of every request, by endpoint, method and status code (streamed
+# responses are measured up to the first byte)
+REQUEST_LATENCY = Histogram("radioactive_request_duration_seconds", "Time spent handling a request.",
+                            ("endpoint", "method", "status"))
+
+# Time in SQLite calls on pooled connections, by statement type (FETCH for reading rows)
+SQL_LATENCY = Histogram("radioactive_sql_duration_seconds", "Time spent in SQLite calls.", ("operation",))
+
+# Time spent drawing plots and PDFs, by library
+RENDER_LATENCY = Histogram("radioactive_render_duration_seconds", "Time spent rendering plots and PDFs.",
+                           ("renderer",))
+
+# Hits, misses and entries of the plot, PDF and sweep caches, by cache
+CACHE_METRICS = CacheMetrics("radioactive_cache")
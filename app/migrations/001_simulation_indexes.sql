@@ -0,0 +1,7 @@
+-- Composite indexes for the history page: newest-first listing per user,
+-- keyset pagination on (timestamp, id) and filtering by element
+CREATE INDEX IF NOT EXISTS idx_simulations_user_timestamp
+    ON simulations (user_id, timestamp DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_simulations_user_element
+    ON simulations (user_id, element_id, timestamp DESC, id DESC);
@@ -0,0 +1,23 @@
+-- Version counter for the elements catalog, bumped by triggers on every write so
+-- app processes notice changes made by populate_elements.py and similar scripts
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 1);
+
+CREATE TRIGGER IF NOT EXISTS elements_insert_bump_version AFTER INSERT ON elements
+BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS elements_update_bump_version AFTER UPDATE ON elements
+BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS elements_delete_bump_version AFTER DELETE ON elements
+BEGIN
+    UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+END;
@@ -0,0 +1,59 @@
+-- Decay chains: an ordered list of members, each decaying into the next one.
+-- A NULL half-life marks the stable end of the chain; element_id links a member
+-- to the elements catalog when the isotope is also simulated on its own
+CREATE TABLE IF NOT EXISTS decay_chains (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL,
+    unit TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS decay_chain_members (
+    chain_id INTEGER NOT NULL REFERENCES decay_chains (id),
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    half_life REAL,
+    element_id INTEGER REFERENCES elements (id),
+    PRIMARY KEY (chain_id, position)
+);
+
+-- Uranium series (main branch), half-lives in years
+INSERT OR IGNORE INTO decay_chains (name, unit) VALUES ('Uranium-238 series', 'years');
+
+INSERT OR IGNORE INTO decay_chain_members (chain_id, position, name, half_life, element_id)
+SELECT c.id, m.position, m.name, m.half_life, (SELECT id FROM elements e WHERE e.name = m.name)
+FROM decay_chains c,
+     (SELECT 0 AS position, 'Uranium-238' AS name, 4.468e9 AS half_life
+      UNION ALL SELECT 1, 'Thorium-234', 0.065982
+      UNION ALL SELECT 2, 'Protactinium-234m', 2.2036e-6
+      UNION ALL SELECT 3, 'Uranium-234', 2.455e5
+      UNION ALL SELECT 4, 'Thorium-230', 7.538e4
+      UNION ALL SELECT 5, 'Radium-226', 1600
+      UNION ALL SELECT 6, 'Radon-222', 0.010468
+      UNION ALL SELECT 7, 'Polonium-218', 5.8902e-6
+      UNION ALL SELECT 8, 'Lead-214', 5.0954e-5
+      UNION ALL SELECT 9, 'Bismuth-214', 3.7836e-5
+      UNION ALL SELECT 10, 'Polonium-214', 5.2063e-12
+      UNION ALL SELECT 11, 'Lead-210', 22.2
+      UNION ALL SELECT 12, 'Bismuth-210', 0.013722
+      UNION ALL SELECT 13, 'Polonium-210', 0.37885
+      UNION ALL SELECT 14, 'Lead-206', NULL) m
+WHERE c.name = 'Uranium-238 series';
+
+-- Thorium series, following the Bi-212 → Po-212 branch, half-lives in years
+INSERT OR IGNORE INTO decay_chains (name, unit) VALUES ('Thorium-232 series', 'years');
+
+INSERT OR IGNORE INTO decay_chain_members (chain_id, position, name, half_life, element_id)
+SELECT c.id, m.position, m.name, m.half_life, (SELECT id FROM elements e WHERE e.name = m.name)
+FROM decay_chains c,
+     (SELECT 0 AS position, 'Thorium-232' AS name, 1.405e10 AS half_life
+      UNION ALL SELECT 1, 'Radium-228', 5.75
+      UNION ALL SELECT 2, 'Actinium-228', 7.0157e-4
+      UNION ALL SELECT 3, 'Thorium-228', 1.9116
+      UNION ALL SELECT 4, 'Radium-224', 0.0099436
+      UNION ALL SELECT 5, 'Radon-220', 1.7619e-6
+      UNION ALL SELECT 6, 'Polonium-216', 4.5948e-9
+      UNION ALL SELECT 7, 'Lead-212', 1.2138e-3
+      UNION ALL SELECT 8, 'Bismuth-212', 1.1512e-4
+      UNION ALL SELECT 9, 'Polonium-212', 9.4747e-15
+      UNION ALL SELECT 10, 'Lead-208', NULL) m
+WHERE c.name = 'Thorium-232 series';
@@ -0,0 +1,22 @@
+-- Background jobs: GET requests to heavy routes queued for the worker pool, with their results.
+-- A job replays `path` and `query_string` as `user_id`; finished jobs are deleted after a while
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    username TEXT,
+    path TEXT NOT NULL,
+    query_string TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'queued',  -- queued, running, done or failed
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    status_code INTEGER,
+    mimetype TEXT,
+    filename TEXT,
+    result BLOB,
+    error TEXT
+);
+
+-- The dispatcher claims the oldest queued job; limits count a user's queued and running jobs
+CREATE INDEX IF NOT EXISTS jobs_status_id ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_user_status ON jobs (user_id, status);
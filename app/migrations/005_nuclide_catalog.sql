@@ -0,0 +1,30 @@
+-- Nuclide catalog: decay modes for every isotope, unique names so bulk imports can upsert
+-- by name, and a full-text index (with prefix tables) for the /elements/search type-ahead
+ALTER TABLE elements ADD COLUMN decay_modes TEXT NOT NULL DEFAULT '';
+
+CREATE UNIQUE INDEX IF NOT EXISTS elements_name ON elements (name);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS elements_fts USING fts5(
+    name, decay_modes, content='elements', content_rowid='id', prefix='1 2 3'
+);
+
+INSERT INTO elements_fts (elements_fts) VALUES ('rebuild');
+
+-- Keep the index in step with the table
+CREATE TRIGGER IF NOT EXISTS elements_fts_insert AFTER INSERT ON elements
+BEGIN
+    INSERT INTO elements_fts (rowid, name, decay_modes) VALUES (new.id, new.name, new.decay_modes);
+END;
+
+CREATE TRIGGER IF NOT EXISTS elements_fts_delete AFTER DELETE ON elements
+BEGIN
+    INSERT INTO elements_fts (elements_fts, rowid, name, decay_modes)
+    VALUES ('delete', old.id, old.name, old.decay_modes);
+END;
+
+CREATE TRIGGER IF NOT EXISTS elements_fts_update AFTER UPDATE OF name, decay_modes ON elements
+BEGIN
+    INSERT INTO elements_fts (elements_fts, rowid, name, decay_modes)
+    VALUES ('delete', old.id, old.name, old.decay_modes);
+    INSERT INTO elements_fts (rowid, name, decay_modes) VALUES (new.id, new.name, new.decay_modes);
+END;
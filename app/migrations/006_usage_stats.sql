@@ -0,0 +1,114 @@
+-- Usage statistics kept up to date by triggers on simulations, so the /stats dashboard
+-- reads a few small rows instead of aggregating the whole table. Values are counted in
+-- decade buckets (bucket e holds [10^e, 10^(e+1)); -31 holds everything below 1e-30,
+-- including 0). rebuild_stats.py recomputes all of it from simulations.
+
+-- Edits used to change element_id without the denormalized element columns
+UPDATE simulations
+SET name = e.name, half_life = e.half_life, unit = e.unit, quantity_unit = e.quantity_unit
+FROM elements e
+WHERE simulations.element_id = e.id AND simulations.name IS NOT e.name;
+
+CREATE TABLE IF NOT EXISTS stats_buckets (
+    bucket INTEGER PRIMARY KEY,
+    lower REAL NOT NULL UNIQUE
+);
+
+WITH RECURSIVE exponents (e) AS (SELECT -30 UNION ALL SELECT e + 1 FROM exponents WHERE e < 30)
+INSERT OR IGNORE INTO stats_buckets (bucket, lower) SELECT e, CAST('1e' || e AS REAL) FROM exponents;
+
+CREATE TABLE IF NOT EXISTS stats_users (
+    user_id INTEGER PRIMARY KEY,
+    simulations INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS stats_elements (
+    element_id INTEGER PRIMARY KEY,
+    simulations INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS stats_values (
+    metric TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    simulations INTEGER NOT NULL DEFAULT 0,
+    total REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, bucket)
+) WITHOUT ROWID;
+
+-- The dashboard lists the busiest users and elements
+CREATE INDEX IF NOT EXISTS stats_users_simulations ON stats_users (simulations DESC);
+CREATE INDEX IF NOT EXISTS stats_elements_simulations ON stats_elements (simulations DESC);
+
+-- Backfill from the existing simulations
+INSERT INTO stats_users (user_id, simulations)
+SELECT user_id, COUNT(*) FROM simulations WHERE user_id IS NOT NULL GROUP BY user_id;
+
+INSERT INTO stats_elements (element_id, simulations)
+SELECT element_id, COUNT(*) FROM simulations WHERE element_id IS NOT NULL GROUP BY element_id;
+
+INSERT INTO stats_values (metric, bucket, simulations, total)
+SELECT 'n0', bucket, COUNT(*), SUM(value) FROM (
+    SELECT COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= s.n0 ORDER BY lower DESC LIMIT 1), -31) AS bucket, s.n0 AS value FROM simulations s WHERE s.n0 IS NOT NULL
+) GROUP BY bucket;
+INSERT INTO stats_values (metric, bucket, simulations, total)
+SELECT 't', bucket, COUNT(*), SUM(value) FROM (
+    SELECT COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= s.t ORDER BY lower DESC LIMIT 1), -31) AS bucket, s.t AS value FROM simulations s WHERE s.t IS NOT NULL
+) GROUP BY bucket;
+INSERT INTO stats_values (metric, bucket, simulations, total)
+SELECT 'nt', bucket, COUNT(*), SUM(value) FROM (
+    SELECT COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= s.nt ORDER BY lower DESC LIMIT 1), -31) AS bucket, s.nt AS value FROM simulations s WHERE s.nt IS NOT NULL
+) GROUP BY bucket;
+
+CREATE TRIGGER IF NOT EXISTS stats_simulation_insert AFTER INSERT ON simulations
+BEGIN
+    INSERT INTO stats_users (user_id, simulations) SELECT new.user_id, 1 WHERE new.user_id IS NOT NULL
+    ON CONFLICT (user_id) DO UPDATE SET simulations = simulations + 1;
+    INSERT INTO stats_elements (element_id, simulations) SELECT new.element_id, 1 WHERE new.element_id IS NOT NULL
+    ON CONFLICT (element_id) DO UPDATE SET simulations = simulations + 1;
+    INSERT INTO stats_values (metric, bucket, simulations, total)
+    SELECT 'n0', COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= new.n0 ORDER BY lower DESC LIMIT 1), -31), 1, new.n0 WHERE new.n0 IS NOT NULL
+    ON CONFLICT (metric, bucket) DO UPDATE SET simulations = simulations + 1, total = total + excluded.total;
+    INSERT INTO stats_values (metric, bucket, simulations, total)
+    SELECT 't', COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= new.t ORDER BY lower DESC LIMIT 1), -31), 1, new.t WHERE new.t IS NOT NULL
+    ON CONFLICT (metric, bucket) DO UPDATE SET simulations = simulations + 1, total = total + excluded.total;
+    INSERT INTO stats_values (metric, bucket, simulations, total)
+    SELECT 'nt', COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= new.nt ORDER BY lower DESC LIMIT 1), -31), 1, new.nt WHERE new.nt IS NOT NULL
+    ON CONFLICT (metric, bucket) DO UPDATE SET simulations = simulations + 1, total = total + excluded.total;
+END;
+
+CREATE TRIGGER IF NOT EXISTS stats_simulation_delete AFTER DELETE ON simulations
+BEGIN
+    UPDATE stats_users SET simulations = simulations - 1 WHERE user_id = old.user_id;
+    UPDATE stats_elements SET simulations = simulations - 1 WHERE element_id = old.element_id;
+    UPDATE stats_values SET simulations = simulations - 1, total = total - old.n0
+    WHERE metric = 'n0' AND bucket = COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= old.n0 ORDER BY lower DESC LIMIT 1), -31) AND old.n0 IS NOT NULL;
+    UPDATE stats_values SET simulations = simulations - 1, total = total - old.t
+    WHERE metric = 't' AND bucket = COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= old.t ORDER BY lower DESC LIMIT 1), -31) AND old.t IS NOT NULL;
+    UPDATE stats_values SET simulations = simulations - 1, total = total - old.nt
+    WHERE metric = 'nt' AND bucket = COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= old.nt ORDER BY lower DESC LIMIT 1), -31) AND old.nt IS NOT NULL;
+END;
+
+CREATE TRIGGER IF NOT EXISTS stats_simulation_update AFTER UPDATE OF user_id, element_id, n0, t, nt ON simulations
+BEGIN
+    UPDATE stats_users SET simulations = simulations - 1 WHERE user_id = old.user_id;
+    UPDATE stats_elements SET simulations = simulations - 1 WHERE element_id = old.element_id;
+    UPDATE stats_values SET simulations = simulations - 1, total = total - old.n0
+    WHERE metric = 'n0' AND bucket = COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= old.n0 ORDER BY lower DESC LIMIT 1), -31) AND old.n0 IS NOT NULL;
+    UPDATE stats_values SET simulations = simulations - 1, total = total - old.t
+    WHERE metric = 't' AND bucket = COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= old.t ORDER BY lower DESC LIMIT 1), -31) AND old.t IS NOT NULL;
+    UPDATE stats_values SET simulations = simulations - 1, total = total - old.nt
+    WHERE metric = 'nt' AND bucket = COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= old.nt ORDER BY lower DESC LIMIT 1), -31) AND old.nt IS NOT NULL;
+    INSERT INTO stats_users (user_id, simulations) SELECT new.user_id, 1 WHERE new.user_id IS NOT NULL
+    ON CONFLICT (user_id) DO UPDATE SET simulations = simulations + 1;
+    INSERT INTO stats_elements (element_id, simulations) SELECT new.element_id, 1 WHERE new.element_id IS NOT NULL
+    ON CONFLICT (element_id) DO UPDATE SET simulations = simulations + 1;
+    INSERT INTO stats_values (metric, bucket, simulations, total)
+    SELECT 'n0', COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= new.n0 ORDER BY lower DESC LIMIT 1), -31), 1, new.n0 WHERE new.n0 IS NOT NULL
+    ON CONFLICT (metric, bucket) DO UPDATE SET simulations = simulations + 1, total = total + excluded.total;
+    INSERT INTO stats_values (metric, bucket, simulations, total)
+    SELECT 't', COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= new.t ORDER BY lower DESC LIMIT 1), -31), 1, new.t WHERE new.t IS NOT NULL
+    ON CONFLICT (metric, bucket) DO UPDATE SET simulations = simulations + 1, total = total + excluded.total;
+    INSERT INTO stats_values (metric, bucket, simulations, total)
+    SELECT 'nt', COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= new.nt ORDER BY lower DESC LIMIT 1), -31), 1, new.nt WHERE new.nt IS NOT NULL
+    ON CONFLICT (metric, bucket) DO UPDATE SET simulations = simulations + 1, total = total + excluded.total;
+END;
@@ -0,0 +1,13 @@
+-- Job leases: a running job belongs to the dispatcher named in claimed_by only while that
+-- dispatcher keeps renewing claimed_at (seconds since the epoch); expired leases are claimed again
+ALTER TABLE jobs ADD COLUMN claimed_by TEXT;
+ALTER TABLE jobs ADD COLUMN claimed_at REAL;
+
+-- Finished job bodies are written to files instead of the result BLOB
+ALTER TABLE jobs ADD COLUMN result_path TEXT;
+
+-- Jobs already running have no lease, so the first dispatcher to look claims them again
+UPDATE jobs SET claimed_at = 0 WHERE status = 'running';
+
+-- Running limits and expired leases look up running jobs by lease time
+CREATE INDEX IF NOT EXISTS jobs_status_claimed ON jobs (status, claimed_at);
@@ -0,0 +1,5 @@
+-- The starter catalog gave three half-lives in years but labelled them days; rows still
+-- holding those values get the half-life in days. Saved simulations keep the values they ran with
+UPDATE elements SET half_life = 138.4 WHERE name = 'Polonium-210' AND half_life = 0.379 AND unit = 'days';
+UPDATE elements SET half_life = 8.02 WHERE name = 'Iodine-131' AND half_life = 0.02196 AND unit = 'days';
+UPDATE elements SET half_life = 3.82 WHERE name = 'Radon-222' AND half_life = 0.0104 AND unit = 'days';
@@ -0,0 +1,161 @@
+import csv
+import math
+import re
+from app.sweep import TIME_UNITS
+
+# Columns of a nuclide CSV; name, half_life and unit are required
+CSV_COLUMNS = ("name", "half_life", "unit", "decay_modes", "quantity_unit")
+
+# Rows sent to SQLite per executemany call during an import
+IMPORT_BATCH_SIZE = 5000
+
+
+def read_nuclides(lines):
+    """Parse a nuclide CSV into (name, half_life, unit, quantity_unit, decay_modes) tuples.
+
+    Decay modes may be separated by spaces, commas or semicolons ("B- EC"). Raises
+    ValueError naming the line of the first invalid row.
+    """
+    reader = csv.DictReader(lines)
+    missing = {"name", "half_life", "unit"} - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"The CSV has no {', '.join(sorted(missing))} column.")
+
+    for row in reader:
+        line = reader.line_num
+        name = (row["name"] or "").strip()
+        if not name:
+            raise ValueError(f"Line {line}: the name is empty.")
+        try:
+            half_life = float(row["half_life"])
+        except (TypeError, ValueError):
+            raise ValueError(f"Line {line}: half-life {row['half_life']!r} is not a number.") from None
+        if not (math.isfinite(half_life) and half_life > 0):
+            raise ValueError(f"Line {line}: the half-life must be positive.")
+        unit = (row["unit"] or "").strip()
+        if unit not in TIME_UNITS:
+            raise ValueError(f"Line {line}: unknown time unit {unit!r}.")
+        quantity_unit = (row.get("quantity_unit") or "").strip() or "grams"
+        decay_modes = " ".join(re.split(r"[\s,;]+", (row.get("decay_modes") or "").strip())).strip()
+        yield name, half_life, unit, quantity_unit, decay_modes
+
+
+# Element names by atomic number, used to name LiveChart nuclides like the bundled CSV ("Carbon-14")
+ELEMENT_NAMES = (
+    "Neutron", "Hydrogen", "Helium", "Lithium", "Beryllium", "Boron", "Carbon", "Nitrogen", "Oxygen",
+    "Fluorine", "Neon", "Sodium", "Magnesium", "Aluminium", "Silicon", "Phosphorus", "Sulfur", "Chlorine",
+    "Argon", "Potassium", "Calcium", "Scandium", "Titanium", "Vanadium", "Chromium", "Manganese", "Iron",
+    "Cobalt", "Nickel", "Copper", "Zinc", "Gallium", "Germanium", "Arsenic", "Selenium", "Bromine",
+    "Krypton", "Rubidium", "Strontium", "Yttrium", "Zirconium", "Niobium", "Molybdenum", "Technetium",
+    "Ruthenium", "Rhodium", "Palladium", "Silver", "Cadmium", "Indium", "Tin", "Antimony", "Tellurium",
+    "Iodine", "Xenon", "Cesium", "Barium", "Lanthanum", "Cerium", "Praseodymium", "Neodymium",
+    "Promethium", "Samarium", "Europium", "Gadolinium", "Terbium", "Dysprosium", "Holmium", "Erbium",
+    "Thulium", "Ytterbium", "Lutetium", "Hafnium", "Tantalum", "Tungsten", "Rhenium", "Osmium", "Iridium",
+    "Platinum", "Gold", "Mercury", "Thallium", "Lead", "Bismuth", "Polonium", "Astatine", "Radon",
+    "Francium", "Radium", "Actinium", "Thorium", "Protactinium", "Uranium", "Neptunium", "Plutonium",
+    "Americium", "Curium", "Berkelium", "Californium", "Einsteinium", "Fermium", "Mendelevium",
+    "Nobelium", "Lawrencium", "Rutherfordium", "Dubnium", "Seaborgium", "Bohrium", "Hassium",
+    "Meitnerium", "Darmstadtium", "Roentgenium", "Copernicium", "Nihonium", "Flerovium", "Moscovium",
+    "Livermorium", "Tennessine", "Oganesson",
+)
+
+# Columns of the IAEA LiveChart ground-state export that read_livechart needs
+LIVECHART_COLUMNS = ("z", "n", "half_life_sec")
+
+
+def livechart_unit(seconds):
+    # Largest time unit in which the half-life is at least 1, so values stay readable
+    days = seconds / 86400
+    for unit, length in sorted(TIME_UNITS.items(), key=lambda item: -item[1]):
+        if days >= length:
+            return unit, days / length
+    return "seconds", seconds
+
+
+def read_livechart(lines):
+    """Parse the IAEA LiveChart ground-state CSV into the tuples read_nuclides yields.
+
+    Stable nuclides and those without a measured half-life in seconds are skipped.
+    Names follow the bundled CSV ("Uranium-238"); decay modes come from decay_1..3.
+    """
+    reader = csv.DictReader(lines)
+    missing = set(LIVECHART_COLUMNS) - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"The CSV has no {', '.join(sorted(missing))} column.")
+
+    for row in reader:
+        line = reader.line_num
+        try:
+            z, n = int(row["z"]), int(row["n"])
+        except (TypeError, ValueError):
+            raise ValueError(f"Line {line}: z and n must be integers.") from None
+        if not 0 <= z < len(ELEMENT_NAMES):
+            raise ValueError(f"Line {line}: unknown atomic number {z}.")
+        try:
+            seconds = float(row["half_life_sec"])
+        except (TypeError, ValueError):
+            continue
+        if not (math.isfinite(seconds) and seconds > 0):
+            continue
+        unit, half_life = livechart_unit(seconds)
+        name = ELEMENT_NAMES[z] if z == 0 else f"{ELEMENT_NAMES[z]}-{z + n}"
+        decay_modes = " ".join(mode.strip() for key in ("decay_1", "decay_2", "decay_3")
+                               if (mode := row.get(key) or "").strip())
+        yield name, half_life, unit, "grams", decay_modes
+
+
+def import_nuclides(conn, nuclides, batch_size=IMPORT_BATCH_SIZE):
+    """Insert or update nuclides by name in one transaction; return the number of rows read.
+
+    Unchanged rows are skipped, so re-importing a file doesn't touch the search index.
+    The catalog version triggers make every app process reload its element cache.
+    """
+    count = 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        batch = []
+        for nuclide in nuclides:
+            batch.append(nuclide)
+            if len(batch) >= batch_size:
+                _upsert(conn, batch)
+                count += len(batch)
+                batch = []
+        _upsert(conn, batch)
+        count += len(batch)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return count
+
+
+def _upsert(conn, batch):
+    conn.executemany("""
+        INSERT INTO elements (name, half_life, unit, quantity_unit, decay_modes) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET
+            half_life = excluded.half_life, unit = excluded.unit,
+            quantity_unit = excluded.quantity_unit, decay_modes = excluded.decay_modes
+        WHERE half_life IS NOT excluded.half_life OR unit IS NOT excluded.unit
+           OR quantity_unit IS NOT excluded.quantity_unit OR decay_modes IS NOT excluded.decay_modes
+    """, batch)
+
+
+def fts_query(text):
+    # Every word of the input as a quoted prefix term: "car 14" -> "car"* "14"*
+    return " ".join(f'"{token}"*' for token in re.findall(r"\w+", text))
+
+
+def search_elements(conn, text, limit):
+    """Elements whose name or decay modes start with every word of `text`, best first."""
+    query = fts_query(text)
+    if not query:
+        return []
+    # Shorter names first, so "Carbon" lists Carbon-14 before Carbon-14m and longer matches
+    return conn.execute("""
+        SELECT e.id, e.name, e.half_life, e.unit, e.quantity_unit, e.decay_modes
+        FROM elements_fts
+        JOIN elements e ON e.id = elements_fts.rowid
+        WHERE elements_fts MATCH ?
+        ORDER BY length(e.name), e.name
+        LIMIT ?
+    """, (query, limit)).fetchall()
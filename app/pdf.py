@@ -0,0 +1,152 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+import hashlib
+import multiprocessing
+import threading
+import time
+from app.cache import LRUCache
+from app.metrics import CACHE_METRICS, RENDER_LATENCY, add_server_timing
+from app.pools import LazyPool
+
+# Rendered PDFs keyed by (simulation id, digest of the simulation row)
+pdf_cache = LRUCache(maxsize=64)
+CACHE_METRICS.register("pdf", pdf_cache)
+
+# Worker processes used for WeasyPrint (0 renders on the calling thread), started on first
+# use. They are spawned, like the Monte Carlo and job pools, since they start inside
+# threaded server workers
+_pool = LazyPool(lambda max_workers: ProcessPoolExecutor(max_workers=max_workers,
+                                                         mp_context=multiprocessing.get_context("spawn")))
+# Renders in flight, so concurrent requests for the same PDF share one job
+_pending = {}
+_lock = threading.Lock()
+_import_lock = threading.Lock()
+
+
+def configure_pdf_rendering(max_workers, cache_size):
+    _pool.resize(max_workers)
+    pdf_cache.resize(cache_size)
+
+
+def row_digest(row):
+    # Content hash of every column the report is built from
+    return hashlib.sha1(repr(tuple(row)).encode()).hexdigest()
+
+
+def load_pdf_backend():
+    # WeasyPrint is only imported when the first PDF is rendered, or by warm_up();
+    # the lock keeps request threads from importing it concurrently when rendering inline
+    with _import_lock:
+        from weasyprint import HTML
+    return HTML
+
+
+def write_pdf(html, base_url):
+    # Runs inside a worker process: convert the report HTML into PDF bytes
+    HTML = load_pdf_backend()
+    return HTML(string=html, base_url=base_url).write_pdf()
+
+
+def timed_write_pdf(html, base_url):
+    # Also return the render time, since metrics recorded in a worker process are lost
+    start = time.perf_counter()
+    pdf = write_pdf(html, base_url)
+    return pdf, time.perf_counter() - start
+
+
+def _submit(key, html, base_url):
+    with _lock:
+        if key in _pending:
+            return _pending[key]
+
+        pool = _pool.get()
+        if pool is None:
+            future = Future()
+        else:
+            future = pool.submit(timed_write_pdf, html, base_url)
+        _pending[key] = future
+
+    # Without a pool, render synchronously on this thread
+    if pool is None:
+        try:
+            future.set_result(timed_write_pdf(html, base_url))
+        except Exception as e:
+            future.set_exception(e)
+
+    future.add_done_callback(lambda done: _store(key, done))
+    return future
+
+
+def _store(key, future):
+    # Keep the finished PDF, record its render time and forget the pending job
+    with _lock:
+        _pending.pop(key, None)
+    if future.exception() is None:
+        pdf, elapsed = future.result()
+        RENDER_LATENCY.observe(elapsed, "weasyprint")
+        pdf_cache.set(key, pdf)
+
+
+def _wait_for_pdf(key, build_html):
+    # Block until the PDF is rendered; the wait shows up in the request's Server-Timing
+    html, base_url = build_html()
+    start = time.perf_counter()
+    pdf, _ = _submit(key, html, base_url).result()
+    add_server_timing("weasyprint", time.perf_counter() - start)
+    return pdf
+
+
+def _unwrap_pdf(done, future):
+    # Pass on just the PDF bytes of a (pdf, seconds) render result
+    if done.exception() is not None:
+        future.set_exception(done.exception())
+    else:
+        future.set_result(done.result()[0])
+
+
+def get_pdf_async(sim_id, digest, build_html):
+    # Like get_pdf, but return a Future so many reports can render in parallel
+    key = (sim_id, digest)
+    future = Future()
+    pdf = pdf_cache.get(key)
+    if pdf is not None:
+        future.set_result(pdf)
+        return future
+    _submit(key, *build_html()).add_done_callback(lambda done: _unwrap_pdf(done, future))
+    return future
+
+
+def render_pdf(html, base_url):
+    # Render a one-off document (not cached) in the pool and wait for it
+    pool = _pool.get()
+    start = time.perf_counter()
+    if pool is None:
+        pdf, elapsed = timed_write_pdf(html, base_url)
+    else:
+        pdf, elapsed = pool.submit(timed_write_pdf, html, base_url).result()
+    RENDER_LATENCY.observe(elapsed, "weasyprint")
+    add_server_timing("weasyprint", time.perf_counter() - start)
+    return pdf
+
+
+def pool_map(function, *iterables):
+    # Run `function` over the arguments in the worker pool (inline without one), keeping order
+    pool = _pool.get()
+    if pool is None:
+        return list(map(function, *iterables))
+    return list(pool.map(function, *iterables))
+
+
+def get_pdf(sim_id, digest, build_html):
+    # Return the cached PDF, or build the HTML and render it in the pool
+    key = (sim_id, digest)
+    return pdf_cache.get_or_create(key, lambda: _wait_for_pdf(key, build_html))
+
+
+def prerender_pdf(sim_id, digest, html, base_url):
+    # Start rendering in the background without waiting for the result
+    _submit((sim_id, digest), html, base_url)
+
+
+def invalidate_pdf(sim_id):
+    # Drop every cached version of a simulation's report
+    pdf_cache.invalidate_if(lambda key: key[0] == sim_id)
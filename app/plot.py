@@ -1,23 +1,145 @@
-import plotly.graph_objs as go
-import plotly.io as pio
+# Plotly and Matplotlib take most of the app's import time, so they are imported
+# inside the functions that render with them (see load_plot_backends)
+import importlib.util
 import numpy as np
-import matplotlib
-matplotlib.use("Agg") # Uses a non interactive backend
-import matplotlib.pyplot as plt
+import io
+import hashlib
+import math
 import os
+import runpy
+import threading
+from functools import lru_cache
+from app.cache import LRUCache
+from app.metrics import CACHE_METRICS, RENDER_LATENCY
+from app.simulation import chain_populations, decay_curves
+from app.stochastic import stochastic_decay
+from app.sweep import plot_stride
 
-def generate_decay_plot(n0, lam, t_max, max_points=1000):
-    if t_max < 0.1:
-        t_max = 0.1  # Minimum range for visibility
-    # Determine the number of points to plot: at least 100, up to 1000, with 50 points per time unit
-    num_points = min(max_points, max(100, int(t_max * 500)))
+def _plotlyjs_version():
+    # Read the version file directly: importing plotly.offline would also import IPython
+    package = importlib.util.find_spec("plotly").submodule_search_locations[0]
+    return runpy.run_path(os.path.join(package, "offline", "_plotlyjs_version.py"))["__plotlyjs_version__"]
 
-    # Generate evenly spaced time values from 0 to t_max
-    t_values = np.linspace(0, t_max, num_points)
+
+# Version of the plotly.js bundle shipped with the installed plotly package
+PLOTLYJS_VERSION = _plotlyjs_version()
+
+
+@lru_cache(maxsize=1)
+def plotlyjs_bundle():
+    # Return the minified plotly.js source served once as a static asset
+    from plotly.offline import get_plotlyjs
+    return get_plotlyjs()
+
+
+# Set once Plotly and Matplotlib are loaded; both import parts of themselves (IPython,
+# orjson, the font cache) on first use, which fails when several threads do it at once
+_backends_loaded = False
+_backends_lock = threading.Lock()
+
+
+def load_plot_backends():
+    # Import Plotly and Matplotlib and draw one small figure with each, once per process
+    global _backends_loaded
+    if _backends_loaded:
+        return
+    with _backends_lock:
+        if _backends_loaded:
+            return
+        import plotly.graph_objs as go
+        import plotly.io as pio
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        fig = go.Figure(go.Scatter(x=[0, 1], y=[1, 0]))
+        pio.to_json(fig, validate=False)
+        pio.to_html(fig, full_html=False)
+
+        fig = Figure(figsize=(1, 1))
+        FigureCanvasAgg(fig)
+        fig.add_subplot().plot([0, 1], [1, 0], label="N(t)")
+        fig.savefig(io.BytesIO(), format="png")
+        _backends_loaded = True
+
+
+def figure_payload(fig, payload):
+    import plotly.io as pio
+
+    # Return only the figure spec as JSON; the page loads plotly.js separately
+    if payload == "json":
+        # Escape "</" so the spec can be embedded safely inside a <script> tag
+        return pio.to_json(fig, validate=False).replace("</", "<\\/")
+
+    # Return the figure as an embeddable HTML snippet with plotly.js inlined
+    return pio.to_html(fig, full_html=False)
+
+
+def plot_key(kind, *params):
+    # Content address of a rendered plot: a digest of everything the output depends on
+    return hashlib.sha1(repr((kind,) + params).encode()).hexdigest()
+
+
+def decay_time_grid(lam, t_max, tolerance=1e-3, max_points=1000):
+    """Fewest time points whose straight-line interpolation of N₀·e^(–λt) stays within
+    `tolerance` × N₀ of the true curve, capped at `max_points`.
+
+    Points are spaced evenly in u = 1 – e^(–λt/2), so steps grow as the curve flattens.
+    A chord over [a, a + h] misses the curve by less than (e^(–λa/2) – e^(–λ(a+h)/2))²,
+    i.e. the square of the step in u, so steps of √tolerance are enough and no curve
+    needs more than 1/√tolerance + 1 points, however long the range. When the cap applies,
+    the curve is still drawn within (u_max / (max_points – 1))² × N₀.
+    """
+    u_max = -math.expm1(-lam * t_max / 2)
+    intervals = min(max_points - 1, max(1, math.ceil(u_max / math.sqrt(tolerance))))
+    u = np.linspace(0, u_max, intervals + 1)
+    # Invert u back to time (log1p keeps slow decays exact) and end exactly at t_max
+    t_values = np.empty(intervals + 1)
+    t_values[:-1] = -2 / lam * np.log1p(-u[:-1])
+    t_values[-1] = t_max
+    return t_values
+
+
+def plot_range(lam, t_max):
+    # Time range shown in the plots: the requested one, or five half-lives when it is empty
+    if t_max > 0:
+        return t_max
+    return 5 * math.log(2) / lam
+
+
+# Rendered Plotly snippets/specs and Matplotlib PNG bytes, shared by all request threads
+plot_cache = LRUCache(maxsize=256)
+plot_image_cache = LRUCache(maxsize=256)
+CACHE_METRICS.register("plot", plot_cache)
+CACHE_METRICS.register("plot_image", plot_image_cache)
+
+
+def generate_decay_plot(n0, lam, t_max, max_points=1000, payload="json", trajectories=0, seed=None,
+                        tolerance=1e-3):
+    # Stochastic overlays are reproducible from their seed, so they can be cached too
+    key = plot_key(payload, n0, lam, t_max, max_points, trajectories, seed, tolerance)
+    return plot_cache.get_or_create(
+        key, lambda: render_decay_plot(n0, lam, t_max, max_points, payload, trajectories, seed, tolerance))
+
+
+def axis_tolerance(n0, tolerance):
+    # The y axis stops at 10^6, so larger N₀ needs a proportionally finer grid
+    return tolerance * min(n0, 1e6) / n0 if n0 > 0 else tolerance
+
+
+@RENDER_LATENCY.time("plotly", timing="plotly")
+def render_decay_plot(n0, lam, t_max, max_points=1000, payload="json", trajectories=0, seed=None,
+                      tolerance=1e-3):
+    t_max = plot_range(lam, t_max)
+
+    # Only as many time values as the curve needs to look exact on this axis
+    t_values = decay_time_grid(lam, t_max, axis_tolerance(n0, tolerance), max_points)
 
     # Apply the radioactive decay formula: N(t) = N₀ · e^(–λt)
     n_values = n0 * np.exp(-lam * t_values)
 
+    load_plot_backends()
+    import plotly.graph_objs as go
+
     # Create a new Plotly figure
     fig = go.Figure()
 
@@ -30,6 +152,10 @@ def generate_decay_plot(n0, lam, t_max, max_points=1000):
         hovertemplate='Time: %{x:.2f}<br>Remaining: %{y:.2f}<extra></extra>'  # Custom tooltip format
     ))
 
+    # Overlay the Monte Carlo spread: percentile bands, mean and a few sample paths
+    if trajectories:
+        add_stochastic_traces(fig, stochastic_decay(n0, lam, t_values, trajectories, seed))
+
     # Customize layout: titles, axis labels, style, and margins
     fig.update_layout(
         title="Radioactive Decay",
@@ -41,49 +167,296 @@ def generate_decay_plot(n0, lam, t_max, max_points=1000):
         margin=dict(l=40, r=40, t=40, b=40)   # Set consistent margins
     )
 
-    # Return the figure as an embeddable HTML snippet (without full HTML wrapper)
-    return pio.to_html(fig, full_html=False)
+    return figure_payload(fig, payload)
+
+
+def add_stochastic_traces(fig, stats):
+    import plotly.graph_objs as go
+
+    t_values = stats["t"]
+    bands = stats["percentiles"]
+
+    # Shaded 5–95 % and 25–75 % bands, drawn as an upper edge filled down to a lower edge
+    for low, high, color in ((5, 95, "rgba(255, 127, 14, 0.15)"), (25, 75, "rgba(255, 127, 14, 0.3)")):
+        fig.add_trace(go.Scatter(x=t_values, y=bands[low], mode='lines', line=dict(width=0),
+                                 showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=t_values, y=bands[high], mode='lines', line=dict(width=0),
+                                 fill='tonexty', fillcolor=color, name=f'{low}–{high} %', hoverinfo='skip'))
+
+    # Individual trajectories, sampled at the plot's time values
+    for i, path in enumerate(stats["paths"]):
+        fig.add_trace(go.Scatter(x=t_values, y=path, mode='lines', line=dict(width=1),
+                                 opacity=0.5, name='Sample paths', legendgroup='paths', showlegend=i == 0,
+                                 hovertemplate='Time: %{x:.2f}<br>Atoms: %{y}<extra></extra>'))
+
+    fig.add_trace(go.Scatter(
+        x=t_values,
+        y=stats["mean"],
+        mode='lines',
+        line=dict(dash='dash'),
+        name=f'Mean of {stats["trajectories"]} trajectories',
+        hovertemplate='Time: %{x:.2f}<br>Mean: %{y:.2f}<extra></extra>'
+    ))
+
+
+def generate_chain_plot(names, half_lives, n0, t_max, payload="json", tolerance=1e-3):
+    key = plot_key("chain", payload, tuple(names), tuple(half_lives), n0, t_max, tolerance)
+    return plot_cache.get_or_create(
+        key, lambda: render_chain_plot(names, half_lives, n0, t_max, payload, tolerance))
+
+
+def chain_time_grid(half_lives, n0, t_max, tolerance=1e-3, resolution=2000, backbone=50):
+    """Indices into an evenly spaced grid of `resolution` + 1 points covering [0, t_max].
+
+    Every population is a sum of the members' exponentials, so the points kept are those of
+    each radioactive member's decay_time_grid, moved to the end of their 1/`resolution` of the
+    range: short-lived members pack their points near t = 0, on one pixel column, and have
+    reached equilibrium by its end. `backbone` evenly spaced points follow the slow ingrowth
+    of long-lived daughters, which shows on the log axis.
+    """
+    radioactive = [h for h in half_lives if h is not None]
+    t_values = comparison_time_grid([n0] * len(radioactive), radioactive, t_max, tolerance)
+    columns = np.minimum(np.ceil(t_values * (resolution / t_max)), resolution).astype(np.intp)
+    return np.unique(np.concatenate([[0], columns, np.linspace(0, resolution, backbone + 1).astype(np.intp)]))
+
+
+@RENDER_LATENCY.time("plotly", timing="plotly")
+def render_chain_plot(names, half_lives, n0, t_max, payload="json", tolerance=1e-3, resolution=2000):
+    # An empty range shows five half-lives of the parent
+    t_max = plot_range(math.log(2) / half_lives[0], t_max)
 
+    # Evaluate every member on the evenly spaced grid (one step matrix reused in blocks),
+    # then keep only the points the adaptive grids need
+    indices = chain_time_grid(half_lives, n0, t_max, tolerance, resolution)
+    t_values = np.linspace(0, t_max, resolution + 1)
+    populations = chain_populations(half_lives, n0, t_values)[:, indices]
+    t_values = t_values[indices]
 
-def generate_decay_plot_image(n0, lam, t_max, filename="static/plots/decay_plot.png"):
-    if t_max < 0.1:
-        t_max = 0.1  # Minimum range for visibility
-    # Determine number of points: at least 100, up to 1000, with 50 points per time unit
-    num_points = min(1000, max(100, int(t_max * 500)))
+    load_plot_backends()
+    import plotly.graph_objs as go
 
-    # Generate time values and compute decay values
-    t_values = np.linspace(0, t_max, num_points)
+    # One line per chain member
+    fig = go.Figure()
+    for name, n_values in zip(names, populations):
+        fig.add_trace(go.Scatter(
+            x=t_values,
+            y=n_values,
+            mode='lines',
+            name=name,
+            hovertemplate='Time: %{x:.4g}<br>Quantity: %{y:.4e}<extra>' + name + '</extra>'
+        ))
+
+    # Daughters can be many orders of magnitude below the parent, so use a log axis
+    fig.update_layout(
+        title="Decay Chain",
+        xaxis_title="Time (t)",
+        xaxis=dict(range=[0, t_max]),
+        yaxis_title="Quantity (N)",
+        yaxis=dict(type="log", exponentformat="e"),
+        template="plotly_white",
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    return figure_payload(fig, payload)
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of `threshold` points per row of `y` picked by Largest-Triangle-Three-Buckets.
+
+    The inner points are split into threshold – 2 equal buckets; each bucket keeps the point
+    forming the largest triangle with the point kept before it and the mean of the next
+    bucket, so peaks and bends survive. The rows share `x`, so every bucket is one NumPy
+    step over all of them at once.
+    """
+    rows, n = y.shape
+    if threshold >= n or threshold < 3:
+        return np.broadcast_to(np.arange(n), (rows, n))
+
+    # Bucket edges over the points between the first and the last one
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    indices = np.empty((rows, threshold), dtype=np.intp)
+    indices[:, 0] = 0
+    indices[:, -1] = n - 1
+    row = np.arange(rows)
+    kept = np.zeros(rows, dtype=np.intp)
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Mean of the next bucket (the last point, after the final bucket)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[:, end:next_end].mean(axis=1)
+        # Twice the triangle area for every candidate in the bucket
+        kept_x = x[kept][:, None]
+        kept_y = y[row, kept][:, None]
+        area = np.abs((kept_x - next_x) * (y[:, start:end] - kept_y)
+                      - (kept_x - x[start:end]) * (next_y[:, None] - kept_y))
+        kept = start + area.argmax(axis=1)
+        indices[:, i + 1] = kept
+    return indices
+
+
+def comparison_time_grid(n0, half_lives, t_max, tolerance=1e-3):
+    # One grid for every curve: the union of their own decay_time_grid points, so a fast
+    # decay keeps its dense start next to a slow one (at most about 1/√tolerance points each)
+    lam = math.log(2) / np.asarray(half_lives, dtype=float)
+    return np.unique(np.concatenate([decay_time_grid(l, t_max, axis_tolerance(n, tolerance))
+                                     for n, l in zip(n0, lam)]))
+
+
+def generate_comparison_plot(labels, n0, half_lives, t_max, unit, point_budget=2000, tolerance=1e-3,
+                             payload="json"):
+    key = plot_key("compare", payload, tuple(labels), tuple(n0), tuple(half_lives), t_max, unit,
+                   point_budget, tolerance)
+    return plot_cache.get_or_create(
+        key, lambda: render_comparison_plot(labels, n0, half_lives, t_max, unit, point_budget, tolerance, payload))
+
+
+@RENDER_LATENCY.time("plotly", timing="plotly")
+def render_comparison_plot(labels, n0, half_lives, t_max, unit, point_budget=2000, tolerance=1e-3,
+                           payload="json"):
+    # Every curve on one shared grid, then each one thinned to its share of the chart's
+    # point budget, so the payload stays the same size however many curves are overlaid
+    t_values = comparison_time_grid(n0, half_lives, t_max, tolerance)
+    curves = decay_curves(n0, half_lives, t_values)
+    indices = lttb_indices(t_values, curves, max(3, point_budget // len(labels)))
+    times = t_values[indices]
+    quantities = np.take_along_axis(curves, indices, axis=1)
+
+    load_plot_backends()
+    import plotly.graph_objs as go
+
+    # One line per simulation
+    fig = go.Figure()
+    for label, x, y in zip(labels, times, quantities):
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            mode='lines',
+            name=label,
+            hovertemplate=f'Time: %{{x:.4g}} {unit}<br>Remaining: %{{y:.4g}}<extra>{label}</extra>'
+        ))
+
+    fig.update_layout(
+        title="Compared simulations",
+        xaxis_title=f"Time (t, {unit})",
+        xaxis=dict(range=[0, t_max]),
+        yaxis_title="Quantity (N)",
+        template="plotly_white",
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+
+    return figure_payload(fig, payload)
+
+
+def generate_sweep_plot(key, sweep, unit, view="heatmap", max_cells=40000, payload="json"):
+    # `key` identifies the sweep (see app.sweep.sweep_key), so the grid itself isn't hashed
+    return plot_cache.get_or_create(plot_key("sweep", payload, view, max_cells, key),
+                                    lambda: render_sweep_plot(sweep, unit, view, max_cells, payload))
+
+
+@RENDER_LATENCY.time("plotly", timing="plotly")
+def render_sweep_plot(sweep, unit, view="heatmap", max_cells=40000, payload="json"):
+    # Browsers can't draw millions of cells, so large grids are thinned for display only
+    n0_values, t_values = sweep["n0"], sweep["t"]
+    stride = plot_stride(len(n0_values), len(t_values), max_cells)
+    n0_values, t_values = n0_values[::stride], t_values[::stride]
+
+    load_plot_backends()
+    import plotly.graph_objs as go
+
+    # One trace per element; the buttons show one element at a time
+    fig = go.Figure()
+    for i, (name, grid) in enumerate(zip(sweep["names"], sweep["nt"])):
+        trace = go.Surface if view == "surface" else go.Heatmap
+        fig.add_trace(trace(
+            x=t_values,
+            y=n0_values,
+            z=grid[::stride, ::stride],
+            name=name,
+            visible=i == 0,
+            colorscale="Viridis",
+            colorbar=dict(title="N(t)"),
+            hovertemplate=f"t: %{{x:.4g}} {unit}<br>N₀: %{{y:.4g}}<br>N(t): %{{z:.4e}}<extra>{name}</extra>"
+        ))
+
+    buttons = [dict(label=name, method="update",
+                    args=[{"visible": [j == i for j in range(len(sweep["names"]))]}, {"title": name}])
+               for i, name in enumerate(sweep["names"])]
+
+    fig.update_layout(
+        title=sweep["names"][0],
+        updatemenus=[dict(buttons=buttons, direction="down", x=1, xanchor="right", y=1.15)] if len(buttons) > 1 else [],
+        template="plotly_white",
+        margin=dict(l=40, r=40, t=60, b=40)
+    )
+    if view == "surface":
+        fig.update_layout(scene=dict(xaxis_title=f"Time (t, {unit})", yaxis_title="Initial quantity (N₀)",
+                                     zaxis_title="Remaining quantity (N)"))
+    else:
+        fig.update_layout(xaxis_title=f"Time (t, {unit})", yaxis_title="Initial quantity (N₀)")
+
+    return figure_payload(fig, payload)
+
+
+def generate_decay_plot_image(n0, lam, t_max, tolerance=1e-3):
+    # Identical plots share one cached PNG
+    key = plot_key("png", n0, lam, t_max, tolerance)
+    return plot_image_cache.get_or_create(key, lambda: render_decay_plot_image(n0, lam, t_max, tolerance))
+
+
+def generate_decay_plot_images(params, tolerance=1e-3, map_function=map):
+    # Cached PNGs for many (n0, λ, t_max) plots; the misses are rendered together by
+    # `map_function`, e.g. a process pool's map to draw them in parallel
+    keys = [plot_key("png", n0, lam, t_max, tolerance) for n0, lam, t_max in params]
+    images = [plot_image_cache.get(key) for key in keys]
+    missing = [i for i, image in enumerate(images) if image is None]
+    if missing:
+        columns = zip(*(params[i] for i in missing))
+        rendered = map_function(render_decay_plot_image, *columns, [tolerance] * len(missing))
+        for i, png in zip(missing, rendered):
+            images[i] = png
+            plot_image_cache.set(keys[i], png)
+    return images
+
+
+@RENDER_LATENCY.time("matplotlib", timing="matplotlib")
+def render_decay_plot_image(n0, lam, t_max, tolerance=1e-3):
+    t_max = plot_range(lam, t_max)
+
+    # Generate the same adaptive time grid as the interactive plot and compute decay values
+    t_values = decay_time_grid(lam, t_max, axis_tolerance(n0, tolerance))
     n_values = n0 * np.exp(-lam * t_values)
 
-    # Create a new figure with specified size (in inches)
-    plt.figure(figsize=(6, 4))
+    load_plot_backends()
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    # Create a standalone figure with its own Agg canvas (no shared pyplot state)
+    fig = Figure(figsize=(6, 4))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
 
     # Plot the decay curve with label and color
-    plt.plot(t_values, n_values, label="N(t) = N₀·e⁻ˡᵗ", color="green")
+    ax.plot(t_values, n_values, label="N(t) = N₀·e⁻ˡᵗ", color="green")
 
     # Add axis labels and title
-    plt.xlabel("Time (t)")
-    plt.ylabel("Quantity (N)")
-    plt.title("Radioactive Decay")
+    ax.set_xlabel("Time (t)")
+    ax.set_ylabel("Quantity (N)")
+    ax.set_title("Radioactive Decay")
 
     # Enable grid and legend
-    plt.grid(True)
-    plt.legend()
+    ax.grid(True)
+    ax.legend()
 
     # Force x axis limits for visualization
-    plt.xlim(0, t_max)
-    
-    # Limit y-axis to avoid extreme values
-    plt.ylim(0, min(n0, 1e6))
-
-    # Ensure the output directory exists
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    ax.set_xlim(0, t_max)
 
-    # Save the figure to the specified path with tight bounding box
-    plt.savefig(filename, bbox_inches="tight")
+    # Limit y-axis to avoid extreme values
+    ax.set_ylim(0, min(n0, 1e6))
 
-    # Close the figure to free memory
-    plt.close()
+    # Render the figure into an in-memory PNG with tight bounding box
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
 
-    # Return the absolute path of the saved image
-    return os.path.abspath(filename)
\ No newline at end of file
+    # Return the PNG bytes
+    return buffer.getvalue()
@@ -0,0 +1,33 @@
+import threading
+
+
+class LazyPool:
+    """Executor started on first use by `start(max_workers, *args)`; 0 workers means no pool."""
+
+    def __init__(self, start, max_workers=2):
+        self.start = start
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def resize(self, max_workers):
+        with self._lock:
+            # Drop a pool of the wrong size; the next get() starts a new one
+            if self._pool is not None and max_workers != self.max_workers:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+            self.max_workers = max_workers
+
+    def get(self, *args):
+        # The running pool, started on first use with `args`, or None when it is disabled
+        with self._lock:
+            if self._pool is None and self.max_workers > 0:
+                self._pool = self.start(self.max_workers, *args)
+            return self._pool
+
+    def discard(self, pool):
+        # Forget a broken pool so the next get() starts a fresh one
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
@@ -0,0 +1,114 @@
+import base64
+import math
+import os
+import zipfile
+from flask import render_template
+from app import app
+from app.plot import generate_decay_plot_image, generate_decay_plot_images
+from app.pdf import get_pdf_async, pool_map, render_pdf, row_digest
+
+
+# Base URL that the stylesheet in the report templates is resolved against during PDF rendering
+def report_base_url():
+    project_root = os.path.abspath(os.path.join(app.root_path, ".."))
+    return f'file:///{project_root.replace(os.path.sep, "/")}/'
+
+
+# Plot parameters (n0, λ, t_max) of a simulation's report
+def report_plot_params(row):
+    return row["n0"], math.log(2) / row["half_life"], row["t"] * 1.5
+
+
+# Template variables for one simulation page of a report, given its plot as PNG bytes
+def report_context(row, png):
+    # Calculate decay constant and format for display
+    lam = math.log(2) / row["half_life"]
+    lam_str = "%.5e" % lam
+    # Format remaining quantity for display
+    nt_str = "%.5f" % row["nt"]
+    # Embed the static decay plot as a data URI
+    plot_src = "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+    return {"row": row, "lam_str": lam_str, "nt_str": nt_str, "plot_src": plot_src}
+
+
+# Render the PDF report HTML for a simulation row and the base URL to resolve it against
+def build_report_html(row, png=None):
+    # Render the static decay plot in memory unless it was drawn already
+    if png is None:
+        n0, lam, t_max = report_plot_params(row)
+        png = generate_decay_plot_image(n0, lam, t_max=t_max, tolerance=app.config["PLOT_TOLERANCE"])
+
+    # Render HTML template with simulation data
+    html = render_template("pdf_exp.html", **report_context(row, png))
+    return html, report_base_url()
+
+
+# Draw the plots of many reports at once, spread over the PDF worker processes
+def report_plots(rows):
+    return generate_decay_plot_images([report_plot_params(row) for row in rows],
+                                      tolerance=app.config["PLOT_TOLERANCE"], map_function=pool_map)
+
+
+def combined_report_pdf(rows):
+    """Every simulation in `rows` as one PDF, one report per page.
+
+    The whole document goes through a single WeasyPrint layout pass, which is much
+    cheaper than rendering the reports one by one, but it is built in memory, so the
+    number of rows is capped by the caller.
+    """
+    reports = [report_context(row, png) for row, png in zip(rows, report_plots(rows))]
+    html = render_template("pdf_bulk.html", reports=reports)
+    return render_pdf(html, report_base_url())
+
+
+class _ZipBuffer:
+    """Write-only file object that collects what zipfile writes until it is drained."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        # zipfile records where each member starts from the bytes written so far
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        # Hand over everything written since the last call
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def report_zip_chunks(cursor, batch_size):
+    """Stream a ZIP archive with one PDF report per simulation row read from `cursor`.
+
+    Rows are fetched in batches; each batch's plots are drawn in parallel and its PDFs
+    are rendered in the worker pool (or taken from the PDF cache), so only one batch of
+    reports is held in memory at a time. PDFs are already compressed, so they are stored.
+    """
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+
+            # Start every render of the batch before waiting for the first one
+            futures = [
+                get_pdf_async(row["id"], row_digest(row), lambda row=row, png=png: build_report_html(row, png))
+                for row, png in zip(rows, report_plots(rows))
+            ]
+            for row, future in zip(rows, futures):
+                archive.writestr(f"simulation_{row['id']}.pdf", future.result())
+                yield buffer.drain()
+
+    # Central directory, written when the archive is closed
+    yield buffer.drain()
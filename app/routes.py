@@ -1,26 +1,68 @@
-from flask import render_template, request, redirect, url_for, session, Response, current_app as app
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import (render_template, request, redirect, url_for, session, Response, stream_with_context, jsonify,
+                   g, abort, send_file, send_from_directory, current_app as app)
 from app import app
-from app.forms import DecayForm, RegisterForm, LoginForm, EditSimulationForm, ChangePasswordForm
+from app.forms import (DecayForm, RegisterForm, LoginForm, EditSimulationForm, ChangePasswordForm, HistoryFilterForm,
+                       ChainForm, SweepForm)
 import math
+import csv
+import io
+import json
+import numpy as np
 import sqlite3
-from app.plot import generate_decay_plot, generate_decay_plot_image
+from app.plot import (generate_decay_plot, generate_chain_plot, generate_sweep_plot, generate_comparison_plot,
+                      plotlyjs_bundle, plot_range, PLOTLYJS_VERSION, plot_cache, plot_image_cache)
 from functools import wraps
 import logging
-from weasyprint import HTML
-from datetime import datetime
-import os
-
-
-# Debug configuration for user information
-logging.basicConfig(level=logging.DEBUG)
-
-# Connect to database in SQLite3
-def get_db_connection():
-    conn = sqlite3.connect("radioactive.db")
-    # Enable dictionary-style access to columns
-    conn.row_factory = sqlite3.Row
-    return conn
+from app.simulation import remaining_quantities, chain_populations
+from app.db import get_db_connection, release_db_connection
+from app.catalog import catalog
+from app.nuclides import search_elements
+from app.auth import configure_hashing, hash_password, verify_password
+from app.stochastic import configure_stochastic, stochastic_decay, new_seed, MAX_ATOMS
+from app.metrics import (REQUEST_LATENCY, configure_metrics, metrics_enabled, server_timing_enabled,
+                         server_timing_header, render_metrics)
+from app.pdf import configure_pdf_rendering, get_pdf, prerender_pdf, invalidate_pdf, row_digest
+from app.sweep import (TIME_UNITS, sweep_cache, get_sweep, sweep_key, grid_bytes, convert_half_life, sweep_npz,
+                       sweep_csv_chunks)
+from app.jobs import configure_jobs, background_capable, ensure_dispatcher, job_status
+from app.thumbnails import configure_thumbnails, thumbnail_names, prepare_thumbnail
+from app.stats import STATS_METRICS, read_dashboard
+from app.reports import build_report_html, combined_report_pdf, report_zip_chunks
+from app.http_cache import (apply_cache_policy, static_url, template_fingerprint, make_etag, row_last_modified,
+                            not_modified, set_validators, no_store)
+from datetime import datetime, timedelta
+import time
+
+
+# Log at the configured level (debug logging stays off the request path by default)
+logging.basicConfig(level=app.config["LOG_LEVEL"])
+
+
+# Apply the app configuration to logging and the shared caches and pools (create_app runs it again)
+def configure_services():
+    logging.getLogger().setLevel(app.config["LOG_LEVEL"])
+    configure_metrics(app.config["METRICS_ENABLED"], app.config["SERVER_TIMING"])
+
+    # Size the shared plot caches from the app configuration
+    plot_cache.resize(app.config["PLOT_CACHE_SIZE"])
+    plot_image_cache.resize(app.config["PLOT_CACHE_SIZE"])
+    configure_pdf_rendering(app.config["PDF_WORKERS"], app.config["PDF_CACHE_SIZE"])
+    configure_hashing(app.config["PASSWORD_HASH_METHOD"], app.config["PASSWORD_SALT_LENGTH"],
+                      app.config["PASSWORD_HASH_WORKERS"])
+    configure_stochastic(app.config["STOCHASTIC_WORKERS"], app.config["STOCHASTIC_SHARD_SIZE"])
+    sweep_cache.resize(app.config["SWEEP_CACHE_SIZE"])
+    configure_jobs(app.config["JOB_WORKERS"], app.config["JOB_MAX_RUNNING_PER_USER"],
+                   app.config["JOB_MAX_PENDING_PER_USER"], app.config["JOB_POLL_INTERVAL"], app.config["JOB_RESULT_TTL"],
+                   app.config["JOB_LEASE_SECONDS"])
+    configure_thumbnails(app.config["THUMBNAIL_DIR"], app.config["THUMBNAIL_SIZE"], app.config["THUMBNAIL_BATCH_SIZE"])
+    catalog.check_interval = app.config["CATALOG_CHECK_INTERVAL"]
+    catalog.resize(app.config["CATALOG_CACHE_SIZE"])
+
+
+configure_services()
+
+# Hand each request's pooled database connection back when the app context ends
+app.teardown_appcontext(release_db_connection)
 
 # Establish function to require uses to login to access certain services
 def login_required(f):
@@ -32,16 +74,201 @@ def login_required(f):
     return decorated_function
 
 
-# Prevent caching of sensitive data in shared or public browsers
+# Build the decay plot in the configured payload mode for the templates
+def decay_plot_context(n0, lam, t_max, trajectories=0, seed=None):
+    payload = app.config["PLOT_PAYLOAD"]
+    plot = generate_decay_plot(n0, lam, t_max=t_max, payload=payload, trajectories=trajectories, seed=seed,
+                               tolerance=app.config["PLOT_TOLERANCE"])
+    if payload == "json":
+        return {"plot_json": plot}
+    return {"plot_html": plot}
+
+
+# Build the decay-chain plot in the configured payload mode for the templates
+def chain_plot_context(names, half_lives, n0, t_max):
+    payload = app.config["PLOT_PAYLOAD"]
+    plot = generate_chain_plot(names, half_lives, n0, t_max=t_max, payload=payload,
+                               tolerance=app.config["PLOT_TOLERANCE"])
+    if payload == "json":
+        return {"plot_json": plot}
+    return {"plot_html": plot}
+
+
+# Load a decay chain and its members ordered from parent to stable end
+def fetch_chain(conn, chain_id):
+    chain = conn.execute("SELECT id, name, unit FROM decay_chains WHERE id = ?", (chain_id,)).fetchone()
+    if chain is None:
+        return None, []
+    members = conn.execute("""
+        SELECT position, name, half_life, element_id FROM decay_chain_members
+        WHERE chain_id = ? ORDER BY position
+    """, (chain_id,)).fetchall()
+    return chain, members
+
+
+# Dropdown choices for element fields: the selected elements, the ones the user simulated
+# most recently and the first ELEMENT_CHOICES_LIMIT by name, so the page stays small
+# however large the catalog is (the rest are found through /elements/search)
+def element_choices(conn, selected=()):
+    limit = app.config["ELEMENT_CHOICES_LIMIT"]
+    rows = conn.execute("""
+        SELECT id, name FROM elements WHERE id IN (SELECT value FROM json_each(?))
+        UNION
+        SELECT id, name FROM elements WHERE id IN (
+            SELECT element_id FROM simulations WHERE user_id = ?
+            GROUP BY element_id ORDER BY MAX(timestamp) DESC LIMIT ?
+        )
+        UNION
+        SELECT * FROM (SELECT id, name FROM elements ORDER BY name LIMIT ?)
+        ORDER BY name
+    """, (json.dumps([i for i in selected if i is not None]), session.get("user_id"), limit, limit)).fetchall()
+    return [(row["id"], row["name"]) for row in rows]
+
+
+# Validate a sweep form from the query string and evaluate it; returns (form, sweep, key, error)
+def sweep_from_args():
+    form = SweepForm(request.args)
+    form.elements.choices = element_choices(get_db_connection(), request.args.getlist("elements", type=int))
+    if not form.validate():
+        return form, None, None, None
+
+    # Look up every element and express its half-life in the sweep's time unit
+    unit = form.unit.data
+    elements = [catalog.get(element_id) for element_id in form.elements.data]
+    if any(element is None for element in elements):
+        return form, None, None, "Element not found."
+    names = [element["name"] for element in elements]
+    half_lives = [convert_half_life(element["half_life"], element["unit"], unit) for element in elements]
+    if None in half_lives:
+        return form, None, None, "An element has a time unit that can't be converted."
+
+    # Ranges as (first, last, steps)
+    n0_range = (form.n0_min.data, form.n0_max.data, form.n0_steps.data)
+    t_range = (form.t_min.data or 0.0, form.t_max.data, form.t_steps.data)
+    if n0_range[1] < n0_range[0] or t_range[1] < t_range[0]:
+        return form, None, None, "Each range must end at or after its start."
+
+    # The grid is capped by the memory it needs rather than by a fixed number of points
+    needed = grid_bytes(len(names), n0_range[2], t_range[2])
+    budget = app.config["SWEEP_MEMORY_BUDGET"]
+    if needed > budget:
+        return form, None, None, (f"This sweep needs {needed / 2 ** 20:.1f} MiB, over the "
+                                  f"{budget / 2 ** 20:.0f} MiB limit; use fewer elements or steps.")
+
+    key = sweep_key(names, half_lives, n0_range, t_range, unit)
+    return form, get_sweep(names, half_lives, n0_range, t_range, unit), key, None
+
+
+# Columns that the history can be filtered by range, with their form field names
+HISTORY_RANGES = [("n0", "n0_min", "n0_max"), ("t", "t_min", "t_max"), ("nt", "nt_min", "nt_max")]
+
+
+# Build the WHERE clause and parameters for a user's history from the filter form data
+def history_conditions(user_id, filters):
+    conditions = ["user_id = ?"]
+    params = [user_id]
+
+    if filters.get("element"):
+        conditions.append("element_id = ?")
+        params.append(filters["element"])
+
+    # Timestamps are stored as "YYYY-MM-DD HH:MM:SS", so they compare as text
+    if filters.get("date_from"):
+        conditions.append("timestamp >= ?")
+        params.append(filters["date_from"].isoformat())
+    if filters.get("date_to"):
+        conditions.append("timestamp < ?")
+        params.append((filters["date_to"] + timedelta(days=1)).isoformat())
+
+    for column, low, high in HISTORY_RANGES:
+        if filters.get(low) is not None:
+            conditions.append(f"{column} >= ?")
+            params.append(filters[low])
+        if filters.get(high) is not None:
+            conditions.append(f"{column} <= ?")
+            params.append(filters[high])
+
+    return " AND ".join(conditions), params
+
+
+# Build the history filter form from the query string, with element choices from the database
+def history_filter_form(conn):
+    form = HistoryFilterForm(request.args)
+    # 0 means every element
+    form.element.choices = [(0, "All elements")] + element_choices(conn, [request.args.get("element", type=int)])
+    return form
+
+
+# Columns written by the history export, in order
+EXPORT_COLUMNS = ["id", "timestamp", "element_id", "name", "n0", "t", "nt", "half_life", "unit", "quantity_unit"]
+
+
+# Fetch a simulation joined with its element, as used by the PDF report
+def fetch_report_row(conn, sim_id, user_id):
+    return conn.execute("""
+        SELECT s.*, e.name AS element_name, e.half_life, e.unit, e.quantity_unit
+        FROM simulations s
+        JOIN elements e ON s.element_id = e.id
+        WHERE s.id = ? AND s.user_id = ?
+    """, (sim_id, user_id)).fetchone()
+
+
+# Make the plotly.js bundle version and fingerprinted static URLs available to every template
+@app.context_processor
+def inject_plotlyjs_version():
+    return {"plotlyjs_version": PLOTLYJS_VERSION, "static_url": static_url}
+
+
+# Start the clock for the request latency metrics
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+# Record the request latency and, if enabled, report the time breakdown in Server-Timing
+@app.after_request
+def record_request_latency(response):
+    start = g.pop("request_start", None)
+    if start is None or not metrics_enabled():
+        return response
+    elapsed = time.perf_counter() - start
+    REQUEST_LATENCY.observe(elapsed, request.endpoint or "unmatched", request.method, response.status_code)
+    if server_timing_enabled():
+        response.headers["Server-Timing"] = server_timing_header(elapsed)
+    return response
+
+
+# Per-route caching: long-lived fingerprinted assets, revalidated private pages and
+# no-store only for views marked as sensitive
 @app.after_request
 def after_request(response):
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Expires"] = "0"
-    response.headers["Pragma"] = "no-cache"
+    return apply_cache_policy(response, app.config["STATIC_MAX_AGE"])
+
+
+@app.route("/metrics")
+def metrics():
+    # Prometheus scrape endpoint
+    if not metrics_enabled():
+        abort(404)
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/plotly-<version>.min.js")
+def plotly_js(version):
+    # Always point clients at the bundle matching the installed plotly package
+    if version != PLOTLYJS_VERSION:
+        return redirect(url_for("plotly_js", version=PLOTLYJS_VERSION))
+
+    # The URL changes with the version, so browsers may cache it forever
+    response = Response(plotlyjs_bundle(), mimetype="application/javascript")
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config["STATIC_MAX_AGE"]
+    response.cache_control.immutable = True
     return response
 
 
 @app.route("/login", methods=["GET", "POST"])
+@no_store
 def login():
     # Use validations from the form in forms.py
     form = LoginForm()    
@@ -55,19 +282,21 @@ def login():
         # Find the user in the database
         conn = get_db_connection()
         user = conn.execute("SELECT * FROM users WHERE name = ?", (username,)).fetchone()
-        conn.close()
 
-        # Assess matching for debugging purpuses
-        logging.debug(f"Username: {username}")
-        logging.debug(f"User found: {user is not None}")
-        if user:
-            logging.debug(f"Password match: {check_password_hash(user['password'], password)}")
+        # Check the password once (unknown users are checked against a dummy hash)
+        matches, new_hash = verify_password(user["password"] if user else None, password)
+        logging.debug("Login for %s: user found %s, password match %s", username, user is not None, matches)
 
         # Manage errors of user input
-        if user is None or not check_password_hash(user["password"], password):
+        if not matches:
             form.username.errors.append("Invalid username or password.")
             return render_template("login.html", form=form)
 
+        # Upgrade a hash made with outdated parameters
+        if new_hash is not None:
+            conn.execute("UPDATE users SET password = ? WHERE id = ?", (new_hash, user["id"]))
+            conn.commit()
+
         # Provide a username with a session
         session["user_id"] = user["id"]
         session["username"] = user["name"]
@@ -89,6 +318,7 @@ def logout():
 
 
 @app.route("/register", methods=["GET", "POST"])
+@no_store
 def register():
     # Use validations from the form in forms.py
     form = RegisterForm()
@@ -98,7 +328,7 @@ def register():
         username = form.username.data
         password = form.password.data
         # Generate hash for password
-        hashed_password = generate_password_hash(password)
+        hashed_password = hash_password(password)
 
         # Try adding data to the database
         try:
@@ -107,7 +337,6 @@ def register():
                          # Use email placeholder for demonstration purposes
                          (username, f"{username}@example.com", hashed_password))
             conn.commit()
-            conn.close()
             # If successful, redirect user to login
             return redirect(url_for("login"))
         # Manage error if username already exists
@@ -120,6 +349,7 @@ def register():
 
 @app.route("/change_password", methods=["GET", "POST"])
 @login_required
+@no_store
 def change_password():
     # Use validations from the form in forms.py
     form = ChangePasswordForm()
@@ -134,18 +364,17 @@ def change_password():
         user = conn.execute("SELECT * FROM users WHERE id = ?", (session["user_id"],)).fetchone()
 
         # If current password does not match hash in database, show error
-        if not check_password_hash(user["password"], current):
+        matches, _ = verify_password(user["password"], current)
+        if not matches:
             form.current_password.errors.append("Incorrect current password.")
-            conn.close()
             # Redirect user to change_password.html if unsuccessful
             return render_template("change_password.html", form=form)
 
         #Generate new hash
-        new_hash = generate_password_hash(new)
+        new_hash = hash_password(new)
         # Update database with new hash
         conn.execute("UPDATE users SET password = ? WHERE id = ?", (new_hash, session["user_id"]))
         conn.commit()
-        conn.close()
 
         # Password change confirmed, return to main page
         return redirect(url_for("index"))
@@ -164,10 +393,8 @@ def index():
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    # Populate element choices dynamically from database
-    cursor.execute("SELECT id, name FROM elements ORDER BY name")
-    elements = cursor.fetchall()
-    form.element.choices = [(row["id"], row["name"]) for row in elements]
+    # Populate element choices with the posted element and the usual ones
+    form.element.choices = element_choices(conn, [request.form.get("element", type=int)])
 
     if form.validate_on_submit():
         # Obtain data from user if form is validated
@@ -175,11 +402,9 @@ def index():
         t = form.t.data
         element_id = form.element.data
 
-        # Fetch half-life and units for selected element
-        cursor.execute("SELECT name, half_life, unit, quantity_unit FROM elements WHERE id = ?", (element_id,))
-        element = cursor.fetchone()
+        # Look up half-life and units for selected element
+        element = catalog.get(element_id)
         if element is None:
-            conn.close()
             # Show error if element is not found
             return render_template("index.html", form=form, error="Element not found.")
 
@@ -188,8 +413,24 @@ def index():
         lam_str = "%.5e" % lam
         # Calculate the remaining quantity with mathematical model
         nt = n0 * math.exp(-lam * t)
+
+        # Optional Monte Carlo run, reproducible from its seed
+        trajectories = form.trajectories.data or 0
+        if trajectories > app.config["STOCHASTIC_MAX_TRAJECTORIES"]:
+            form.trajectories.errors.append(
+                f"At most {app.config['STOCHASTIC_MAX_TRAJECTORIES']} trajectories are allowed.")
+            return render_template("index.html", form=form)
+        if trajectories and n0 > MAX_ATOMS:
+            form.n0.errors.append("Monte Carlo mode supports at most 2⁵³ atoms.")
+            return render_template("index.html", form=form)
+        seed = form.seed.data if form.seed.data is not None else new_seed()
+        stochastic = None
+        if trajectories:
+            stochastic = stochastic_decay(n0, lam, [t], trajectories, seed, sample_paths=0)
+
         # Build the Plotly plot calling the generate_decay_plot function
-        plot_html = generate_decay_plot(n0, lam, t_max=int(t * 1.5))
+        plot_context = decay_plot_context(n0, lam, t_max=t * 1.5,
+                                          trajectories=trajectories, seed=seed if trajectories else None)
         # Obtain current time and date
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -210,41 +451,438 @@ def index():
             timestamp
         ))
         conn.commit()
-        conn.close()
+
+        # Draw the history thumbnail in the background
+        prepare_thumbnail(element["half_life"], t)
+
+        # Optionally start rendering the PDF report right away
+        if app.config["PDF_PRERENDER"]:
+            row = fetch_report_row(conn, cursor.lastrowid, session["user_id"])
+            prerender_pdf(row["id"], row_digest(row), *build_report_html(row))
 
         # Pass data to template
         return render_template("result.html", n0=n0, t=t,
                                half_life=element["half_life"],
-                               nt=nt, lam_str=lam_str, plot_html=plot_html,
+                               nt=nt, lam_str=lam_str,
                                unit=element["unit"], quantity_unit=element["quantity_unit"], name=element["name"],
-                               timestamp=timestamp)
+                               timestamp=timestamp, stochastic=stochastic, **plot_context)
 
-    conn.close()
     # Render index.html with form and errors if validation fails
     return render_template("index.html", form=form)    
 
 
+@app.route("/chains", methods=["GET", "POST"])
+@login_required
+def chains():
+    # Use validations from the form in forms.py
+    form = ChainForm()
+
+    # Populate chain choices from the database
+    conn = get_db_connection()
+    form.chain.choices = [(row["id"], row["name"]) for row in
+                          conn.execute("SELECT id, name FROM decay_chains ORDER BY name")]
+
+    if form.validate_on_submit():
+        n0 = form.n0.data
+        t = form.t.data
+
+        # Look up the chain members
+        chain, members = fetch_chain(conn, form.chain.data)
+        if not members:
+            return render_template("chains.html", form=form, error="Decay chain not found.")
+
+        # Quantity of every member at time t
+        names = [member["name"] for member in members]
+        half_lives = [member["half_life"] for member in members]
+        quantities = chain_populations(half_lives, n0, [t])[:, 0]
+
+        # Plot every member up to 1.5 times the elapsed time
+        plot_context = chain_plot_context(names, half_lives, n0, t_max=t * 1.5)
+
+        return render_template("chain_result.html", chain=chain, n0=n0, t=t,
+                               members=zip(members, quantities), **plot_context)
+
+    # Render chains.html with form and errors if validation fails
+    return render_template("chains.html", form=form)
+
+
+@app.route("/sweep")
+@login_required
+def sweep():
+    # Show the empty form until a sweep is submitted
+    if "elements" not in request.args:
+        form = SweepForm(formdata=None)
+        form.elements.choices = element_choices(get_db_connection())
+        return render_template("sweep.html", form=form)
+
+    form, grid, key, error = sweep_from_args()
+    if grid is None:
+        return render_template("sweep.html", form=form, error=error)
+
+    # Plot the whole grid in the configured payload mode
+    payload = app.config["PLOT_PAYLOAD"]
+    plot = generate_sweep_plot(key, grid, form.unit.data, view=form.view.data,
+                               max_cells=app.config["SWEEP_PLOT_CELLS"], payload=payload)
+    plot_context = {"plot_json": plot} if payload == "json" else {"plot_html": plot}
+
+    # The downloads repeat the same query string, so they hit the sweep cache
+    return render_template("sweep.html", form=form, sweep=grid, unit=form.unit.data,
+                           sweep_args=request.args.to_dict(flat=False), **plot_context)
+
+
+@app.route("/sweep/download")
+@login_required
+@background_capable
+def sweep_download():
+    # The arrays of a sweep as a NumPy archive or a long-format CSV
+    download_format = request.args.get("format", "npz")
+    form, grid, key, error = sweep_from_args()
+    if grid is None or download_format not in ("npz", "csv"):
+        return redirect(url_for("sweep", **request.args.to_dict(flat=False)))
+
+    if download_format == "npz":
+        return Response(sweep_npz(grid), mimetype="application/octet-stream", headers={
+            "Content-Disposition": "attachment; filename=decay_sweep.npz"
+        })
+    return Response(sweep_csv_chunks(grid, form.unit.data), mimetype="text/csv", headers={
+        "Content-Disposition": "attachment; filename=decay_sweep.csv"
+    })
+
+
+@app.route("/api/simulations/batch", methods=["POST"])
+@login_required
+def batch_simulations():
+    # Accept {"simulations": [...]} or a bare list; items are [element_id, n0, t] or objects
+    payload = request.get_json(silent=True)
+    items = payload.get("simulations") if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        return {"error": "Expected a non-empty list of simulations."}, 400
+    if len(items) > app.config["BATCH_MAX_SIZE"]:
+        return {"error": f"At most {app.config['BATCH_MAX_SIZE']} simulations per batch."}, 400
+
+    # Parse everything into columns before touching the database
+    try:
+        columns = [(item["element_id"], item["n0"], item["t"]) if isinstance(item, dict) else tuple(item)
+                   for item in items]
+        # Reject ids sent as floats, strings or booleans rather than let NumPy coerce them
+        for index, column in enumerate(columns):
+            if not isinstance(column[0], int) or isinstance(column[0], bool):
+                return {"error": "element_id must be an integer.", "index": index}, 400
+        element_ids = np.array([c[0] for c in columns], dtype=np.int64)
+        n0 = np.array([c[1] for c in columns], dtype=float)
+        t = np.array([c[2] for c in columns], dtype=float)
+    except (KeyError, IndexError, TypeError, ValueError):
+        return {"error": "Each simulation needs an integer element_id and numeric n0 and t."}, 400
+    if not (np.isfinite(n0).all() and np.isfinite(t).all()) or (n0 < 0).any() or (t < 0).any():
+        return {"error": "n0 and t must be finite and non-negative."}, 400
+
+    # Look up every distinct element once in the catalog
+    unique_ids, positions = np.unique(element_ids, return_inverse=True)
+    elements = [catalog.get(element_id) for element_id in unique_ids.tolist()]
+    missing = [element_id for element_id, element in zip(unique_ids.tolist(), elements) if element is None]
+    if missing:
+        return {"error": "Element not found.", "element_ids": missing}, 400
+
+    # Compute N(t) and λ for the whole batch in one vectorized pass
+    half_lives = np.array([element["half_life"] for element in elements])[positions]
+    nt, lam = remaining_quantities(n0, t, half_lives)
+
+    # Persist the batch in a single transaction; the write lock makes the new ids contiguous
+    conn = get_db_connection()
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute("BEGIN IMMEDIATE")
+    first_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM simulations").fetchone()[0]
+    ids = list(range(first_id, first_id + len(items)))
+    element_rows = [elements[i] for i in positions.tolist()]
+    conn.executemany("""
+        INSERT INTO simulations (id, user_id, element_id, name, n0, t, nt, half_life, unit, quantity_unit, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, zip(ids, [session["user_id"]] * len(ids), element_ids.tolist(),
+             [element["name"] for element in element_rows], n0.tolist(), t.tolist(), nt.tolist(),
+             half_lives.tolist(), [element["unit"] for element in element_rows],
+             [element["quantity_unit"] for element in element_rows], [timestamp] * len(ids)))
+    conn.commit()
+
+    # Return the computed values without rendering any plot
+    return {
+        "count": len(ids),
+        "timestamp": timestamp,
+        "results": [
+            {"id": sim_id, "element_id": element_id, "n0": n0_value, "t": t_value, "nt": nt_value, "lambda": lam_value}
+            for sim_id, element_id, n0_value, t_value, nt_value, lam_value
+            in zip(ids, element_ids.tolist(), n0.tolist(), t.tolist(), nt.tolist(), lam.tolist())
+        ],
+    }
+
+
 @app.route("/history")
 @login_required
 def history():
-
     # Establish connection with database
     conn = get_db_connection()
-    cursor = conn.cursor()
 
-    # Fetch data from simulations' table and order it by newest to oldest
-    # Filter simulations by current user and sort by timestamp descending
-    cursor.execute("""
+    # Filters are read from the query string so pages can be bookmarked
+    form = history_filter_form(conn)
+
+    # Ignore the filters if any of them is invalid; the form shows the errors
+    filters = form.data if form.validate() else {}
+    where, params = history_conditions(session["user_id"], filters)
+    filtered = len(params) > 1
+
+    # Keyset pagination: continue strictly after the last row of the previous page
+    before_ts = request.args.get("before_ts")
+    before_id = request.args.get("before_id", type=int)
+    if before_ts and before_id is not None:
+        where += " AND (timestamp, id) < (?, ?)"
+        params += [before_ts, before_id]
+
+    # Fetch one extra row to know whether an older page exists
+    # Served by the (user_id, timestamp, id) and (user_id, element_id, ...) indexes
+    page_size = app.config["HISTORY_PAGE_SIZE"]
+    rows = conn.execute(f"""
         SELECT * FROM simulations
-        WHERE user_id = ?
-        ORDER BY timestamp DESC
-    """, (session["user_id"],))
+        WHERE {where}
+        ORDER BY timestamp DESC, id DESC
+        LIMIT ?
+    """, params + [page_size + 1]).fetchall()
+
+    # Query string of the filters alone, without the page cursor
+    filter_args = {key: value for key, value in request.args.items() if key not in ("before_ts", "before_id")}
+
+    # Build the link to the next (older) page, keeping the filters
+    next_page = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_page = url_for("history", before_ts=rows[-1]["timestamp"], before_id=rows[-1]["id"], **filter_args)
+
+    # Link back to the newest page with the same filters
+    first_page = url_for("history", **filter_args) if before_ts else None
 
-    rows = cursor.fetchall()
-    conn.close()
+    # Thumbnails that are drawn already; the others are queued and show up on a later visit
+    thumbnails = thumbnail_names(rows)
 
     # Render template showing fetched data in a table
-    return render_template("history.html", rows=rows)
+    return render_template("history.html", rows=rows, form=form, filtered=filtered,
+                           next_page=next_page, first_page=first_page, filter_args=filter_args,
+                           thumbnails=thumbnails, thumbnail_size=app.config["THUMBNAIL_SIZE"])
+
+
+@app.route("/thumbnails/<name>")
+def thumbnail(name):
+    # Thumbnails are named by their content and hold no personal data, so any cache may keep them
+    response = send_from_directory(app.config["THUMBNAIL_DIR"], name, mimetype="image/png",
+                                   max_age=app.config["STATIC_MAX_AGE"])
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@app.route("/history/export")
+@login_required
+def export_history():
+    # Only CSV and newline-delimited JSON are supported
+    export_format = request.args.get("format", "csv")
+    if export_format not in ("csv", "ndjson"):
+        return redirect(url_for("history"))
+
+    # Apply the same filters as the history page; show the errors there if invalid
+    conn = get_db_connection()
+    form = history_filter_form(conn)
+    if not form.validate():
+        return redirect(url_for("history", **request.args))
+    where, params = history_conditions(session["user_id"], form.data)
+
+    # SQLite steps through the result lazily, so rows are only read as they are sent
+    cursor = conn.execute(f"""
+        SELECT {", ".join(EXPORT_COLUMNS)} FROM simulations
+        WHERE {where}
+        ORDER BY timestamp DESC, id DESC
+    """, params)
+    batch_size = app.config["EXPORT_BATCH_SIZE"]
+
+    def generate():
+        # Yield one chunk per batch so memory stays flat however long the history is
+        if export_format == "csv":
+            yield ",".join(EXPORT_COLUMNS) + "\r\n"
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            if export_format == "csv":
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in batch)
+
+    # Keep the app context (and its database connection) alive while streaming
+    mimetype = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename=simulation_history.{export_format}"
+    })
+
+
+@app.route("/history/report")
+@login_required
+@background_capable
+def history_report():
+    # One combined PDF, or a ZIP archive with one PDF per simulation
+    report_format = request.args.get("format", "pdf")
+    if report_format not in ("pdf", "zip"):
+        return redirect(url_for("history"))
+
+    conn = get_db_connection()
+
+    # Report the selected simulations, or else everything matching the history filters
+    ids = request.args.getlist("id", type=int)
+    if ids:
+        where, params = "user_id = ? AND s.id IN (SELECT value FROM json_each(?))", [session["user_id"], json.dumps(ids)]
+    else:
+        form = history_filter_form(conn)
+        if not form.validate():
+            return redirect(url_for("history", **request.args))
+        where, params = history_conditions(session["user_id"], form.data)
+
+    # Same rows (and columns) as the single-simulation export, newest first
+    cursor = conn.execute(f"""
+        SELECT s.*, e.name AS element_name, e.half_life, e.unit, e.quantity_unit
+        FROM simulations s
+        JOIN elements e ON s.element_id = e.id
+        WHERE {where}
+        ORDER BY s.timestamp DESC, s.id DESC
+    """, params)
+
+    if report_format == "pdf":
+        # A single document is laid out in memory, so its size is capped; the ZIP has no limit
+        limit = app.config["REPORT_MAX_PDF_SIMULATIONS"]
+        rows = cursor.fetchmany(limit + 1)
+        if len(rows) > limit:
+            return Response(f"A combined PDF can include at most {limit} simulations; "
+                            "download the ZIP archive instead.", status=400, mimetype="text/plain")
+        if not rows:
+            return redirect(url_for("history"))
+        return Response(combined_report_pdf(rows), mimetype="application/pdf", headers={
+            "Content-Disposition": "inline; filename=simulation_reports.pdf"
+        })
+
+    # Keep the app context (and its database connection) alive while streaming the archive
+    chunks = report_zip_chunks(cursor, app.config["REPORT_BATCH_SIZE"])
+    return Response(stream_with_context(chunks), mimetype="application/zip", headers={
+        "Content-Disposition": "attachment; filename=simulation_reports.zip"
+    })
+
+
+@app.route("/history/compare")
+@login_required
+def compare_simulations():
+    # Overlay the checked simulations on one chart
+    ids = request.args.getlist("id", type=int)
+    limit = app.config["COMPARE_MAX_SIMULATIONS"]
+    if not ids:
+        return redirect(url_for("history"))
+    if len(ids) > limit:
+        return render_template("compare.html", rows=[], error=f"At most {limit} simulations can be compared at once.")
+
+    # Every selected simulation in one query, oldest first
+    conn = get_db_connection()
+    rows = conn.execute("""
+        SELECT s.id, s.n0, s.t, s.nt, s.timestamp, e.name AS element_name, e.half_life, e.unit, e.quantity_unit
+        FROM simulations s
+        JOIN elements e ON s.element_id = e.id
+        WHERE s.user_id = ? AND s.id IN (SELECT value FROM json_each(?))
+        ORDER BY s.timestamp, s.id
+    """, (session["user_id"], json.dumps(ids))).fetchall()
+    if not rows:
+        return redirect(url_for("history"))
+
+    # Express every half-life and elapsed time in one unit (the first simulation's by default)
+    unit = request.args.get("unit")
+    if unit not in TIME_UNITS:
+        unit = rows[0]["unit"]
+    half_lives = [convert_half_life(row["half_life"], row["unit"], unit) for row in rows]
+    times = [convert_half_life(row["t"], row["unit"], unit) for row in rows]
+    if None in half_lives or None in times:
+        return render_template("compare.html", rows=rows, error="A simulation has a time unit that can't be converted.")
+
+    # Show 1.5 times the longest elapsed time (five half-lives of the slowest decay if all are zero)
+    t_max = max(plot_range(math.log(2) / half_life, t * 1.5) for half_life, t in zip(half_lives, times))
+    labels = [f"#{row['id']} {row['element_name']} (N₀ = {row['n0']:g})" for row in rows]
+    payload = app.config["PLOT_PAYLOAD"]
+    plot = generate_comparison_plot(labels, [row["n0"] for row in rows], half_lives, t_max, unit,
+                                    point_budget=app.config["COMPARE_POINT_BUDGET"],
+                                    tolerance=app.config["PLOT_TOLERANCE"], payload=payload)
+    plot_context = {"plot_json": plot} if payload == "json" else {"plot_html": plot}
+    return render_template("compare.html", rows=rows, ids=[row["id"] for row in rows], unit=unit,
+                           units=list(TIME_UNITS), **plot_context)
+
+
+@app.route("/stats")
+@login_required
+def stats():
+    # Usage statistics from the summary tables kept by the migration 006 triggers
+    dashboard = read_dashboard(get_db_connection(), session["user_id"], app.config["STATS_TOP"])
+    return render_template("stats.html", metrics=STATS_METRICS, **dashboard)
+
+
+@app.route("/jobs")
+@login_required
+def jobs():
+    # The user's recent background jobs, newest first (results are not loaded)
+    conn = get_db_connection()
+    rows = conn.execute("""
+        SELECT id, status, path, query_string, created_at, started_at, finished_at, filename, error
+        FROM jobs WHERE user_id = ?
+        ORDER BY id DESC
+        LIMIT ?
+    """, (session["user_id"], app.config["HISTORY_PAGE_SIZE"])).fetchall()
+    pending = any(row["status"] in ("queued", "running") for row in rows)
+    # Jobs left by a server that stopped are picked up once this process dispatches
+    if pending:
+        ensure_dispatcher()
+    return render_template("jobs.html", rows=rows, pending=pending)
+
+
+@app.route("/jobs/<int:job_id>")
+@login_required
+def job_detail(job_id):
+    # Status of one of the user's jobs, for polling
+    conn = get_db_connection()
+    job = conn.execute("""
+        SELECT id, status, path, created_at, started_at, finished_at, error FROM jobs
+        WHERE id = ? AND user_id = ?
+    """, (job_id, session["user_id"])).fetchone()
+    if job is None:
+        return jsonify(error="Job not found."), 404
+    if job["status"] in ("queued", "running"):
+        ensure_dispatcher()
+    return jsonify(job_status(job))
+
+
+@app.route("/jobs/<int:job_id>/result")
+@login_required
+def job_result(job_id):
+    # The finished job's response body, as the original route would have sent it
+    conn = get_db_connection()
+    job = conn.execute("""
+        SELECT status, mimetype, filename, result, result_path FROM jobs WHERE id = ? AND user_id = ?
+    """, (job_id, session["user_id"])).fetchone()
+    if job is None:
+        return jsonify(error="Job not found."), 404
+    if job["status"] != "done":
+        return jsonify(error="The job has not finished successfully.", status=job["status"]), 409
+
+    headers = {}
+    if job["filename"]:
+        headers["Content-Disposition"] = f"attachment; filename={job['filename']}"
+    # Bodies are streamed from their file; jobs finished before migration 007 kept theirs in the row
+    if job["result_path"] is None:
+        return Response(job["result"], mimetype=job["mimetype"], headers=headers)
+    try:
+        response = send_file(job["result_path"], mimetype=job["mimetype"], conditional=False)
+    except FileNotFoundError:
+        return jsonify(error="The job's result is no longer available."), 410
+    response.headers.update(headers)
+    return response
 
 
 @app.route("/simulation/<int:sim_id>")
@@ -263,12 +901,20 @@ def simulation_detail(sim_id):
         JOIN elements e ON s.element_id = e.id
         WHERE s.id = ? AND s.user_id = ?                                              
     """, (sim_id, session["user_id"])).fetchone()
-    conn.close()
 
     # Redirect user to history if the simulation doesn't exist
     # Prevent access to invalid or unauthorized simulation IDs
     if row is None:
         return redirect(url_for("history"))    
+
+    # The page only changes with the row, the templates and the plot settings, so a
+    # browser holding the current version gets a 304 before anything is plotted
+    etag = make_etag(row_digest(row), template_fingerprint(), session.get("username"), PLOTLYJS_VERSION,
+                     app.config["PLOT_PAYLOAD"], app.config["PLOT_TOLERANCE"])
+    last_modified = row_last_modified(row["timestamp"])
+    cached = not_modified(Response, etag, last_modified)
+    if cached is not None:
+        return cached
     
     # Calculate the decay constant
         # λ = ln(2) / t½
@@ -280,13 +926,14 @@ def simulation_detail(sim_id):
     nt_str = "%.5f" % row["nt"]
     
     # Build the Plotly plot calling the generate_decay_plot function
-    plot_html = generate_decay_plot(row["n0"], lam, t_max=int(row["t"] * 1.5))
+    plot_context = decay_plot_context(row["n0"], lam, t_max=row["t"] * 1.5)
 
     # Pass all relevant data and formatted values to template
     # Render the simulation detail in it's template
-    return render_template("simulation_detail.html", row=row, plot_html=plot_html,
+    html = render_template("simulation_detail.html", row=row,
                            lam_str=lam_str, nt_str=nt_str,
-                           unit=row["unit"], quantity_unit=row["quantity_unit"])
+                           unit=row["unit"], quantity_unit=row["quantity_unit"], **plot_context)
+    return set_validators(Response(html), etag, last_modified)
 
 
 @app.route("/simulation/<int:sim_id>/edit", methods=["GET", "POST"])
@@ -300,10 +947,6 @@ def edit_simulation(sim_id):
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    # Load elements for dropdown ordered by name
-    cursor.execute("SELECT id, name FROM elements ORDER BY name")
-    form.element.choices = [(row["id"], row["name"]) for row in cursor.fetchall()]
-
     # Get simulation filtered by sim_id and user_id
     row = cursor.execute("""
         SELECT * FROM simulations WHERE id = ? AND user_id = ?
@@ -311,9 +954,11 @@ def edit_simulation(sim_id):
 
     # If simulation doesn't exist, redirect user to history
     if row is None:
-        conn.close()
         return redirect(url_for("history"))
 
+    # Load elements for dropdown ordered by name, including the saved and the posted element
+    form.element.choices = element_choices(conn, [row["element_id"], request.form.get("element", type=int)])
+
     # Prepopulate the form with previous data
     if request.method == "GET":
         form.element.data = row["element_id"]
@@ -326,12 +971,10 @@ def edit_simulation(sim_id):
         n0 = form.n0.data
         t = form.t.data
 
-        # Obtain elemet's half-life filtered by id
-        cursor.execute("SELECT half_life FROM elements WHERE id = ?", (element_id,))
-        element = cursor.fetchone()
+        # Obtain elemet's half-life from the catalog
+        element = catalog.get(element_id)
         # Render edit_simulation.html template if element is not found and show error
         if element is None:
-            conn.close()
             return render_template("edit_simulation.html", form=form, error="Element not found.")
 
         # Calculate decay constant
@@ -341,20 +984,25 @@ def edit_simulation(sim_id):
         # Obtain current date and time
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        # Update edited simulation in database filtered by id and user_id
+        # Update edited simulation in database filtered by id and user_id, including the
+        # element columns copied into the row (the stats triggers follow the change)
         cursor.execute("""
             UPDATE simulations
-            SET element_id = ?, n0 = ?, t = ?, nt = ?, timestamp = ?
+            SET element_id = ?, name = ?, half_life = ?, unit = ?, quantity_unit = ?,
+                n0 = ?, t = ?, nt = ?, timestamp = ?
             WHERE id = ? AND user_id = ?
-        """, (element_id, n0, t, nt, timestamp, sim_id, session["user_id"]))
+        """, (element_id, element["name"], element["half_life"], element["unit"], element["quantity_unit"],
+              n0, t, nt, timestamp, sim_id, session["user_id"]))
         conn.commit()
-        conn.close()
+
+        # Previously rendered PDFs of this simulation are now stale
+        invalidate_pdf(sim_id)
+        # and its curve may have changed
+        prepare_thumbnail(element["half_life"], t)
 
         # Show edited simulation detail to user
         return redirect(url_for("simulation_detail", sim_id=sim_id))
     
-    # Close connection to database
-    conn.close()
     # If data entered is invalid, render edit_simulation.html again
     return render_template("edit_simulation.html", form=form, sim_id=sim_id)
 
@@ -362,74 +1010,74 @@ def edit_simulation(sim_id):
 @app.route("/element/<int:element_id>/units")
 @login_required
 def get_element_units(element_id):
-    # Pass element_id 
-
-    # Connect to database    
-    conn = get_db_connection()
+    # Pass element_id
 
-    # Query the units of time and quantity for the selected element
-    row = conn.execute("""
-        SELECT unit, quantity_unit FROM elements WHERE id = ?
-    """, (element_id,)).fetchone()
-    conn.close()
+    # Look up the units of time and quantity for the selected element in the catalog; the
+    # version is read first, so a reload in between can only leave the ETag older than the answer
+    version = catalog.current_version()
+    row = catalog.get(element_id)
 
-    # If the element exists, return its units as a JSON dictionary 
-    if row:
-        return {"unit": row["unit"], "quantity_unit": row["quantity_unit"]}
-    
+    # If the element exists, return its units as a JSON dictionary
     # If the element is not found, return empty strings
-    return {"unit": "", "quantity_unit": ""}
+    if row:
+        response = jsonify(unit=row["unit"], quantity_unit=row["quantity_unit"])
+    else:
+        response = jsonify(unit="", quantity_unit="")
+
+    # The answer only changes with the catalog version, so browsers can revalidate cheaply
+    response.set_etag(f"{version}-{element_id}")
+    response.cache_control.private = True
+    response.cache_control.max_age = app.config["ELEMENT_UNITS_MAX_AGE"]
+    return response.make_conditional(request)
+
+
+@app.route("/elements/search")
+@login_required
+def search_element_catalog():
+    # Type-ahead over element names and decay modes, served from the FTS5 index (migration 005)
+    text = request.args.get("q", "").strip()
+    limit = min(request.args.get("limit", app.config["ELEMENT_SEARCH_LIMIT"], type=int),
+                app.config["ELEMENT_SEARCH_LIMIT"])
+
+    rows = search_elements(get_db_connection(), text, max(limit, 0))
+    response = jsonify(results=[dict(row) for row in rows])
+
+    # Results only change with the catalog version, like /element/<id>/units
+    response.set_etag(make_etag(catalog.current_version(), text, limit))
+    response.cache_control.private = True
+    response.cache_control.max_age = app.config["ELEMENT_UNITS_MAX_AGE"]
+    return response.make_conditional(request)
 
 
 @app.route("/simulation/<int:sim_id>/export")
 @login_required
+@background_capable
 def export_simulation_pdf(sim_id):
     # Pass the simulation id
 
     # Connect to database
     conn = get_db_connection()
-    
+
     # Retrieve simulation and element data, enforcing access control
-    row = conn.execute("""
-        SELECT s.*, e.name AS element_name, e.half_life, e.unit, e.quantity_unit
-        FROM simulations s
-        JOIN elements e ON s.element_id = e.id
-        WHERE s.id = ? AND s.user_id = ?
-    """, (sim_id, session["user_id"])).fetchone()
-    conn.close()
+    row = fetch_report_row(conn, sim_id, session["user_id"])
 
     # Redirect the user to history if the simulation is not found
     if row is None:
         return redirect(url_for("history"))
 
-    # Calculate decay constant and format for display
-    lam = math.log(2) / row["half_life"]
-    lam_str = "%.5e" % lam
-    # Format remaining quantity for display
-    nt_str = "%.5f" % row["nt"]
-    # Generate static decay plot and verify file access
-    plot_path = generate_decay_plot_image(row["n0"], lam, t_max=int(row["t"] * 1.5))
-    assert os.path.exists(plot_path)
-    assert os.access(plot_path, os.R_OK)
-
-    # Define base URL and relative path for PDF rendering
-    project_root = os.path.abspath(os.path.join(app.root_path, ".."))
-    rel_path = os.path.relpath(plot_path, start=project_root).replace(os.path.sep, '/')
-    base_url = f'file:///{project_root.replace(os.path.sep, "/")}/'
-    
-    # Render HTML template with simulation data
-    html = render_template(
-        "pdf_exp.html",
-        row=row,
-        lam_str=lam_str,
-        nt_str=nt_str,
-        plot_path=rel_path
-    )
-    
-    # Generate PDF from rendered HTML
-    pdf = HTML(string=html, base_url=base_url).write_pdf()
+    # A browser that already has this version of the report revalidates without a render
+    digest = row_digest(row)
+    etag = make_etag(digest, template_fingerprint(), app.config["PLOT_TOLERANCE"])
+    last_modified = row_last_modified(row["timestamp"])
+    cached = not_modified(Response, etag, last_modified)
+    if cached is not None:
+        return cached
+
+    # Serve the cached PDF for this version of the row, or render it in the worker pool
+    pdf = get_pdf(sim_id, digest, lambda: build_report_html(row))
 
     # Return PDF as HTTP response to be opened in browser
-    return Response(pdf, mimetype="application/pdf", headers={
+    response = Response(pdf, mimetype="application/pdf", headers={
         "Content-Disposition": f"inline; filename=simulation_{sim_id}.pdf"
     })
+    return set_validators(response, etag, last_modified)
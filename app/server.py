@@ -0,0 +1,34 @@
+from app import app
+from app.catalog import catalog
+from app.db import initialize_database, open_connection
+from app.routes import configure_services
+from app.warmup import warm_up
+
+
+def create_app(config=None):
+    """Return the configured WSGI app, with everything workers can share prepared.
+
+    `config` overrides settings after the defaults and RADIOACTIVE_* environment variables.
+    Pre-fork servers should call this once in the master process: the database is
+    brought up to date, the element catalog is loaded and, with WARM_UP, the rendering
+    libraries are imported, so forked workers inherit all of it. No connection or
+    worker pool is left open, since those must not be shared across a fork.
+    """
+    if config:
+        app.config.update(config)
+    configure_services()
+
+    # Create missing tables and apply migrations once, not in every worker
+    path = app.config["DATABASE"]
+    initialize_database(path)
+
+    # Load the element catalog with a connection that is closed before forking
+    conn = open_connection(path, app.config["SQLITE_PRAGMAS"])
+    try:
+        catalog.load(conn, path)
+    finally:
+        conn.close()
+
+    if app.config["WARM_UP"]:
+        warm_up()
+    return app
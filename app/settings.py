@@ -0,0 +1,26 @@
+import os
+import secrets
+
+
+def load_secret_key(path):
+    """Return the session signing key stored at `path`, creating it on first use.
+
+    Every worker process and every restart reads the same file, so sessions signed by
+    one process stay valid in the others. The key is written to a private temporary
+    file and hard-linked into place, so concurrent workers never read a partial key.
+    """
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}"
+        fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+            # Only the first process to link wins; the others use its key
+            os.link(temporary, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(temporary)
+    with open(path) as f:
+        return f.read().strip()
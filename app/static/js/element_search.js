@@ -0,0 +1,67 @@
+// Type-ahead for element dropdowns. The page only lists a few elements; typing into the
+// search box queries /elements/search and adds the chosen element to the <select>.
+document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll("select[data-element-search]").forEach(function (select, index) {
+        const url = select.dataset.elementSearch;
+
+        // Search box with its own suggestion list, placed above the dropdown
+        const input = document.createElement("input");
+        const list = document.createElement("datalist");
+        list.id = `element-search-${index}`;
+        input.type = "search";
+        input.className = "form-control mb-1";
+        input.placeholder = "Search isotopes or decay modes (e.g. Carbon, B-)";
+        input.autocomplete = "off";
+        input.setAttribute("list", list.id);
+        select.before(input, list);
+
+        // Latest results by name, so a picked suggestion can be mapped back to its id
+        let results = new Map();
+        let timer = null;
+        let pending = null;
+
+        async function search(text) {
+            // Drop the previous request if it's still running
+            if (pending) pending.abort();
+            pending = new AbortController();
+            try {
+                const response = await fetch(`${url}?q=${encodeURIComponent(text)}`, {signal: pending.signal});
+                if (!response.ok) throw new Error("Network error");
+                const data = await response.json();
+                results = new Map(data.results.map((element) => [element.name, element]));
+                list.replaceChildren(...data.results.map(function (element) {
+                    const option = document.createElement("option");
+                    option.value = element.name;
+                    option.label = element.decay_modes ? `${element.name} (${element.decay_modes})` : element.name;
+                    return option;
+                }));
+            } catch (err) {
+                if (err.name !== "AbortError") console.error("Element search failed:", err);
+            }
+        }
+
+        function choose(element) {
+            // Add the element to the dropdown if it isn't listed yet, then select it
+            let option = select.querySelector(`option[value="${element.id}"]`);
+            if (!option) {
+                option = new Option(element.name, element.id);
+                select.add(option);
+            }
+            option.selected = true;
+            select.dispatchEvent(new Event("change"));
+            input.value = "";
+        }
+
+        input.addEventListener("input", function () {
+            const element = results.get(input.value);
+            if (element) {
+                choose(element);
+                return;
+            }
+            // Wait for a pause in typing before searching
+            clearTimeout(timer);
+            const text = input.value.trim();
+            if (text) timer = setTimeout(() => search(text), 150);
+        });
+    });
+});
@@ -0,0 +1,91 @@
+import math
+
+# Simulation columns with a distribution on the dashboard, and their labels
+STATS_METRICS = {"n0": "Initial quantity (N₀)", "t": "Elapsed time (t)", "nt": "Remaining quantity (N(t))"}
+
+# Bucket of values below the smallest decade in stats_buckets (including 0)
+UNDERFLOW_BUCKET = -31
+
+
+def _bucket(value):
+    # SQL for the decade bucket of `value` (see migration 006)
+    return (f"COALESCE((SELECT bucket FROM stats_buckets WHERE lower <= {value} "
+            f"ORDER BY lower DESC LIMIT 1), {UNDERFLOW_BUCKET})")
+
+
+def rebuild_stats(conn):
+    """Recompute every summary table from simulations in one transaction.
+
+    The triggers keep the tables current; this is for backfills and to correct the
+    rounding that builds up in the running totals.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM stats_users")
+        conn.execute("DELETE FROM stats_elements")
+        conn.execute("DELETE FROM stats_values")
+        conn.execute("""
+            INSERT INTO stats_users (user_id, simulations)
+            SELECT user_id, COUNT(*) FROM simulations WHERE user_id IS NOT NULL GROUP BY user_id
+        """)
+        conn.execute("""
+            INSERT INTO stats_elements (element_id, simulations)
+            SELECT element_id, COUNT(*) FROM simulations WHERE element_id IS NOT NULL GROUP BY element_id
+        """)
+        for metric in STATS_METRICS:
+            conn.execute(f"""
+                INSERT INTO stats_values (metric, bucket, simulations, total)
+                SELECT ?, bucket, COUNT(*), SUM(value) FROM (
+                    SELECT {_bucket(f"s.{metric}")} AS bucket, s.{metric} AS value
+                    FROM simulations s WHERE s.{metric} IS NOT NULL
+                ) GROUP BY bucket
+            """, (metric,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def bucket_label(bucket):
+    # "1e3 – 1e4", or "< 1e-30" for the underflow bucket
+    if bucket == UNDERFLOW_BUCKET:
+        return f"< 1e{UNDERFLOW_BUCKET + 1}"
+    return f"1e{bucket} – 1e{bucket + 1}"
+
+
+def read_dashboard(conn, user_id, top):
+    """Everything the dashboard shows, from index lookups on the summary tables.
+
+    The cost depends on `top` and the number of decade buckets, not on the number of
+    simulations, users or elements.
+    """
+    # The distributions also give the total count and the means
+    distributions = {metric: [] for metric in STATS_METRICS}
+    totals = {metric: [0, 0.0] for metric in STATS_METRICS}
+    for row in conn.execute("""
+        SELECT metric, bucket, simulations, total FROM stats_values WHERE simulations > 0 ORDER BY metric, bucket
+    """):
+        distributions[row["metric"]].append((bucket_label(row["bucket"]), row["simulations"]))
+        totals[row["metric"]][0] += row["simulations"]
+        totals[row["metric"]][1] += row["total"]
+    means = {metric: total / count if count else math.nan for metric, (count, total) in totals.items()}
+
+    own = conn.execute("SELECT simulations FROM stats_users WHERE user_id = ?", (user_id,)).fetchone()
+    # Busiest users by count only: other users' names are not shown
+    users = [row["simulations"] for row in conn.execute("""
+        SELECT simulations FROM stats_users WHERE simulations > 0 ORDER BY simulations DESC LIMIT ?
+    """, (top,))]
+    elements = conn.execute("""
+        SELECT e.name, s.simulations FROM stats_elements s JOIN elements e ON e.id = s.element_id
+        WHERE s.simulations > 0
+        ORDER BY s.simulations DESC
+        LIMIT ?
+    """, (top,)).fetchall()
+    return {
+        "total": totals["n0"][0],
+        "own": own["simulations"] if own else 0,
+        "users": users,
+        "elements": elements,
+        "distributions": distributions,
+        "means": means,
+    }
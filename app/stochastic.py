@@ -0,0 +1,76 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import multiprocessing
+import secrets
+import numpy as np
+from app.pools import LazyPool
+
+# Percentiles reported for the spread of the trajectories
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Largest atom count sampled exactly (atom counts are kept as 64-bit integers)
+MAX_ATOMS = 2 ** 53
+
+# Worker processes for sampling (0 samples on the calling thread), started on first use.
+# They are spawned: forking a threaded server worker could hand them locks other request
+# threads held at that moment
+_pool = LazyPool(lambda max_workers: ProcessPoolExecutor(max_workers=max_workers,
+                                                         mp_context=multiprocessing.get_context("spawn")))
+# Trajectories per shard
+_shard_size = 1000
+
+
+def configure_stochastic(max_workers, shard_size):
+    global _shard_size
+    _pool.resize(max_workers)
+    _shard_size = shard_size
+
+
+def new_seed():
+    # Seed shown to the user so a stochastic run can be repeated exactly
+    return secrets.randbits(32)
+
+
+def sample_trajectories(n0, lam, t_values, count, seed):
+    # Runs inside a worker process: `count` independent histories of `n0` atoms.
+    # Each atom survives a step of length Δt with probability e^(–λΔt), so the
+    # survivors of every step are binomial; decay is memoryless, so this is exact on any grid
+    rng = np.random.default_rng(seed)
+    survival = np.exp(-lam * np.diff(t_values, prepend=0.0))
+    paths = np.empty((count, len(t_values)), dtype=np.min_scalar_type(n0))
+    current = np.full(count, n0, dtype=np.int64)
+    for step, p in enumerate(survival):
+        current = rng.binomial(current, p)
+        paths[:, step] = current
+    return paths
+
+
+def stochastic_decay(n0, lam, t_values, trajectories, seed, sample_paths=5):
+    """Monte Carlo decay of `n0` atoms: mean, percentile bands and a few sample paths.
+
+    Trajectories are split into fixed-size shards, each with its own child of `seed`,
+    so the result only depends on the seed and not on how many workers ran it.
+    """
+    n0 = int(round(n0))
+    t_values = np.asarray(t_values, dtype=float)
+
+    # One independent random stream per shard
+    counts = [min(_shard_size, trajectories - start) for start in range(0, trajectories, _shard_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+
+    # Sample the shards in the pool, or inline when there is nothing to parallelize
+    pool = _pool.get() if len(counts) > 1 else None
+    if pool is None:
+        shards = [sample_trajectories(n0, lam, t_values, count, s) for count, s in zip(counts, seeds)]
+    else:
+        shards = list(pool.map(sample_trajectories, repeat(n0), repeat(lam), repeat(t_values), counts, seeds))
+    paths = np.concatenate(shards)
+
+    return {
+        "t": t_values,
+        "mean": paths.mean(axis=0),
+        "percentiles": dict(zip(PERCENTILES, np.percentile(paths, PERCENTILES, axis=0))),
+        "paths": paths[:sample_paths],
+        "trajectories": trajectories,
+        "seed": seed,
+    }
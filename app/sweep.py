@@ -0,0 +1,97 @@
+import csv
+import io
+import math
+import numpy as np
+from app.cache import LRUCache
+from app.metrics import CACHE_METRICS
+
+# Length of each catalog time unit in days, so isotopes with different units share one t axis
+TIME_UNITS = {
+    "seconds": 1 / 86400,
+    "minutes": 1 / 1440,
+    "hours": 1 / 24,
+    "days": 1.0,
+    "years": 365.25,
+}
+
+# Bytes per grid cell: the float64 result plus about as much again for the .npz download
+BYTES_PER_CELL = 16
+
+# Evaluated sweeps keyed by their parameters; each holds a whole grid, so keep few
+sweep_cache = LRUCache(maxsize=4)
+CACHE_METRICS.register("sweep", sweep_cache)
+
+
+def convert_half_life(half_life, unit, target_unit):
+    # Express a half-life in another time unit (None if either unit is unknown)
+    if unit not in TIME_UNITS or target_unit not in TIME_UNITS:
+        return None
+    return half_life * TIME_UNITS[unit] / TIME_UNITS[target_unit]
+
+
+def grid_bytes(elements, n0_steps, t_steps):
+    # Memory a sweep of this shape needs, checked before anything is allocated
+    return elements * n0_steps * t_steps * BYTES_PER_CELL
+
+
+def sweep_grid(half_lives, n0_values, t_values):
+    """N(t) for every (element, N₀, t) combination, shape (elements, n0, t).
+
+    N₀ · e^(–λt) factors into N₀ times a decay term that only depends on (λ, t), so the
+    exponentials are taken once per element and time and broadcast over every N₀.
+    """
+    lam = np.log(2) / np.asarray(half_lives, dtype=float)
+    decay = np.exp(-lam[:, None] * np.asarray(t_values, dtype=float)[None, :])
+    return np.asarray(n0_values, dtype=float)[None, :, None] * decay[:, None, :]
+
+
+def compute_sweep(names, half_lives, n0_range, t_range):
+    # Evaluate a sweep over evenly spaced N₀ and t values; ranges are (start, stop, steps)
+    n0_values = np.linspace(*n0_range)
+    t_values = np.linspace(*t_range)
+    return {
+        "names": list(names),
+        "half_lives": np.asarray(half_lives, dtype=float),
+        "n0": n0_values,
+        "t": t_values,
+        "nt": sweep_grid(half_lives, n0_values, t_values),
+    }
+
+
+def sweep_key(names, half_lives, n0_range, t_range, unit):
+    # Everything a sweep's values depend on (half-lives too, in case the catalog changes)
+    return (tuple(names), tuple(half_lives), tuple(n0_range), tuple(t_range), unit)
+
+
+def get_sweep(names, half_lives, n0_range, t_range, unit):
+    # Identical sweeps share one evaluated grid
+    key = sweep_key(names, half_lives, n0_range, t_range, unit)
+    return sweep_cache.get_or_create(key, lambda: compute_sweep(names, half_lives, n0_range, t_range))
+
+
+def plot_stride(n0_steps, t_steps, max_cells):
+    # Keep every k-th row and column so the plotted grid has at most `max_cells` cells
+    return max(1, math.ceil(math.sqrt(n0_steps * t_steps / max_cells)))
+
+
+def sweep_npz(sweep):
+    # All arrays of a sweep as a compressed NumPy archive
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, names=np.array(sweep["names"]), half_lives=sweep["half_lives"],
+                        n0=sweep["n0"], t=sweep["t"], nt=sweep["nt"])
+    return buffer.getvalue()
+
+
+def sweep_csv_chunks(sweep, unit):
+    # One "element,n0,t,nt" row per grid cell, yielded one (element, N₀) row of the grid at a time
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["element", "n0", f"t_{unit}", "nt"])
+    yield buffer.getvalue()
+    t_values = sweep["t"].tolist()
+    for name, grid in zip(sweep["names"], sweep["nt"]):
+        for n0, row in zip(sweep["n0"].tolist(), grid):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(zip([name] * len(t_values), [n0] * len(t_values), t_values, row.tolist()))
+            yield buffer.getvalue()
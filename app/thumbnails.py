@@ -0,0 +1,194 @@
+import hashlib
+import io
+import logging
+import math
+import os
+import queue
+import threading
+import numpy as np
+from app.metrics import RENDER_LATENCY
+from app.plot import decay_time_grid, load_plot_backends, plot_range
+
+logger = logging.getLogger(__name__)
+
+# Directory of the PNG files, their size in pixels and thumbnails drawn per batch
+_directory = None
+_size = (120, 36)
+_batch_size = 32
+
+_queue = queue.Queue()
+# Names queued or being drawn, so a page shown twice doesn't queue a thumbnail twice
+_pending = set()
+_worker = None
+_lock = threading.Lock()
+
+
+def configure_thumbnails(directory, size, batch_size):
+    global _directory, _size, _batch_size
+    with _lock:
+        _directory, _size, _batch_size = directory, tuple(size), batch_size
+
+
+def thumbnail_shape(half_life, t):
+    """The one number a thumbnail depends on: λ times the plotted time range.
+
+    Thumbnails have no axes and are scaled to N₀, so a simulation's (n0, half_life, t)
+    only matter through t / half_life; simulations with the same ratio share one image.
+    """
+    lam = math.log(2) / half_life
+    return float(f"{lam * plot_range(lam, t * 1.5):.6g}")
+
+
+def thumbnail_name(shape):
+    # Content address of the image: its shape and pixel size
+    width, height = _size
+    return hashlib.sha1(f"{shape!r}-{width}x{height}".encode()).hexdigest()[:20] + ".png"
+
+
+def thumbnail_names(rows):
+    """Map simulation ids to their thumbnail file, or None while it hasn't been drawn.
+
+    Missing thumbnails are queued for the background worker; nothing is rendered here.
+    """
+    names, missing = {}, {}
+    for row in rows:
+        names[row["id"]] = None
+        # Rows saved without a half-life have no curve
+        if not row["half_life"] or row["half_life"] <= 0 or row["t"] is None:
+            continue
+        shape = thumbnail_shape(row["half_life"], row["t"])
+        name = thumbnail_name(shape)
+        if os.path.exists(os.path.join(_directory, name)):
+            names[row["id"]] = name
+        else:
+            missing[name] = shape
+    if missing:
+        queue_thumbnails(missing)
+    return names
+
+
+def prepare_thumbnail(half_life, t):
+    # Queue the thumbnail of a simulation that was just saved, so history finds it drawn
+    thumbnail_names([{"id": None, "half_life": half_life, "t": t}])
+
+
+def queue_thumbnails(shapes):
+    # Hand {name: shape} to the worker, skipping the ones already queued
+    with _lock:
+        new = [(name, shape) for name, shape in shapes.items() if name not in _pending]
+        _pending.update(name for name, _ in new)
+    for item in new:
+        _queue.put(item)
+    if new:
+        _ensure_worker()
+
+
+class ThumbnailCanvas:
+    """One Matplotlib figure and Agg canvas reused for every thumbnail it draws.
+
+    Only the line's data changes between thumbnails, so a batch costs one figure set-up
+    and a cheap redraw per image.
+    """
+
+    def __init__(self, size):
+        load_plot_backends()
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        self.size = size
+        width, height = size
+        self.figure = Figure(figsize=(width / 100, height / 100), dpi=100)
+        self.canvas = FigureCanvasAgg(self.figure)
+        # Axes over the whole image, without ticks or frame
+        self.axes = self.figure.add_axes((0, 0, 1, 1))
+        self.axes.set_axis_off()
+        self.axes.set_xlim(0, 1)
+        self.axes.set_ylim(-0.05, 1.05)
+        (self.line,) = self.axes.plot([0, 1], [1, 0], color="green", linewidth=1.5)
+
+    @RENDER_LATENCY.time("thumbnail")
+    def render(self, shape):
+        # N / N₀ against the fraction of the plotted range: e^(–shape · x) for x in [0, 1]
+        x = decay_time_grid(shape, 1.0)
+        self.line.set_data(x, np.exp(-shape * x))
+        buffer = io.BytesIO()
+        self.canvas.print_png(buffer)
+        return buffer.getvalue()
+
+
+def write_thumbnails(canvas, items, directory):
+    # Draw each (name, shape) and write it under its name; files are renamed into place,
+    # so the server (or another process drawing the same image) never sees a partial PNG
+    os.makedirs(directory, exist_ok=True)
+    for name, shape in items:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            continue
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}"
+        with open(temporary, "wb") as f:
+            f.write(canvas.render(shape))
+        os.replace(temporary, path)
+
+
+class _ThumbnailWorker(threading.Thread):
+    """Draws queued thumbnails in batches of up to `_batch_size` on one reused canvas."""
+
+    def __init__(self):
+        super().__init__(name="thumbnail-worker", daemon=True)
+        self.pid = os.getpid()
+
+    def run(self):
+        canvas = None
+        while True:
+            # Wait for work, then take whatever else is already queued
+            batch = [_queue.get()]
+            while len(batch) < _batch_size:
+                try:
+                    batch.append(_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if canvas is None or canvas.size != _size:
+                    canvas = ThumbnailCanvas(_size)
+                write_thumbnails(canvas, batch, _directory)
+            except Exception:
+                logger.exception("Thumbnail batch failed")
+            finally:
+                with _lock:
+                    _pending.difference_update(name for name, _ in batch)
+
+
+def _ensure_worker():
+    # (Re)start the drawing thread when a thumbnail is queued in a process that has none
+    # running; a forked worker doesn't inherit the thread, and the master never queues any
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive() or _worker.pid != os.getpid():
+            _worker = _ThumbnailWorker()
+            _worker.start()
+
+
+def build_thumbnails(conn, directory, size, batch_size=256):
+    """Draw every missing thumbnail for the simulations in `conn`; return how many were drawn.
+
+    Used to backfill the directory (see build_thumbnails.py); reads the simulations in
+    batches, so memory doesn't grow with the table.
+    """
+    configure_thumbnails(directory, size, batch_size)
+    canvas = ThumbnailCanvas(_size)
+    cursor = conn.execute("""
+        SELECT DISTINCT half_life, t FROM simulations WHERE half_life > 0 AND t IS NOT NULL
+    """)
+    drawn = 0
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return drawn
+        items = {}
+        for half_life, t in rows:
+            shape = thumbnail_shape(half_life, t)
+            name = thumbnail_name(shape)
+            if not os.path.exists(os.path.join(directory, name)):
+                items[name] = shape
+        write_thumbnails(canvas, items.items(), directory)
+        drawn += len(items)
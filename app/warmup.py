@@ -0,0 +1,20 @@
+import logging
+from app.plot import load_plot_backends, plotlyjs_bundle
+from app.pdf import load_pdf_backend
+
+
+def warm_up():
+    """Load the rendering libraries ahead of the first request.
+
+    Plotly, Matplotlib and WeasyPrint are imported lazily so that starting the app
+    (and every script that imports it) stays fast. Pre-fork servers should call this
+    in the master process before forking, so every worker shares the loaded modules
+    instead of paying for them on its first plot or PDF.
+    """
+    load_plot_backends()
+    plotlyjs_bundle()
+    try:
+        load_pdf_backend()
+    except OSError as e:
+        # WeasyPrint's system libraries are missing; PDF export will fail the same way later
+        logging.warning("Could not load WeasyPrint: %s", e)
@@ -0,0 +1,50 @@
+"""Simulations per second: one form POST each versus /api/simulations/batch.
+
+Run from the project root:  python -m benchmarks.batch_api [--count 2000]
+"""
+import argparse
+import random
+import time
+
+from app import app
+from benchmarks.common import ELEMENTS, logged_in_client, seed_database
+
+
+def random_simulations(count, seed=0):
+    # (element_id, n0, t) tuples with distinct values so no plot cache hits
+    rng = random.Random(seed)
+    return [(rng.randrange(len(ELEMENTS)) + 1, round(rng.uniform(1, 1000), 6), round(rng.uniform(0, 50), 6))
+            for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--form-count", type=int, default=200,
+                        help="simulations sent through the form path (it is much slower)")
+    args = parser.parse_args()
+
+    app.config["DATABASE"] = seed_database(0)
+    client = logged_in_client(app)
+
+    # One form submission per simulation, as the index page does
+    simulations = random_simulations(args.form_count, seed=1)
+    start = time.perf_counter()
+    for element_id, n0, t in simulations:
+        client.post("/", data={"element": element_id, "n0": n0, "t": t})
+    form_rate = len(simulations) / (time.perf_counter() - start)
+
+    # The whole batch in one request
+    simulations = random_simulations(args.count, seed=2)
+    start = time.perf_counter()
+    response = client.post("/api/simulations/batch", json={"simulations": simulations})
+    batch_rate = len(simulations) / (time.perf_counter() - start)
+    assert response.status_code == 200, response.get_json()
+
+    print(f"form POST per simulation: {form_rate:10.1f} simulations/s ({args.form_count} simulations)")
+    print(f"batch API:                {batch_rate:10.1f} simulations/s ({args.count} simulations)")
+    print(f"speed-up: {batch_rate / form_rate:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare bulk reports with exporting simulations one by one.
+
+Run from the project root:  python -m benchmarks.bulk_report [--sizes 10 50 200]
+Uses a throwaway seeded database. For each history size it times:
+  * per-row   one /simulation/<id>/export request per simulation
+  * zip       one streamed /history/report?format=zip request
+  * combined  one /history/report?format=pdf request (sizes up to the PDF cap)
+and reports the peak Python memory of the ZIP stream (caches off), which should stay flat as N grows.
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+from app import app
+from app.pdf import pdf_cache
+from app.plot import plot_image_cache
+from benchmarks.common import logged_in_client, seed_database
+
+
+def clear_caches():
+    # Every run renders from scratch
+    pdf_cache.clear()
+    plot_image_cache.clear()
+
+
+def time_per_row(client, count):
+    clear_caches()
+    start = time.perf_counter()
+    for sim_id in range(1, count + 1):
+        response = client.get(f"/simulation/{sim_id}/export")
+        assert response.status_code == 200, response.status_code
+    return time.perf_counter() - start
+
+
+def time_zip(client, count):
+    # Save the stream to disk chunk by chunk, like a browser, so the peak is what the server holds.
+    # The plot and PDF caches are switched off too: they are bounded, but would fill up with N
+    clear_caches()
+    sizes = pdf_cache.maxsize, plot_image_cache.maxsize
+    pdf_cache.resize(0)
+    plot_image_cache.resize(0)
+    with tempfile.TemporaryFile() as archive:
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = client.get("/history/report?format=zip", buffered=False)
+        for chunk in response.response:
+            archive.write(chunk)
+        response.close()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        names = zipfile.ZipFile(archive).namelist()
+    pdf_cache.resize(sizes[0])
+    plot_image_cache.resize(sizes[1])
+    assert len(names) == count, (len(names), count)
+    return elapsed, peak
+
+
+def time_combined(client):
+    clear_caches()
+    start = time.perf_counter()
+    response = client.get("/history/report?format=pdf")
+    assert response.status_code == 200, response.status_code
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200])
+    args = parser.parse_args()
+
+    limit = app.config["REPORT_MAX_PDF_SIMULATIONS"]
+    print(f"{'N':>6} {'per-row s':>10} {'zip s':>8} {'combined s':>11} {'zip peak MiB':>13}")
+    for count in args.sizes:
+        app.config["DATABASE"] = seed_database(count)
+        client = logged_in_client(app)
+
+        per_row = time_per_row(client, count)
+        zipped, peak = time_zip(client, count)
+        combined = f"{time_combined(client):11.2f}" if count <= limit else f"{'(over cap)':>11}"
+        print(f"{count:>6} {per_row:10.2f} {zipped:8.2f} {combined} {peak / 2 ** 20:13.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Helpers shared by the benchmark scripts: throwaway databases and logged-in clients."""
+import math
+import os
+import random
+import sqlite3
+import tempfile
+
+from werkzeug.security import generate_password_hash
+
+from app.db import migrate_database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA = os.path.join(ROOT, "schema.sql")
+
+USERNAME = "bench"
+PASSWORD = "benchpass"
+
+ELEMENTS = [
+    ("Carbon-14", 5730.0, "years"),
+    ("Cesium-137", 30.17, "years"),
+    ("Strontium-90", 28.8, "years"),
+    ("Iodine-131", 8.02, "days"),
+    ("Radon-222", 3.82, "days"),
+]
+
+
+def seed_database(simulations=100, path=None, seed=0, users=1, migrate=True):
+    # Build a fresh database with the catalog, `users` users and `simulations` rows
+    # spread across them; user 1 (USERNAME) is the one the benchmarks log in as
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "radioactive.db")
+    conn = sqlite3.connect(path)
+    with open(SCHEMA) as f:
+        conn.executescript(f.read())
+    conn.executemany("INSERT INTO elements (name, half_life, unit) VALUES (?, ?, ?)", ELEMENTS)
+    password = generate_password_hash(PASSWORD)
+    conn.executemany("INSERT INTO users (name, email, password) VALUES (?, ?, ?)",
+                     [(name, f"{name}@example.com", password)
+                      for name in [USERNAME] + [f"{USERNAME}{i}" for i in range(2, users + 1)]])
+
+    rng = random.Random(seed)
+    # Spread the timestamps evenly over a 360-day year (30-day months)
+    spacing = max(1, 360 * 86400 // max(simulations, 1))
+    rows = []
+    for i in range(simulations):
+        second = i * spacing
+        user_id = i % users + 1
+        element_id = rng.randrange(len(ELEMENTS)) + 1
+        name, half_life, unit = ELEMENTS[element_id - 1]
+        n0 = round(rng.uniform(1, 1000), 3)
+        t = round(rng.uniform(0, 3 * half_life), 3)
+        nt = n0 * math.exp(-math.log(2) / half_life * t)
+        timestamp = f"2024-{second // 2592000 % 12 + 1:02d}-{second // 86400 % 30 + 1:02d} " \
+                    f"{second // 3600 % 24:02d}:{second // 60 % 60:02d}:{second % 60:02d}"
+        rows.append((user_id, element_id, name, n0, t, nt, half_life, unit, "grams", timestamp))
+    conn.executemany("""
+        INSERT INTO simulations (user_id, element_id, name, n0, t, nt, half_life, unit, quantity_unit, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+    if migrate:
+        migrate_database(path)
+    return path
+
+
+def logged_in_client(app):
+    # Return a test client with an authenticated session (forms posted without CSRF tokens)
+    app.config["WTF_CSRF_ENABLED"] = False
+    client = app.test_client()
+    client.post("/login", data={"username": USERNAME, "password": PASSWORD})
+    return client
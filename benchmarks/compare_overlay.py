@@ -0,0 +1,96 @@
+"""Time the comparison chart and check that its payload stays flat as curves are added.
+
+Run from the project root:  python -m benchmarks.compare_overlay [--counts 1 5 10 25 50]
+For every number of overlaid simulations, prints the time to evaluate the shared grid
+and downsample it with LTTB, the size of the figure JSON, the same for one full
+1000-point trace per curve (what opening every detail page amounts to), the largest gap
+between the drawn curves and the exact ones as a fraction of the y axis, and the
+latency of /history/compare through the test client.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app import app
+from app.plot import (comparison_time_grid, figure_payload, load_plot_backends, lttb_indices,
+                      render_comparison_plot)
+from app.routes import configure_services
+from app.simulation import decay_curves
+from benchmarks.common import logged_in_client, seed_database
+
+
+def simulations(count, seed=0):
+    # Half-lives from hours to millennia (in years) and N₀ over three decades
+    rng = np.random.default_rng(seed)
+    return 10 ** rng.uniform(-3, 3, count), 10 ** rng.uniform(0, 3, count)
+
+
+def drawn_error(n0, half_lives, t_values, curves, indices, t_max):
+    # Largest distance between the straight segments through the kept points and the exact
+    # curves, as a fraction of the y axis (the largest N₀), on a grid dense at both ends
+    fine = np.unique(np.concatenate([np.linspace(0, t_max, 20000), np.geomspace(t_max * 1e-9, t_max, 20000)]))
+    exact = decay_curves(n0, half_lives, fine)
+    drawn = np.array([np.interp(fine, t_values[kept], curve[kept]) for curve, kept in zip(curves, indices)])
+    return np.abs(exact - drawn).max() / n0.max()
+
+
+def full_payload(labels, n0, half_lives, t_max):
+    # 1000 evenly spaced points per curve, without downsampling
+    import plotly.graph_objs as go
+    t_values = np.linspace(0, t_max, 1000)
+    fig = go.Figure([go.Scatter(x=t_values, y=curve, mode='lines', name=label)
+                     for label, curve in zip(labels, decay_curves(n0, half_lives, t_values))])
+    return figure_payload(fig, "json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app.config.update(DATABASE=seed_database(max(args.counts)), METRICS_ENABLED=False, PLOT_CACHE_SIZE=0)
+    configure_services()
+    budget, tolerance = app.config["COMPARE_POINT_BUDGET"], app.config["PLOT_TOLERANCE"]
+    client = logged_in_client(app)
+    # Load Plotly outside the measurements
+    load_plot_backends()
+
+    print(f"{'curves':>6} {'grid+lttb ms':>13} {'render ms':>10} {'JSON KiB':>9} {'full KiB':>9} "
+          f"{'max error':>10} {'route ms':>9}")
+    for count in args.counts:
+        half_lives, n0 = simulations(count)
+        t_max = 1.5 * half_lives.max()
+        labels = [f"#{i}" for i in range(count)]
+
+        # Evaluation and downsampling alone
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            t_values = comparison_time_grid(n0, half_lives, t_max, tolerance)
+            curves = decay_curves(n0, half_lives, t_values)
+            indices = lttb_indices(t_values, curves, max(3, budget // count))
+        compute = (time.perf_counter() - start) / args.repeat * 1000
+        error = drawn_error(n0, half_lives, t_values, curves, indices, t_max)
+
+        # The whole figure against 1000 points per curve without downsampling
+        start = time.perf_counter()
+        figure = render_comparison_plot(labels, n0, half_lives, t_max, "years", budget, tolerance)
+        render = (time.perf_counter() - start) * 1000
+        full = full_payload(labels, n0, half_lives, t_max)
+
+        # The route, comparing the first `count` seeded simulations
+        query = "&".join(f"id={i}" for i in range(1, count + 1))
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            assert client.get(f"/history/compare?{query}").status_code == 200
+        route = (time.perf_counter() - start) / args.repeat * 1000
+
+        print(f"{count:>6} {compute:13.2f} {render:10.1f} {len(figure) / 1024:9.1f} {len(full) / 1024:9.1f} "
+              f"{error:10.2e} {route:9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
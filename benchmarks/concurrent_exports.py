@@ -0,0 +1,66 @@
+"""Fire parallel PDF exports and check that every request gets its own curve.
+
+Run from the project root:  python -m benchmarks.concurrent_exports [--workers 8]
+Uses a throwaway seeded database. tests/test_concurrent_exports.py runs the same check with
+WeasyPrint stubbed out.
+"""
+import argparse
+import base64
+import math
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from app import app
+import app.reports as reports
+from app.plot import plot_image_cache, render_decay_plot_image
+from benchmarks.common import logged_in_client, seed_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--exports", type=int, default=32)
+    args = parser.parse_args()
+
+    app.config["DATABASE"] = seed_database(args.exports)
+    # Disable the image cache so every export really renders its own PNG
+    plot_image_cache.resize(0)
+
+    def export(sim_id):
+        client = logged_in_client(app)
+        response = client.get(f"/simulation/{sim_id}/export")
+        return sim_id, response.status_code, response.mimetype, response.get_data()
+
+    failures = []
+    # Record the arguments of every report rendered while the exports run
+    with mock.patch.object(reports, "render_template", wraps=reports.render_template) as render:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(export, range(1, args.exports + 1)))
+
+        # Each export must have embedded exactly the PNG of its own simulation
+        embedded = {}
+        for call in render.call_args_list:
+            if call.args and call.args[0] == "pdf_exp.html":
+                row = call.kwargs["row"]
+                png = base64.b64decode(call.kwargs["plot_src"].split(",", 1)[1])
+                embedded[row["id"]] = (row, png)
+
+    for sim_id, status, mimetype, body in results:
+        if status != 200 or mimetype != "application/pdf":
+            failures.append(f"simulation {sim_id}: HTTP {status} {mimetype}")
+            continue
+        row, png = embedded[sim_id]
+        lam = math.log(2) / row["half_life"]
+        expected = render_decay_plot_image(row["n0"], lam, t_max=row["t"] * 1.5)
+        if png != expected:
+            failures.append(f"simulation {sim_id}: embedded plot does not match its own curve")
+
+    print(f"{len(results)} parallel exports with {args.workers} workers, {len(failures)} failures")
+    for failure in failures:
+        print("  " + failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Concurrent request throughput on /history and / with pooled vs per-call connections.
+
+Run from the project root:  python -m benchmarks.db_throughput [--threads 8] [--rows 50]
+"""
+import argparse
+import sqlite3
+import threading
+import time
+from unittest import mock
+
+from app import app
+import app.routes as routes
+from benchmarks.common import logged_in_client, seed_database
+
+PATHS = ["/history", "/"]
+
+
+def legacy_connection():
+    # The old behaviour: a fresh connection with default pragmas on every call
+    conn = sqlite3.connect(app.config["DATABASE"])
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def run_load(threads, duration):
+    # Hammer the routes from several threads and return requests per second
+    counts = [0] * threads
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        client = logged_in_client(app)
+        while time.perf_counter() < deadline:
+            for path in PATHS:
+                client.get(path)
+                counts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    app.config["DATABASE"] = seed_database(args.rows)
+
+    with mock.patch.object(routes, "get_db_connection", legacy_connection):
+        before = run_load(args.threads, args.duration)
+    after = run_load(args.threads, args.duration)
+
+    print(f"{args.threads} threads, {args.rows} simulations, paths {', '.join(PATHS)}")
+    print(f"per-call connections: {before:8.1f} req/s")
+    print(f"pooled WAL:           {after:8.1f} req/s  ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
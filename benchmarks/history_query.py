@@ -0,0 +1,88 @@
+"""History query latency on a seeded database, before and after the composite indexes.
+
+Run from the project root:  python -m benchmarks.history_query [--rows 1000000] [--users 10]
+"""
+import argparse
+import sqlite3
+import time
+from datetime import date
+
+from app.db import migrate_database
+from app.routes import history_conditions
+from benchmarks.common import seed_database
+
+PAGE_SIZE = 50
+
+
+def page_query(conn, filters, cursor=None):
+    # The same SQL the /history route runs for one page
+    where, params = history_conditions(1, filters)
+    if cursor:
+        where += " AND (timestamp, id) < (?, ?)"
+        params += list(cursor)
+    return conn.execute(f"""
+        SELECT * FROM simulations WHERE {where}
+        ORDER BY timestamp DESC, id DESC LIMIT ?
+    """, params + [PAGE_SIZE + 1]).fetchall()
+
+
+def timed(fn, repeat):
+    # Best wall time of `repeat` runs, in milliseconds
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(conn, repeat, deep_cursor):
+    filters = {"element": 2, "date_from": date(2024, 1, 5), "date_to": date(2024, 1, 20),
+               "n0_min": 100.0, "n0_max": 500.0}
+    return {
+        "old full history": timed(lambda: conn.execute(
+            "SELECT * FROM simulations WHERE user_id = ? ORDER BY timestamp DESC", (1,)).fetchall(), repeat),
+        "first page": timed(lambda: page_query(conn, {}), repeat),
+        "deep page (keyset)": timed(lambda: page_query(conn, {}, deep_cursor), repeat),
+        "element + dates + n0": timed(lambda: page_query(conn, filters), repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path = seed_database(args.rows, users=args.users, migrate=False)
+    print(f"seeded {args.rows:,} simulations for {args.users} users in {time.perf_counter() - start:.1f}s")
+
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    # Cursor halfway through the heavy user's history
+    deep_cursor = conn.execute("""
+        SELECT timestamp, id FROM simulations WHERE user_id = 1
+        ORDER BY timestamp DESC, id DESC LIMIT 1 OFFSET ?
+    """, (args.rows // args.users // 2,)).fetchone()
+
+    before = run(conn, args.repeat, tuple(deep_cursor))
+    conn.close()
+
+    start = time.perf_counter()
+    migrate_database(path)
+    print(f"built indexes in {time.perf_counter() - start:.1f}s")
+
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    after = run(conn, args.repeat, tuple(deep_cursor))
+    conn.close()
+
+    print(f"{'query':<24}{'no index':>12}{'indexed':>12}")
+    for name in before:
+        print(f"{name:<24}{before[name]:>10.2f}ms{after[name]:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Check that the history page never draws thumbnails itself, and time the background worker.
+
+Run from the project root:  python -m benchmarks.history_thumbnails [--rows 500 --count 300]
+First compares drawing `count` thumbnails on one reused Agg canvas with a new Figure per
+image. Then shows a history page of `rows` simulations with an empty thumbnail directory
+(everything gets queued) and again once the worker has drained the queue, and reports
+how many thumbnails were drawn on the request thread (it must be 0) and how many rows
+share an image.
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from app import app
+from app import thumbnails
+from app.plot import decay_time_grid, load_plot_backends
+from app.routes import configure_services
+from benchmarks.common import logged_in_client, seed_database
+
+
+def new_figure_thumbnail(shape, size):
+    # The same drawing with a figure of its own, as render_decay_plot_image does
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    width, height = size
+    fig = Figure(figsize=(width / 100, height / 100), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    axes = fig.add_axes((0, 0, 1, 1))
+    axes.set_axis_off()
+    axes.set_xlim(0, 1)
+    axes.set_ylim(-0.05, 1.05)
+    x = decay_time_grid(shape, 1.0)
+    axes.plot(x, np.exp(-shape * x), color="green", linewidth=1.5)
+    buffer = io.BytesIO()
+    canvas.print_png(buffer)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500, help="simulations on the history page")
+    parser.add_argument("--count", type=int, default=300, help="thumbnails drawn per renderer")
+    args = parser.parse_args()
+
+    size = app.config["THUMBNAIL_SIZE"]
+    shapes = np.geomspace(0.01, 100, args.count)
+    load_plot_backends()
+
+    canvas = thumbnails.ThumbnailCanvas(size)
+    start = time.perf_counter()
+    for shape in shapes:
+        canvas.render(shape)
+    reused = time.perf_counter() - start
+    start = time.perf_counter()
+    for shape in shapes:
+        new_figure_thumbnail(shape, size)
+    separate = time.perf_counter() - start
+    print(f"reused canvas: {args.count / reused:8.0f} thumbnails/s")
+    print(f"new figure:    {args.count / separate:8.0f} thumbnails/s")
+
+    # Record the thread of every thumbnail drawn from here on
+    threads = []
+    render = thumbnails.ThumbnailCanvas.render
+
+    def recording_render(self, shape):
+        threads.append(threading.current_thread().name)
+        return render(self, shape)
+    thumbnails.ThumbnailCanvas.render = recording_render
+
+    directory = tempfile.mkdtemp()
+    app.config.update(DATABASE=seed_database(args.rows), HISTORY_PAGE_SIZE=args.rows, THUMBNAIL_DIR=directory,
+                      METRICS_ENABLED=False)
+    configure_services()
+    client = logged_in_client(app)
+
+    # Cold: nothing is drawn yet, so every thumbnail is queued
+    start = time.perf_counter()
+    assert client.get("/history").status_code == 200
+    cold = time.perf_counter() - start
+    on_request = threads.count(threading.current_thread().name)
+
+    # Wait for the worker to drain the queue
+    start = time.perf_counter()
+    while thumbnails._pending:
+        time.sleep(0.005)
+    drained = time.perf_counter() - start
+
+    start = time.perf_counter()
+    page = client.get("/history").data
+    warm = time.perf_counter() - start
+    images = len(os.listdir(directory))
+    print(f"history page, {args.rows} rows: {cold * 1000:.1f} ms cold, {warm * 1000:.1f} ms with every thumbnail drawn")
+    print(f"worker drew {len(threads)} thumbnails in {drained * 1000:.0f} ms after the cold page returned; "
+          f"{on_request} on the request thread")
+    print(f"{args.rows} rows share {images} images; {page.count(b'/thumbnails/')} linked on the warm page")
+    return 0 if on_request == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
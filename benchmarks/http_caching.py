@@ -0,0 +1,62 @@
+"""Measure what conditional requests save on the detail page and the PDF export.
+
+Run from the project root:  python -m benchmarks.http_caching [--requests 50]
+Uses a throwaway seeded database. Each URL is fetched once for its validators, then
+timed both as a full download (plot and PDF caches cleared) and as a revalidation
+with If-None-Match, which should be answered with a 304 before anything is rendered.
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from app import app
+from app.pdf import pdf_cache
+from app.plot import plot_cache, plot_image_cache
+from benchmarks.common import logged_in_client, seed_database
+
+
+def clear_caches():
+    plot_cache.clear()
+    plot_image_cache.clear()
+    pdf_cache.clear()
+
+
+def median_ms(client, url, count, headers=None, expected=200, cold=False):
+    times = []
+    for _ in range(count):
+        if cold:
+            clear_caches()
+        start = time.perf_counter()
+        response = client.get(url, headers=headers or {})
+        times.append(time.perf_counter() - start)
+        assert response.status_code == expected, (url, response.status_code)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    app.config["DATABASE"] = seed_database(10)
+    client = logged_in_client(app)
+
+    print(f"{'URL':<24} {'full ms':>8} {'304 ms':>8} {'full bytes':>11}")
+    for url in ("/simulation/1", "/simulation/1/export"):
+        first = client.get(url)
+        etag = first.headers["ETag"]
+        full = median_ms(client, url, args.requests, cold=True)
+        revalidated = median_ms(client, url, args.requests, {"If-None-Match": etag}, expected=304)
+        print(f"{url:<24} {full:8.2f} {revalidated:8.2f} {len(first.get_data()):11}")
+
+    # Fingerprinted assets carry a one-year immutable lifetime
+    page = client.get("/history").get_data(as_text=True)
+    start = page.index("/static/css/theme_radioactive.css")
+    url = page[start:page.index('"', start)]
+    print(f"{url}: {client.get(url).headers['Cache-Control']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
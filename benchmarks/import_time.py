@@ -0,0 +1,69 @@
+"""Startup cost of `import app`, measured with `python -X importtime`.
+
+Run from the project root:  python -m benchmarks.import_time [--runs 5] [--budget-ms 600]
+Fails if a lazily loaded rendering library is imported at startup, or if the
+median import time exceeds --budget-ms.
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import ROOT
+
+# Modules that must only be imported on first use (or by app.warmup.warm_up)
+LAZY_MODULES = ("weasyprint", "matplotlib", "plotly.graph_objs", "plotly.io", "plotly.offline", "IPython")
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile():
+    # Return {module: (cumulative µs, nesting depth)} for one fresh interpreter
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+    profile = {}
+    for match in LINE.finditer(result.stderr):
+        _, cumulative, indent, module = match.groups()
+        profile[module] = (int(cumulative), len(indent) // 2)
+    return profile
+
+
+def warm_up_seconds():
+    # What warm_up() (and so the first plot/PDF without it) costs in a fresh process
+    code = "import time, app.warmup as w; s = time.perf_counter(); w.warm_up(); print(time.perf_counter() - s)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.runs)]
+    totals = [profile["app"][0] / 1000 for profile in profiles]
+    median = statistics.median(totals)
+    print(f"import app: median {median:.0f} ms over {args.runs} runs (min {min(totals):.0f}, max {max(totals):.0f})")
+
+    # Heaviest packages imported directly by the app or by its modules
+    last = profiles[-1]
+    top = sorted(((cumulative, module) for module, (cumulative, depth) in last.items() if depth <= 2),
+                 reverse=True)[:10]
+    for cumulative, module in top:
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+    print(f"warm_up(): {warm_up_seconds() * 1000:.0f} ms (paid once per server instead of on the first render)")
+
+    eager = [module for module in last if module.startswith(LAZY_MODULES)]
+    if eager:
+        sys.exit(f"lazily loaded modules imported at startup: {', '.join(sorted(eager)[:10])}")
+    if args.budget_ms is not None and median > args.budget_ms:
+        sys.exit(f"import time {median:.0f} ms exceeds the budget of {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
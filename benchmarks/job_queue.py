@@ -0,0 +1,84 @@
+"""Queue heavy downloads as background jobs and check the per-user limits.
+
+Run from the project root:  python -m benchmarks.job_queue [--users 3 --jobs 4 --workers 2]
+Uses a throwaway seeded database. Every user submits `jobs` sweep downloads with
+?async=1; the script reports how long a submission takes compared with running the
+same request synchronously, the time to drain the queue, and the most jobs any user
+had running at once (read from the jobs table in one query, so it is a true snapshot).
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+
+from app import app
+from app.routes import configure_services
+from benchmarks.common import PASSWORD, USERNAME, seed_database
+
+SWEEP = ("/sweep/download?elements=1&elements=2&n0_min=1&n0_max=1000&n0_steps={steps}"
+         "&t_max=100&t_steps=500&unit=years&format=npz")
+
+
+def client_for(user):
+    client = app.test_client()
+    name = USERNAME if user == 1 else f"{USERNAME}{user}"
+    response = client.post("/login", data={"username": name, "password": PASSWORD})
+    assert response.status_code == 302, response.status_code
+    return client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    app.config.update(DATABASE=seed_database(10, users=args.users), WTF_CSRF_ENABLED=False,
+                      JOB_WORKERS=args.workers, JOB_POLL_INTERVAL=0.05, JOB_RESULT_DIR=tempfile.mkdtemp())
+    configure_services()
+    clients = [client_for(user) for user in range(1, args.users + 1)]
+
+    # Synchronous baseline: the request ties up the server thread for the whole computation
+    start = time.perf_counter()
+    assert clients[0].get(SWEEP.format(steps=400)).status_code == 200
+    synchronous = time.perf_counter() - start
+
+    # Submit everything; each submission only inserts a row
+    submit_times, status_urls = [], []
+    start = time.perf_counter()
+    for i in range(args.jobs):
+        for client in clients:
+            t = time.perf_counter()
+            response = client.get(SWEEP.format(steps=401 + i) + "&async=1")
+            submit_times.append(time.perf_counter() - t)
+            assert response.status_code == 202, response.status_code
+            status_urls.append((client, response.headers["Location"]))
+
+    # Watch the table until the queue is drained
+    conn = sqlite3.connect(app.config["DATABASE"])
+    most_running = 0
+    while True:
+        counts = conn.execute("""
+            SELECT status, user_id, COUNT(*) FROM jobs GROUP BY status, user_id
+        """).fetchall()
+        running = [count for status, _, count in counts if status == "running"]
+        most_running = max([most_running] + running)
+        if not any(status in ("queued", "running") for status, _, _ in counts):
+            break
+        time.sleep(0.01)
+    drained = time.perf_counter() - start
+
+    statuses = [client.get(url).get_json()["status"] for client, url in status_urls]
+    limit = app.config["JOB_MAX_RUNNING_PER_USER"]
+    print(f"synchronous request:   {synchronous * 1000:8.1f} ms")
+    print(f"median submission:     {sorted(submit_times)[len(submit_times) // 2] * 1000:8.1f} ms")
+    print(f"{len(statuses)} jobs drained in {drained:.2f} s with {args.workers} workers: "
+          f"{statuses.count('done')} done, {statuses.count('failed')} failed")
+    print(f"most jobs running for one user: {most_running} (limit {limit})")
+    return 0 if most_running <= limit and statuses.count("done") == len(statuses) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Login throughput, and how a login burst affects the simulation route.
+
+Run from the project root:  python -m benchmarks.login_throughput [--logins 40 --threads 8]
+Also checks that a login verifies the password once and upgrades outdated hashes.
+"""
+import argparse
+import sqlite3
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app import app
+import app.auth as auth
+from benchmarks.common import PASSWORD, USERNAME, logged_in_client, seed_database
+
+
+def login(_):
+    client = app.test_client()
+    response = client.post("/login", data={"username": USERNAME, "password": PASSWORD})
+    assert response.status_code == 302, "login failed"
+
+
+def run_burst(logins, threads):
+    # Concurrent logins while one client keeps submitting simulations
+    simulation_client = logged_in_client(app)
+    latencies = []
+    done = threading.Event()
+
+    def simulate():
+        while not done.is_set():
+            start = time.perf_counter()
+            simulation_client.post("/", data={"element": 1, "n0": 100, "t": 10})
+            latencies.append(time.perf_counter() - start)
+
+    watcher = threading.Thread(target=simulate)
+    watcher.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    watcher.join()
+    return logins / elapsed, statistics.median(latencies) * 1000, max(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    path = seed_database(0)
+    app.config["DATABASE"] = path
+    app.config["WTF_CSRF_ENABLED"] = False
+    method, salt_length = app.config["PASSWORD_HASH_METHOD"], app.config["PASSWORD_SALT_LENGTH"]
+
+    # A login runs exactly one password check
+    with mock.patch("app.auth.check_password_hash", wraps=check_password_hash) as check:
+        login(0)
+    print(f"password checks per login: {check.call_count}")
+
+    # A hash with outdated parameters is replaced at the next login
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE users SET password = ? WHERE name = ?",
+                 (generate_password_hash(PASSWORD, "pbkdf2:sha256:50000"), USERNAME))
+    conn.commit()
+    login(0)
+    stored = conn.execute("SELECT password FROM users WHERE name = ?", (USERNAME,)).fetchone()[0]
+    print(f"outdated pbkdf2 hash upgraded at login: {stored.split('$', 1)[0]}")
+    conn.close()
+
+    for workers in (0, 1, 2, 4):
+        auth.configure_hashing(method, salt_length, workers)
+        rate, p50, worst = run_burst(args.logins, args.threads)
+        label = "request thread" if workers == 0 else f"{workers} hash workers"
+        print(f"{label:>16}: {rate:6.1f} logins/s; simulation route during burst "
+              f"p50 {p50:7.1f} ms, max {worst:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
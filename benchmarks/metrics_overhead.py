@@ -0,0 +1,63 @@
+"""Cost of the built-in instrumentation on real requests.
+
+Run from the project root:  python -m benchmarks.metrics_overhead [--requests 2000]
+"""
+import argparse
+import time
+
+from app import app
+from app.metrics import SQL_LATENCY, configure_metrics
+from benchmarks.common import logged_in_client, seed_database
+
+PATHS = ["/history", "/simulation/1", "/element/1/units"]
+
+
+def requests_per_second(client, count):
+    start = time.perf_counter()
+    for i in range(count):
+        response = client.get(PATHS[i % len(PATHS)])
+        assert response.status_code == 200, response.status_code
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    app.config["DATABASE"] = seed_database(200)
+    client = logged_in_client(app)
+    # Warm the plot cache and the catalog so every round does the same work
+    requests_per_second(client, len(PATHS))
+
+    modes = [("metrics off", False, False), ("metrics on", True, False), ("metrics + Server-Timing", True, True)]
+    best = {}
+    for _ in range(args.rounds):
+        for label, enabled, server_timing in modes:
+            configure_metrics(enabled, server_timing)
+            rate = requests_per_second(client, args.requests)
+            best[label] = max(best.get(label, 0), rate)
+
+    baseline = best["metrics off"]
+    for label, _, _ in modes:
+        overhead = (1 / best[label] - 1 / baseline) * 1e6
+        print(f"{label:>24}: {best[label]:8.0f} req/s  ({overhead:+6.1f} µs per request)")
+
+    # What a scrape and a timed response look like
+    configure_metrics(True, True)
+    print("Server-Timing:", client.get("/history").headers.get("Server-Timing"))
+    lines = client.get("/metrics").get_data(as_text=True).splitlines()
+    print(f"/metrics: {len(lines)} lines, e.g.")
+    print("\n".join([line for line in lines if "_count" in line][:6]))
+
+    # Cost of one histogram observation
+    count = 200_000
+    start = time.perf_counter()
+    for _ in range(count):
+        SQL_LATENCY.observe(0.001, "SELECT")
+    print(f"one observation: {(time.perf_counter() - start) / count * 1e9:.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Bulk-import synthetic nuclide catalogs and time the type-ahead search at each size.
+
+Run from the project root:  python -m benchmarks.nuclide_catalog [--sizes 1000 10000 100000]
+For every size, a throwaway seeded database gets a generated CSV through read_nuclides and
+import_nuclides (the same path as populate_elements.py); the script prints the import time,
+a re-import of the unchanged file, search latency through the FTS5 prefix index against a
+LIKE scan of the table, /elements/search through the test client, and the size of the
+simulation form page, which must not grow with the catalog.
+"""
+import argparse
+import io
+import random
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from app import app
+from app.nuclides import import_nuclides, read_nuclides, search_elements
+from app.routes import configure_services
+from benchmarks.common import logged_in_client, seed_database
+
+NAMES = ["Hydrogen", "Carbon", "Nitrogen", "Oxygen", "Sodium", "Phosphorus", "Sulfur", "Potassium",
+         "Calcium", "Cobalt", "Nickel", "Krypton", "Rubidium", "Strontium", "Yttrium", "Zirconium",
+         "Technetium", "Ruthenium", "Iodine", "Xenon", "Cesium", "Barium", "Cerium", "Promethium",
+         "Europium", "Gadolinium", "Iridium", "Gold", "Thallium", "Lead", "Bismuth", "Polonium",
+         "Astatine", "Radon", "Francium", "Radium", "Actinium", "Thorium", "Protactinium", "Uranium",
+         "Neptunium", "Plutonium", "Americium", "Curium"]
+MODES = ["A", "B-", "B+", "EC", "IT", "SF", "B- N", "EC B+"]
+UNITS = ["seconds", "minutes", "hours", "days", "years"]
+
+
+def nuclide_csv(count, seed=0):
+    # `count` unique isotopes and isomers ("Iodine-131", "Iodine-131m2"), as CSV text
+    rng = random.Random(seed)
+    names = [f"{name}-{mass}{isomer}" for isomer in ["", "m", "m2", "m3", "m4", "m5", "m6", "m7", "m8", "m9"]
+             for mass in range(1, 300) for name in NAMES]
+    lines = ["name,half_life,unit,decay_modes,quantity_unit"]
+    for name in names[:count]:
+        lines.append(f"{name},{10 ** rng.uniform(-6, 10):.6g},{rng.choice(UNITS)},{rng.choice(MODES)},grams")
+    return "\n".join(lines) + "\n"
+
+
+def queries(count, seed=1):
+    # What someone types: a name prefix, a prefix plus mass number, or a decay mode plus name
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        name = rng.choice(NAMES)
+        kind = rng.randrange(3)
+        if kind == 0:
+            result.append(name[:rng.randint(1, 5)])
+        elif kind == 1:
+            result.append(f"{name[:rng.randint(3, 6)]} {rng.randint(1, 29)}")
+        else:
+            result.append(f"{rng.choice(['A', 'EC', 'B'])} {name[:3]}")
+    return result
+
+
+def percentiles(function, inputs):
+    latencies = []
+    for value in inputs:
+        start = time.perf_counter()
+        function(value)
+        latencies.append(time.perf_counter() - start)
+    return np.percentile(np.asarray(latencies) * 1000, [50, 95])
+
+
+def like_scan(conn, text, limit):
+    # The unindexed alternative: every word must appear somewhere in the name or decay modes
+    words = text.split()
+    conditions = " AND ".join(["(name LIKE ? OR decay_modes LIKE ?)"] * len(words))
+    params = [f"%{word}%" for word in words for _ in range(2)]
+    return conn.execute(f"""
+        SELECT id, name FROM elements WHERE {conditions} ORDER BY length(name), name LIMIT ?
+    """, params + [limit]).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--searches", type=int, default=300)
+    args = parser.parse_args()
+
+    limit = app.config["ELEMENT_SEARCH_LIMIT"]
+    searches = queries(args.searches)
+    print(f"{'nuclides':>9} {'import s':>9} {'reimport s':>11} {'fts p50/p95 ms':>16} "
+          f"{'like p50/p95 ms':>16} {'http p50/p95 ms':>16} {'form KiB':>9}")
+    for size in args.sizes:
+        app.config.update(DATABASE=seed_database(10), METRICS_ENABLED=False)
+        configure_services()
+        text = nuclide_csv(size)
+        conn = sqlite3.connect(app.config["DATABASE"])
+        conn.row_factory = sqlite3.Row
+
+        # Import the file, then the same file again (every row unchanged, so nothing is written)
+        start = time.perf_counter()
+        import_nuclides(conn, read_nuclides(io.StringIO(text)))
+        imported = time.perf_counter() - start
+        start = time.perf_counter()
+        import_nuclides(conn, read_nuclides(io.StringIO(text)))
+        reimported = time.perf_counter() - start
+
+        fts = percentiles(lambda q: search_elements(conn, q, limit), searches)
+        like = percentiles(lambda q: like_scan(conn, q, limit), searches)
+        conn.close()
+
+        # Through the app: JSON search responses and the simulation form
+        client = logged_in_client(app)
+        http = percentiles(lambda q: client.get("/elements/search", query_string={"q": q}), searches)
+        form = len(client.get("/").data) / 1024
+        print(f"{size:>9} {imported:9.2f} {reimported:11.2f} {fts[0]:7.2f}/{fts[1]:<8.2f} "
+              f"{like[0]:7.2f}/{like[1]:<8.2f} {http[0]:7.2f}/{http[1]:<8.2f} {form:9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Compare the size of result.html and simulation_detail.html per plot payload mode.
+
+Run from the project root:  python -m benchmarks.plot_payload
+"""
+import math
+
+from flask import render_template
+
+from app import app
+from app.plot import plotlyjs_bundle
+from app.routes import decay_plot_context
+
+# A typical Carbon-14 simulation
+N0 = 100.0
+T = 10000.0
+HALF_LIFE = 5730.0
+
+
+def render_pages(payload):
+    # Render both plot pages with the given payload mode and return their sizes in bytes
+    app.config["PLOT_PAYLOAD"] = payload
+    lam = math.log(2) / HALF_LIFE
+    row = {
+        "id": 1, "element_name": "Carbon-14", "n0": N0, "t": T, "half_life": HALF_LIFE,
+        "nt": N0 * math.exp(-lam * T), "timestamp": "2024-01-01 00:00:00",
+    }
+    with app.test_request_context("/"):
+        plot_context = decay_plot_context(N0, lam, t_max=int(T * 1.5))
+        result = render_template("result.html", n0=N0, t=T, half_life=HALF_LIFE, nt=row["nt"],
+                                 lam_str="%.5e" % lam, unit="years", quantity_unit="grams",
+                                 name="Carbon-14", timestamp=row["timestamp"], **plot_context)
+        detail = render_template("simulation_detail.html", row=row, lam_str="%.5e" % lam,
+                                 nt_str="%.5f" % row["nt"], unit="years", quantity_unit="grams",
+                                 **plot_context)
+    return {"result.html": len(result.encode()), "simulation_detail.html": len(detail.encode())}
+
+
+def main():
+    original = app.config["PLOT_PAYLOAD"]
+    before = render_pages("html")
+    after = render_pages("json")
+    app.config["PLOT_PAYLOAD"] = original
+
+    print(f"{'page':<24}{'inline html':>14}{'json spec':>14}{'saved':>10}")
+    for page in before:
+        saved = 1 - after[page] / before[page]
+        print(f"{page:<24}{before[page]:>14,}{after[page]:>14,}{saved:>10.1%}")
+    # The bundle is downloaded once and then served from the browser cache
+    print(f"plotly.js bundle (cached once): {len(plotlyjs_bundle().encode()):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
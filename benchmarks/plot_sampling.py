@@ -0,0 +1,62 @@
+"""Adaptive plot sampling: points per curve against the old fixed grid, and render times.
+
+Run from the project root:  python -m benchmarks.plot_sampling [--tolerance 1e-3]
+Point counts and the interpolation error bound are checked by tests/test_plot_sampling.py.
+"""
+import argparse
+import math
+import time
+
+from app.plot import (axis_tolerance, decay_time_grid, load_plot_backends, plot_range, render_decay_plot,
+                      render_decay_plot_image)
+
+# (label, half-life, elapsed time, N₀); plots cover 1.5 times the elapsed time
+CASES = [
+    ("Iodine-131 over 0.5 days", 8.02, 0.5, 100.0),
+    ("Iodine-131 over 60 days", 8.02, 60.0, 100.0),
+    ("Carbon-14 over 10,000 years", 5730.0, 10000.0, 500.0),
+    ("Radon-222 over 30 days", 3.82, 30.0, 1000.0),
+    ("Polonium-214 over 1 s", 164.3e-6, 1.0, 1.0),
+    ("Uranium-238 over 5 years", 4.468e9, 5.0, 1000.0),
+    ("Uranium-238 over 10^11 years", 4.468e9, 1e11, 1000.0),
+    ("Cesium-137, N0 = 10^9 (clipped axis)", 30.17, 100.0, 1e9),
+]
+
+
+def legacy_points(t_max):
+    # What the renderers used before: the truncated, floored t_max and 500 points per unit
+    t_max = max(int(t_max), 0.1)
+    return min(1000, max(100, int(t_max * 500)))
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tolerance", type=float, default=1e-3)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # Load Plotly and Matplotlib outside the measurements
+    load_plot_backends()
+
+    print(f"{'case':40} {'before':>7} {'after':>6} {'grid µs':>8} {'plotly ms':>10} {'png ms':>7}")
+    for label, half_life, t, n0 in CASES:
+        lam = math.log(2) / half_life
+        t_max = plot_range(lam, t * 1.5)
+        tolerance = axis_tolerance(n0, args.tolerance)
+        points = len(decay_time_grid(lam, t_max, tolerance))
+        grid = timed(lambda: decay_time_grid(lam, t_max, tolerance), args.repeat * 50) * 1000
+        plotly = timed(lambda: render_decay_plot.__wrapped__(n0, lam, t * 1.5, tolerance=args.tolerance), args.repeat)
+        png = timed(lambda: render_decay_plot_image.__wrapped__(n0, lam, t * 1.5, args.tolerance), args.repeat)
+        print(f"{label:40} {legacy_points(t * 1.5):7d} {points:6d} {grid:8.1f} {plotly:10.2f} {png:7.1f}")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Throughput of the production server (gunicorn, gunicorn.conf.py) against the dev server.
+
+Run from the project root:  python -m benchmarks.serving [--clients 16 --seconds 10 --workers 4]
+Both servers run on a throwaway seeded database. Also checks that a session cookie
+is accepted by every worker and survives a server restart.
+"""
+import argparse
+import http.cookiejar
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from benchmarks.common import PASSWORD, ROOT, USERNAME, seed_database
+
+PATHS = ["/history", "/simulation/1", "/element/1/units", "/"]
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    # A redirect to /login means the session was rejected, so surface it as an error
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, port, env, workers):
+    if kind == "dev":
+        code = f"from app import create_app; create_app().run(port={port}, threaded=True)"
+        command = [sys.executable, "-c", code]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}",
+                   "--workers", str(workers), "--access-logfile", "/dev/null", "wsgi:app"]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    # Wait until the server answers
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/login", timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    sys.exit(f"{kind} server did not start")
+
+
+def logged_in_opener(base, cookies=None):
+    cookies = cookies if cookies is not None else http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies), NoRedirect)
+    data = urllib.parse.urlencode({"username": USERNAME, "password": PASSWORD}).encode()
+    try:
+        opener.open(base + "/login", data)
+    except urllib.error.HTTPError as e:
+        if e.code != 302:
+            raise
+    return opener, cookies
+
+
+def load(base, clients, seconds):
+    # Each client logs in once, then cycles through the pages until time is up
+    latencies, failures = [], []
+    stop = time.time() + seconds
+
+    def client():
+        opener, _ = logged_in_opener(base)
+        i = 0
+        while time.time() < stop:
+            start = time.perf_counter()
+            try:
+                opener.open(base + PATHS[i % len(PATHS)]).read()
+                latencies.append(time.perf_counter() - start)
+            except urllib.error.HTTPError as e:
+                failures.append(e.code)
+            i += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / seconds, latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() * 2 + 1)
+    args = parser.parse_args()
+
+    # No RADIOACTIVE_SECRET_KEY: the servers share the generated key in instance/secret_key
+    env = {**os.environ, "RADIOACTIVE_DATABASE": seed_database(500), "RADIOACTIVE_WTF_CSRF_ENABLED": "false"}
+    env.pop("RADIOACTIVE_SECRET_KEY", None)
+
+    for kind in ("dev", "gunicorn"):
+        port = free_port()
+        process = start_server(kind, port, env, args.workers)
+        base = f"http://127.0.0.1:{port}"
+        try:
+            rate, latencies, failures = load(base, args.clients, args.seconds)
+            quantiles = statistics.quantiles(latencies, n=100)
+            label = "flask dev server" if kind == "dev" else f"gunicorn, {args.workers} workers"
+            print(f"{label:>22}: {rate:7.0f} req/s  p50 {quantiles[49] * 1000:6.1f} ms  "
+                  f"p95 {quantiles[94] * 1000:6.1f} ms  errors {dict((c, failures.count(c)) for c in set(failures))}")
+
+            # A session from before a restart is still valid afterwards
+            if kind == "gunicorn":
+                _, cookies = logged_in_opener(base)
+                process.terminate()
+                process.wait()
+                process = start_server(kind, port, env, args.workers)
+                opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies), NoRedirect)
+                try:
+                    opener.open(base + "/history").read()
+                    print("session cookie still valid after a restart")
+                except urllib.error.HTTPError as e:
+                    print(f"session rejected after a restart (HTTP {e.code})")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
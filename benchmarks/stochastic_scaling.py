@@ -0,0 +1,61 @@
+"""Monte Carlo mode: trajectories per second against the number of worker processes.
+
+Run from the project root:  python -m benchmarks.stochastic_scaling [--trajectories 100000]
+Also checks that a seed gives identical results whatever the worker count.
+"""
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+
+from app.stochastic import configure_stochastic, stochastic_decay
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trajectories", type=int, default=100_000)
+    parser.add_argument("--points", type=int, default=200)
+    parser.add_argument("--atoms", type=int, default=1000)
+    parser.add_argument("--shard-size", type=int, default=1000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # Iodine-131 (half-life 8.02 days) over three half-lives
+    lam = math.log(2) / 8.02
+    t_values = np.linspace(0, 24, args.points)
+
+    worker_counts = [0] + [w for w in (1, 2, 4, 8, 16, 32, 64) if w < args.max_workers] + [args.max_workers]
+    baseline = reference = None
+    for workers in dict.fromkeys(worker_counts):
+        configure_stochastic(workers, args.shard_size)
+        # Start the pool before timing so process start-up isn't counted
+        stochastic_decay(args.atoms, lam, t_values, 2 * args.shard_size, seed=0)
+
+        start = time.perf_counter()
+        stats = stochastic_decay(args.atoms, lam, t_values, args.trajectories, seed=42)
+        elapsed = time.perf_counter() - start
+        rate = args.trajectories / elapsed
+        baseline = baseline or rate
+        label = "inline" if workers == 0 else f"{workers} workers"
+        print(f"{label:>10}: {rate:12.0f} trajectories/s  speed-up {rate / baseline:5.2f}x")
+
+        # Same seed, same numbers, however the shards were distributed
+        if reference is None:
+            reference = stats
+        assert np.array_equal(stats["mean"], reference["mean"])
+        assert all(np.array_equal(stats["percentiles"][p], reference["percentiles"][p])
+                   for p in reference["percentiles"])
+
+    # The mean should sit on the deterministic curve within a few standard errors
+    expected = args.atoms * np.exp(-lam * t_values)
+    standard_error = np.sqrt(args.atoms * np.exp(-lam * t_values) * (1 - np.exp(-lam * t_values))
+                             / args.trajectories)
+    worst = np.max(np.abs(reference["mean"] - expected)[1:] / standard_error[1:])
+    print(f"mean vs N₀·e^(–λt): worst deviation {worst:.1f} standard errors")
+    print(f"({os.cpu_count()} CPUs available; expect near-linear speed-up up to that many workers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Offline benchmark suite: plot and PDF micro-benchmarks plus a test-client load driver.
+
+Run from the project root:
+    python -m benchmarks.suite [--rows 1000] [--requests 200] [--threads 4]
+    python -m benchmarks.suite --save                 # record benchmarks/baseline.json
+    python -m benchmarks.suite --threshold 0.25       # exit 1 if slower than the baseline
+
+Everything runs in-process against a throwaway seeded database. Each benchmark reports
+p50/p95/p99 latency (ms) and operations per second. With a baseline file present, a
+benchmark regresses when its p50 or p95 is more than `threshold` (and `--min-delta` ms)
+slower than recorded; save the baseline on the same machine the comparisons will run on.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app import app
+from app.pdf import load_pdf_backend, pdf_cache, write_pdf
+from app.plot import generate_decay_plot, generate_decay_plot_image, plot_cache, plot_image_cache
+from app.reports import build_report_html
+from app.routes import configure_services
+from benchmarks.common import ELEMENTS, PASSWORD, USERNAME, logged_in_client, seed_database
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def summarize(latencies, wall):
+    # Percentiles in milliseconds and throughput over the wall time of the run
+    ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"count": len(latencies), "p50": round(float(p50), 3), "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3), "per_second": round(len(latencies) / wall, 1)}
+
+
+def measure(function, count):
+    # Call `function(i)` `count` times on this thread, timing each call
+    latencies = []
+    start = time.perf_counter()
+    for i in range(count):
+        t = time.perf_counter()
+        function(i)
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def plot_params(count, seed=0):
+    # Reproducible (n0, λ, t_max) triples over the seeded isotopes
+    rng = random.Random(seed)
+    params = []
+    for _ in range(count):
+        _, half_life, _ = rng.choice(ELEMENTS)
+        params.append((round(rng.uniform(1, 1000), 3), math.log(2) / half_life,
+                       round(rng.uniform(0, 3 * half_life), 3) * 1.5))
+    return params
+
+
+def pdf_available():
+    # WeasyPrint needs native libraries (Pango); PDF benchmarks are skipped without them
+    try:
+        load_pdf_backend()
+    except OSError as e:
+        print(f"skipping PDF benchmarks: {e}", file=sys.stderr)
+        return False
+    return True
+
+
+def micro_benchmarks(count):
+    results = {}
+    tolerance = app.config["PLOT_TOLERANCE"]
+    params = plot_params(count)
+
+    # Cold: every call renders; warm: the same plot again from the cache
+    def plot(i, clear):
+        if clear:
+            plot_cache.clear()
+        generate_decay_plot(*params[i], tolerance=tolerance)
+
+    def image(i, clear):
+        if clear:
+            plot_image_cache.clear()
+        generate_decay_plot_image(*params[i], tolerance=tolerance)
+
+    for name, function in (("generate_decay_plot", plot), ("generate_decay_plot_image", image)):
+        function(0, True)  # load the plotting libraries outside the measurement
+        results[f"micro.{name}.cold"] = measure(lambda i: function(i, True), count)
+        function(0, False)
+        results[f"micro.{name}.warm"] = measure(lambda i: function(0, False), count)
+
+    # PDF path: report HTML (with its plot) and the WeasyPrint render, on this thread
+    with app.test_request_context():
+        conn = seed_connection()
+        rows = conn.execute("""
+            SELECT s.*, e.name AS element_name, e.half_life, e.unit, e.quantity_unit
+            FROM simulations s JOIN elements e ON s.element_id = e.id
+            ORDER BY s.id LIMIT ?
+        """, (count,)).fetchall()
+        conn.close()
+
+        def report_html(i):
+            plot_image_cache.clear()
+            build_report_html(rows[i % len(rows)])
+        results["micro.build_report_html"] = measure(report_html, count)
+
+        if pdf_available():
+            html, base_url = build_report_html(rows[0])
+            write_pdf(html, base_url)
+            results["micro.write_pdf"] = measure(lambda i: write_pdf(html, base_url), max(1, count // 5))
+    return results
+
+
+def seed_connection():
+    conn = sqlite3.connect(app.config["DATABASE"])
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def run_load(name, make_request, requests, threads):
+    # Spread `requests` calls of make_request(client, i) over `threads` logged-in clients
+    clients = [logged_in_client(app) for _ in range(threads)]
+    latencies = []
+    lock = threading.Lock()
+    failures = []
+
+    def worker(index):
+        client = clients[index]
+        local = []
+        for i in range(index, requests, threads):
+            t = time.perf_counter()
+            response = make_request(client, i)
+            local.append(time.perf_counter() - t)
+            if response.status_code >= 400:
+                failures.append(f"{name}: HTTP {response.status_code}")
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    if failures:
+        raise RuntimeError(failures[0])
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def load_benchmarks(rows, requests, threads):
+    rng = random.Random(1)
+    # Every client is user 1, who owns all the seeded simulations
+    ids = [rng.randint(1, rows) for _ in range(requests)]
+    simulate = [{"element": rng.randint(1, len(ELEMENTS)), "n0": round(rng.uniform(1, 1000), 3),
+                 "t": round(rng.uniform(0, 50), 3)} for _ in range(requests)]
+
+    def login(client, i):
+        return client.post("/login", data={"username": USERNAME, "password": PASSWORD})
+
+    def index_get(client, i):
+        return client.get("/")
+
+    def index_post(client, i):
+        return client.post("/", data=simulate[i])
+
+    def history(client, i):
+        return client.get("/history")
+
+    def detail(client, i):
+        return client.get(f"/simulation/{ids[i]}")
+
+    def export(client, i):
+        return client.get(f"/simulation/{ids[i]}/export")
+
+    scenarios = [("login", login, max(1, requests // 10)), ("index", index_get, requests),
+                 ("simulate", index_post, requests), ("history", history, requests),
+                 ("simulation_detail", detail, requests)]
+    if pdf_available():
+        scenarios.append(("export", export, max(1, requests // 4)))
+    results = {}
+    for name, function, count in scenarios:
+        # Start each scenario with cold caches, as after a deploy
+        plot_cache.clear()
+        plot_image_cache.clear()
+        pdf_cache.clear()
+        results[f"load.{name}"] = run_load(name, function, count, threads)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta):
+    # Benchmarks whose p50 or p95 grew by more than `threshold` over the baseline; changes
+    # under `min_delta` ms (timer noise on cache hits) never count
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        for key in ("p50", "p95"):
+            if result[key] > before[key] * (1 + threshold) and result[key] - before[key] > min_delta:
+                regressions.append(f"{name} {key}: {before[key]:.2f} ms -> {result[key]:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="simulations in the seeded database")
+    parser.add_argument("--requests", type=int, default=200, help="requests per load scenario")
+    parser.add_argument("--micro", type=int, default=50, help="calls per micro-benchmark")
+    parser.add_argument("--threads", type=int, default=4, help="concurrent test clients")
+    parser.add_argument("--only", choices=["micro", "load"])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, e.g. 0.25 = 25%%")
+    parser.add_argument("--min-delta", type=float, default=0.5, help="smallest slowdown in ms that counts")
+    args = parser.parse_args()
+
+    # Render PDFs on the request thread so the numbers don't depend on pool start-up
+    app.config.update(DATABASE=seed_database(args.rows), PDF_WORKERS=0, METRICS_ENABLED=False)
+    configure_services()
+
+    results = {}
+    if args.only in (None, "micro"):
+        results.update(micro_benchmarks(args.micro))
+    if args.only in (None, "load"):
+        results.update(load_benchmarks(args.rows, args.requests, args.threads))
+
+    print(f"{'benchmark':<40} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per s':>9}")
+    for name, r in results.items():
+        print(f"{name:<40} {r['count']:>6} {r['p50']:9.2f} {r['p95']:9.2f} {r['p99']:9.2f} {r['per_second']:9.1f}")
+
+    run = {
+        "meta": {"rows": args.rows, "requests": args.requests, "threads": args.threads, "micro": args.micro,
+                 "python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "results": results,
+    }
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare with (run with --save first)")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("meta", {}) != run["meta"]:
+        print("warning: the baseline was recorded with other settings or on another machine")
+    regressions = compare(results, baseline, args.threshold, args.min_delta)
+    for regression in regressions:
+        print("REGRESSION " + regression)
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%} of {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
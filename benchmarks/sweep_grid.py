@@ -0,0 +1,59 @@
+"""Time the broadcast sweep evaluation against computing every grid point on its own.
+
+Run from the project root:  python -m benchmarks.sweep_grid [--elements 5 --steps 100 1000]
+For square grids of elements × steps × steps, prints the time of a Python loop over
+math.exp (what one form submission per point amounts to, without the HTTP), of
+sweep_grid, and the memory the grid needs against SWEEP_MEMORY_BUDGET.
+"""
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+
+from app import app
+from app.sweep import grid_bytes, sweep_grid
+
+
+def loop_grid(half_lives, n0_values, t_values):
+    return [[[n0 * math.exp(-math.log(2) / half_life * t) for t in t_values] for n0 in n0_values]
+            for half_life in half_lives]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=5)
+    parser.add_argument("--steps", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--loop-limit", type=int, default=2_000_000,
+                        help="skip the Python loop above this many points")
+    args = parser.parse_args()
+
+    budget = app.config["SWEEP_MEMORY_BUDGET"]
+    half_lives = np.geomspace(1e-3, 1e9, args.elements)
+    print(f"{'grid':>18} {'points':>10} {'loop s':>8} {'numpy s':>8} {'MiB':>7} {'fits budget':>12}")
+    for steps in args.steps:
+        n0_values = np.linspace(1, 1000, steps)
+        t_values = np.linspace(0, 100, steps)
+        points = args.elements * steps * steps
+
+        start = time.perf_counter()
+        grid = sweep_grid(half_lives, n0_values, t_values)
+        vectorized = time.perf_counter() - start
+
+        looped = "-"
+        if points <= args.loop_limit:
+            start = time.perf_counter()
+            reference = np.array(loop_grid(half_lives.tolist(), n0_values.tolist(), t_values.tolist()))
+            looped = f"{time.perf_counter() - start:8.2f}"
+            assert np.allclose(grid, reference, rtol=1e-12, atol=0)
+
+        needed = grid_bytes(args.elements, steps, steps)
+        shape = f"{args.elements}x{steps}x{steps}"
+        print(f"{shape:>18} {points:>10} {looped:>8} {vectorized:8.3f} {needed / 2 ** 20:7.1f} "
+              f"{'yes' if needed <= budget else 'no':>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
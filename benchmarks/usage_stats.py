@@ -0,0 +1,121 @@
+"""Compare the /stats summary tables with ad-hoc aggregates, and check the triggers.
+
+Run from the project root:  python -m benchmarks.usage_stats [--sizes 10000 100000 300000]
+For every table size, prints the time to read the dashboard from the summary tables and
+to compute the same numbers from simulations, the cost the triggers add to a batch of
+inserts, and whether the tables still match a full rebuild after random inserts, edits
+and deletes.
+"""
+import argparse
+import random
+import sqlite3
+import sys
+import time
+
+from app.stats import STATS_METRICS, _bucket, read_dashboard, rebuild_stats
+from benchmarks.common import seed_database
+
+TRIGGERS = ("stats_simulation_insert", "stats_simulation_delete", "stats_simulation_update")
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def ad_hoc(conn, top):
+    # What the dashboard would cost without the summary tables
+    conn.execute("SELECT user_id, COUNT(*) AS c FROM simulations GROUP BY user_id ORDER BY c DESC LIMIT ?",
+                 (top,)).fetchall()
+    conn.execute("""
+        SELECT e.name, COUNT(*) AS c FROM simulations s JOIN elements e ON e.id = s.element_id
+        GROUP BY s.element_id ORDER BY c DESC LIMIT ?
+    """, (top,)).fetchall()
+    for metric in STATS_METRICS:
+        conn.execute(f"""
+            SELECT bucket, COUNT(*), SUM(value) FROM (
+                SELECT {_bucket(f"s.{metric}")} AS bucket, s.{metric} AS value FROM simulations s
+            ) GROUP BY bucket
+        """).fetchall()
+
+
+def snapshot(conn):
+    # Counts exactly, running totals to a relative 1e-9
+    users = conn.execute("SELECT user_id, simulations FROM stats_users WHERE simulations > 0 ORDER BY 1").fetchall()
+    elements = conn.execute("SELECT element_id, simulations FROM stats_elements WHERE simulations > 0 ORDER BY 1").fetchall()
+    values = conn.execute("""
+        SELECT metric, bucket, simulations, total FROM stats_values WHERE simulations > 0 ORDER BY 1, 2
+    """).fetchall()
+    return users, elements, [(m, b, c, float(f"{total:.9e}")) for m, b, c, total in values]
+
+
+def new_rows(count, users, rng):
+    return [(rng.randint(1, users), rng.randint(1, 5), "x", rng.uniform(0, 1000), rng.uniform(0, 100),
+             rng.uniform(0, 1000), 1.0, "years", "grams", "2025-01-01 00:00:00") for _ in range(count)]
+
+
+def insert(conn, rows):
+    conn.executemany("""
+        INSERT INTO simulations (user_id, element_id, name, n0, t, nt, half_life, unit, quantity_unit, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 300000])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=10000, help="rows per timed insert batch")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'simulations':>11} {'summary ms':>11} {'ad hoc ms':>10} {'insert ms':>10} "
+          f"{'no triggers ms':>15} {'matches rebuild':>16}")
+    for size in args.sizes:
+        conn = sqlite3.connect(seed_database(size, users=args.users))
+        conn.row_factory = sqlite3.Row
+
+        summary = timed(lambda: read_dashboard(conn, 1, args.top), 50)
+        adhoc = timed(lambda: ad_hoc(conn, args.top), 3)
+
+        # The same batch with and without the triggers
+        start = time.perf_counter()
+        insert(conn, new_rows(args.batch, args.users, rng))
+        with_triggers = (time.perf_counter() - start) * 1000
+        saved = [conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (name,)).fetchone()[0]
+                 for name in TRIGGERS]
+        for name in TRIGGERS:
+            conn.execute(f"DROP TRIGGER {name}")
+        start = time.perf_counter()
+        insert(conn, new_rows(args.batch, args.users, rng))
+        without_triggers = (time.perf_counter() - start) * 1000
+        rebuild_stats(conn)
+        for sql in saved:
+            conn.execute(sql)
+        conn.commit()
+
+        # Random writes through the triggers, then compare with a rebuild
+        last = conn.execute("SELECT MAX(id) FROM simulations").fetchone()[0]
+        insert(conn, new_rows(500, args.users, rng))
+        for _ in range(500):
+            conn.execute("UPDATE simulations SET element_id = ?, n0 = ?, t = ?, nt = ? WHERE id = ?",
+                         (rng.randint(1, 5), rng.uniform(0, 1e6), rng.uniform(0, 1e3), rng.uniform(0, 1e-40),
+                          rng.randint(1, last)))
+        conn.execute("DELETE FROM simulations WHERE id IN (SELECT id FROM simulations ORDER BY random() LIMIT 500)")
+        conn.commit()
+        incremental = snapshot(conn)
+        rebuild_stats(conn)
+        matches = snapshot(conn) == incremental
+        conn.close()
+
+        print(f"{size:>11} {summary:11.2f} {adhoc:10.1f} {with_triggers:10.1f} {without_triggers:15.1f} "
+              f"{str(matches):>16}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+import argparse
+import sqlite3
+import time
+from app import app
+from app.thumbnails import build_thumbnails
+
+if __name__ == "__main__":
+    # Draw the thumbnails of every saved simulation, e.g. after a deploy or a new THUMBNAIL_SIZE
+    parser = argparse.ArgumentParser(description="Backfill the history page's curve thumbnails.")
+    parser.add_argument("--database", default=app.config["DATABASE"])
+    parser.add_argument("--directory", default=app.config["THUMBNAIL_DIR"])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    conn = sqlite3.connect(args.database)
+    try:
+        drawn = build_thumbnails(conn, args.directory, app.config["THUMBNAIL_SIZE"])
+    finally:
+        conn.close()
+    print(f"{drawn} thumbnails drawn in {time.perf_counter() - start:.2f} s.")
@@ -0,0 +1,34 @@
+# Production server configuration:  gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Settings can be changed with RADIOACTIVE_* environment variables (see app/__init__.py).
+# Set RADIOACTIVE_SECRET_KEY, or let the app share a generated key through instance/secret_key,
+# and point RADIOACTIVE_DATABASE at the database file.
+import multiprocessing
+import os
+
+# Address to listen on
+bind = os.environ.get("RADIOACTIVE_BIND", "127.0.0.1:8000")
+
+# Worker processes, each serving requests on several threads (pooled SQLite connections are per thread)
+workers = int(os.environ.get("RADIOACTIVE_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.environ.get("RADIOACTIVE_THREADS", 4))
+# Tell the app how many processes share the CPUs, so each one sizes its Monte Carlo pool to its share
+os.environ.setdefault("RADIOACTIVE_SERVER_WORKERS", str(workers))
+
+# Import the app in the master before forking: create_app() migrates the database, loads the
+# element catalog and (with WARM_UP) the rendering libraries once, and workers share them
+preload_app = True
+os.environ.setdefault("RADIOACTIVE_WARM_UP", "true")
+
+# PDF exports and large Monte Carlo runs can take a while
+timeout = 60
+graceful_timeout = 30
+
+# Restart workers now and then to bound memory growth from cached plots and PDFs
+max_requests = 5000
+max_requests_jitter = 500
+
+# Log requests and errors to stdout/stderr
+accesslog = "-"
+errorlog = "-"
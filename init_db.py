@@ -1,10 +1,8 @@
-import sqlite3
+from app.db import initialize_database
 
 def create_db():
-    conn = sqlite3.connect("radioactive.db")
-    with open("schema.sql", "r") as f:
-        conn.executescript(f.read())
-    conn.close()
+    # Create the tables from schema.sql and apply the migrations (indexes, etc.)
+    initialize_database("radioactive.db")
 
 if __name__ == "__main__":
     create_db()
@@ -0,0 +1,9 @@
+import sys
+from app import app
+from app.db import migrate_database
+
+if __name__ == "__main__":
+    # Upgrade the configured database, or the one given on the command line
+    path = sys.argv[1] if len(sys.argv) > 1 else app.config["DATABASE"]
+    version = migrate_database(path)
+    print(f"Database at schema version {version}.")
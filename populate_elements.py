@@ -1,31 +1,44 @@
+import argparse
+import os
 import sqlite3
+import time
+from app import app
+from app.db import initialize_database
+from app.nuclides import read_livechart, read_nuclides, import_nuclides
+
+# Catalog shipped with the app: the original isotopes with their decay modes. The full table
+# (about 3,000 radioactive ground states) is the IAEA LiveChart export, imported with
+# --format livechart from https://www-nds.iaea.org/relnsd/v1/data?fields=ground_states&nuclides=all
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nuclides.csv")
+
+
+# Parser of each supported CSV layout
+READERS = {"nuclides": read_nuclides, "livechart": read_livechart}
+
+
+def populate_elements(csv_path, database, format="nuclides"):
+    # Bring the schema up to date, then insert or update every nuclide in the CSV by name
+    initialize_database(database)
+    conn = sqlite3.connect(database)
+    try:
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            return import_nuclides(conn, READERS[format](f))
+    finally:
+        conn.close()
 
-def update_units():
-    units = {
-        "Carbon-14": ("years", "grams"),
-        "Uranium-238": ("years", "grams"),
-        "Uranium-235": ("years", "grams"),
-        "Thorium-232": ("years", "grams"),
-        "Radium-226": ("years", "grams"),
-        "Polonium-210": ("days", "grams"),
-        "Iodine-131": ("days", "grams"),
-        "Cesium-137": ("years", "grams"),
-        "Strontium-90": ("years", "grams"),
-        "Tritium": ("years", "grams"),
-        "Radon-222": ("days", "grams")
-    }
-
-    conn = sqlite3.connect("radioactive.db")
-    cursor = conn.cursor()
-
-    for name, (unit, quantity_unit) in units.items():
-        cursor.execute("""
-            UPDATE elements SET unit = ?, quantity_unit = ? WHERE name = ?
-        """, (unit, quantity_unit, name))
-
-    conn.commit()
-    conn.close()
-    print("Units updated successfully.")
 
 if __name__ == "__main__":
-    update_units()
+    parser = argparse.ArgumentParser(description="Load a nuclide CSV (name, half_life, unit, "
+                                                 "decay_modes, quantity_unit) into the elements table.")
+    parser.add_argument("csv", nargs="?", default=DEFAULT_CSV)
+    parser.add_argument("--database", default=app.config["DATABASE"])
+    parser.add_argument("--format", choices=sorted(READERS), default="nuclides",
+                        help="livechart reads the IAEA LiveChart ground-state export as downloaded")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        count = populate_elements(args.csv, args.database, args.format)
+    except ValueError as e:
+        parser.exit(1, f"{args.csv}: {e}\n")
+    print(f"{count} nuclides imported in {time.perf_counter() - start:.2f} s.")
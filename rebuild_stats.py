@@ -0,0 +1,17 @@
+import sys
+import sqlite3
+from app import app
+from app.db import migrate_database
+from app.stats import rebuild_stats
+
+if __name__ == "__main__":
+    # Recompute the dashboard's summary tables of the configured database, or the one given
+    path = sys.argv[1] if len(sys.argv) > 1 else app.config["DATABASE"]
+    migrate_database(path)
+    conn = sqlite3.connect(path)
+    try:
+        rebuild_stats(conn)
+        count = conn.execute("SELECT COALESCE(SUM(simulations), 0) FROM stats_users").fetchone()[0]
+    finally:
+        conn.close()
+    print(f"Statistics rebuilt from {count} simulations.")
@@ -1,4 +1,7 @@
-from app import app
+from app import create_app
+
+# Migrate the database and load the catalog like the production entry point (wsgi.py)
+app = create_app()
 
 # Start the development server
 if __name__ == "__main__":
@@ -25,5 +25,7 @@ CREATE TABLE IF NOT EXISTS simulations (
 CREATE TABLE IF NOT EXISTS elements (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT NOT NULL,
-    half_life REAL NOT NULL
+    half_life REAL NOT NULL,
+    unit TEXT DEFAULT 'years',
+    quantity_unit TEXT DEFAULT 'grams'
 );
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""Input checks of /api/simulations/batch."""
+import pytest
+
+from app import app
+from benchmarks.common import logged_in_client, seed_database
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Log in against a throwaway seeded database
+    monkeypatch.setitem(app.config, "DATABASE", seed_database(0))
+    monkeypatch.setitem(app.config, "WTF_CSRF_ENABLED", False)
+    return logged_in_client(app)
+
+
+def test_integer_ids_are_saved(client):
+    response = client.post("/api/simulations/batch", json=[[1, 100.0, 10.0], {"element_id": 2, "n0": 5, "t": 0}])
+
+    assert response.status_code == 200
+    assert [result["element_id"] for result in response.get_json()["results"]] == [1, 2]
+
+
+@pytest.mark.parametrize("element_id", [1.5, 1.0, "1", True])
+def test_non_integer_id_is_rejected_with_its_index(client, element_id):
+    response = client.post("/api/simulations/batch", json=[[1, 100.0, 10.0], [element_id, 100.0, 10.0]])
+
+    assert response.status_code == 400
+    assert response.get_json()["index"] == 1
+    # Nothing from the batch was saved
+    assert client.post("/api/simulations/batch", json=[[1, 1.0, 1.0]]).get_json()["results"][0]["id"] == 1
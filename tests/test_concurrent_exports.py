@@ -0,0 +1,87 @@
+"""PDF plot images rendered from several threads at once (per-request Agg canvases), directly
+and through parallel /simulation/<id>/export requests."""
+import base64
+import math
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+from app import app
+import app.pdf as pdf
+import app.reports as reports
+from app.plot import generate_decay_plot_images, plot_image_cache, render_decay_plot_image
+from benchmarks.common import logged_in_client, seed_database
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# One distinct (n0, λ, t_max) plot per export
+PARAMS = [(100.0 + 37 * i, math.log(2) / (1.0 + i), 2.0 + i) for i in range(16)]
+
+
+@pytest.fixture
+def uncached_images():
+    # Render every image instead of sharing cached PNGs between the threads
+    size = plot_image_cache.maxsize
+    plot_image_cache.resize(0)
+    yield
+    plot_image_cache.resize(size)
+
+
+def test_concurrent_renders_are_valid_and_distinct(uncached_images):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        images = list(pool.map(lambda params: generate_decay_plot_images([params])[0], PARAMS))
+
+    assert all(image.startswith(PNG_SIGNATURE) for image in images)
+    assert len(set(images)) == len(PARAMS)
+    # Each thread drew its own curve, exactly as a render on its own does
+    assert images == [render_decay_plot_image(*params) for params in PARAMS]
+
+
+def test_concurrent_batches_keep_their_order(uncached_images):
+    # Several exports rendering their batch of plots at the same time
+    batches = [PARAMS[i::4] for i in range(4)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(generate_decay_plot_images, batches))
+
+    expected = {params: render_decay_plot_image(*params) for params in PARAMS}
+    for batch, images in zip(batches, results):
+        assert images == [expected[params] for params in batch]
+
+
+@pytest.fixture
+def inline_pdfs(monkeypatch):
+    # Render on the request threads with a stand-in for WeasyPrint, and cache no PDFs
+    monkeypatch.setattr(pdf, "write_pdf", lambda html, base_url: b"%PDF-" + html.encode())
+    workers, size = pdf._pool.max_workers, pdf.pdf_cache.maxsize
+    pdf.configure_pdf_rendering(0, 0)
+    yield
+    pdf.configure_pdf_rendering(workers, size)
+
+
+def test_parallel_exports_embed_their_own_curve(monkeypatch, uncached_images, inline_pdfs):
+    exports = 16
+    monkeypatch.setitem(app.config, "DATABASE", seed_database(exports))
+    monkeypatch.setitem(app.config, "WTF_CSRF_ENABLED", False)
+
+    def export(sim_id):
+        response = logged_in_client(app).get(f"/simulation/{sim_id}/export")
+        return sim_id, response.status_code, response.mimetype
+
+    # Record the arguments of every report rendered while the exports run
+    with mock.patch.object(reports, "render_template", wraps=reports.render_template) as render:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(export, range(1, exports + 1)))
+
+    assert results == [(sim_id, 200, "application/pdf") for sim_id in range(1, exports + 1)]
+    embedded = {}
+    for call in render.call_args_list:
+        if call.args and call.args[0] == "pdf_exp.html":
+            embedded[call.kwargs["row"]["id"]] = (call.kwargs["row"], call.kwargs["plot_src"])
+    assert sorted(embedded) == list(range(1, exports + 1))
+
+    # Each report holds exactly the PNG of its own simulation's curve
+    for row, plot_src in embedded.values():
+        png = base64.b64decode(plot_src.split(",", 1)[1])
+        lam = math.log(2) / row["half_life"]
+        assert png == render_decay_plot_image(row["n0"], lam, t_max=row["t"] * 1.5)
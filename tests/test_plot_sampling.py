@@ -0,0 +1,90 @@
+"""Point counts and interpolation error of the adaptive decay plot grid (decay_time_grid)."""
+import math
+
+import numpy as np
+import pytest
+
+from app.plot import axis_tolerance, decay_time_grid, plot_range
+
+TOLERANCE = 1e-3
+
+# (label, half-life, elapsed time, N₀); plots cover 1.5 times the elapsed time
+CASES = [
+    ("Iodine-131 over 0.5 days", 8.02, 0.5, 100.0),
+    ("Iodine-131 over 60 days", 8.02, 60.0, 100.0),
+    ("Carbon-14 over 10,000 years", 5730.0, 10000.0, 500.0),
+    ("Radon-222 over 30 days", 3.82, 30.0, 1000.0),
+    ("Polonium-214 over 1 s", 164.3e-6, 1.0, 1.0),
+    ("Uranium-238 over 5 years", 4.468e9, 5.0, 1000.0),
+    ("Uranium-238 over 10^11 years", 4.468e9, 1e11, 1000.0),
+    ("Radon-222 over 0 days", 3.82, 0.0, 1000.0),
+    ("Cesium-137, N0 = 10^9 (clipped axis)", 30.17, 100.0, 1e9),
+]
+
+# Axes clipped so far that the tolerance would need more than the 1000-point cap
+CAPPED_CASES = [
+    ("Cesium-137, N0 = 10^12 (clipped axis)", 30.17, 100.0, 1e12),
+    ("Iodine-131, N0 = 10^15 (clipped axis)", 8.02, 60.0, 1e15),
+]
+ALL_CASES = CASES + CAPPED_CASES
+
+
+def plot_grid(half_life, t, n0, tolerance=TOLERANCE):
+    # The grid both renderers draw for a simulation
+    lam = math.log(2) / half_life
+    t_max = plot_range(lam, t * 1.5)
+    return lam, t_max, decay_time_grid(lam, t_max, axis_tolerance(n0, tolerance))
+
+
+def interpolation_error(n0, lam, t_values, axis_height):
+    # Largest gap between the straight segments and the exact curve, relative to the axis
+    dense = np.linspace(0, t_values[-1], 1_000_001)
+    exact = n0 * np.exp(-lam * dense)
+    drawn = np.interp(dense, t_values, n0 * np.exp(-lam * t_values))
+    return np.max(np.abs(drawn - exact)) / axis_height
+
+
+@pytest.mark.parametrize("label, half_life, t, n0", CASES, ids=[case[0] for case in CASES])
+def test_interpolation_error_within_tolerance(label, half_life, t, n0):
+    lam, t_max, t_values = plot_grid(half_life, t, n0)
+    assert len(t_values) < 1000
+    assert interpolation_error(n0, lam, t_values, min(n0, 1e6)) <= TOLERANCE
+
+
+@pytest.mark.parametrize("label, half_life, t, n0", CAPPED_CASES, ids=[case[0] for case in CAPPED_CASES])
+def test_capped_grid_error_bound(label, half_life, t, n0):
+    # At the cap the error exceeds the tolerance but stays within (u_max / 999)² × N₀
+    lam, t_max, t_values = plot_grid(half_life, t, n0)
+    assert len(t_values) == 1000
+    bound = (-math.expm1(-lam * t_max / 2) / 999) ** 2 * n0 / min(n0, 1e6)
+    assert TOLERANCE < interpolation_error(n0, lam, t_values, min(n0, 1e6)) <= bound
+
+
+@pytest.mark.parametrize("label, half_life, t, n0", ALL_CASES, ids=[case[0] for case in ALL_CASES])
+def test_grid_covers_the_plot_range(label, half_life, t, n0):
+    _, t_max, t_values = plot_grid(half_life, t, n0)
+    assert t_values[0] == 0
+    assert t_values[-1] == t_max
+    assert np.all(np.diff(t_values) > 0)
+
+
+@pytest.mark.parametrize("label, half_life, t, n0", ALL_CASES, ids=[case[0] for case in ALL_CASES])
+def test_point_count_bound(label, half_life, t, n0):
+    # At most 1/√tolerance + 1 points on the axis' tolerance, capped at max_points
+    _, _, t_values = plot_grid(half_life, t, n0)
+    bound = math.ceil(1 / math.sqrt(axis_tolerance(n0, TOLERANCE))) + 1
+    assert len(t_values) <= min(1000, bound)
+
+
+def test_point_counts():
+    # A nearly flat curve needs two points, unclipped curves at most 33
+    assert len(plot_grid(4.468e9, 5.0, 1000.0)[2]) == 2
+    assert max(len(plot_grid(h, t, n0)[2]) for _, h, t, n0 in CASES if n0 <= 1e6) <= 33
+    # Clipped axes need a finer grid, up to the cap
+    assert len(plot_grid(30.17, 100.0, 1e9)[2]) > 33
+    assert len(plot_grid(30.17, 100.0, 1e12)[2]) == 1000
+
+
+def test_finer_tolerance_needs_more_points():
+    counts = [len(plot_grid(8.02, 60.0, 100.0, tolerance)[2]) for tolerance in (1e-2, 1e-3, 1e-4)]
+    assert counts == sorted(counts) and counts[0] < counts[-1]